@@ -0,0 +1,4 @@
+"""Vectorized analytics utilities shared by the API endpoints."""
+from .downsample import DownsampleMethod, downsample
+
+__all__ = ["DownsampleMethod", "downsample"]
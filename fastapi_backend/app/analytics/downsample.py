@@ -0,0 +1,229 @@
+"""Chart series downsampling (LTTB with a min/max envelope).
+
+A day of 1-second readings is 86,400 points per series, far more than a
+chart can show. ``downsample`` reduces a series to ``max_points`` while
+keeping its visual shape:
+
+- ``lttb``: MinMaxLTTB. A min/max envelope preselects candidate points,
+  then Largest-Triangle-Three-Buckets picks one point per bucket. The
+  global minimum and maximum are always kept, so frequency excursions
+  survive.
+- ``minmax``: only the min/max envelope (the lowest and highest point of
+  each bucket).
+
+NaN values are treated as gaps. Each finite run is downsampled on its
+own, with a share of the budget proportional to its length, and a NaN
+point is emitted between runs so charts break the line there instead of
+drawing across the gap. Gaps narrower than one output bucket, and the
+shortest gaps beyond ``max_points // POINTS_PER_RUN``, are bridged
+instead, so the output never exceeds ``max_points``.
+"""
+from typing import Literal
+
+import numpy as np
+
+DownsampleMethod = Literal["lttb", "minmax"]
+
+# Candidates kept by the min/max preselection, per output point
+MINMAX_RATIO = 4
+
+# Least budget per finite run; limits how many gaps are kept as breaks
+POINTS_PER_RUN = 4
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the min and max of ``n_out // 2`` equal buckets, in order.
+
+    ``y`` must be finite. Returns all indices if the series is short.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 2:
+        return np.arange(n)
+    buckets = n_out // 2
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(_bucket_edges(n, buckets)))
+    order = np.lexsort((y, bucket_ids))
+    starts = np.flatnonzero(np.r_[True, bucket_ids[order][1:] != bucket_ids[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets selection over finite ``x``/``y``.
+
+    Keeps the first and last point and one point per inner bucket: the
+    one forming the largest triangle with the previous bucket's point
+    and the next bucket's average. Instead of walking the buckets one by
+    one, every bucket is scored at once in two passes: the first anchors
+    on the previous bucket's average, the second on the first pass's
+    picks.
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    inner_x, inner_y = x[1:-1], y[1:-1]
+    edges = _bucket_edges(n - 2, n_out - 2)
+    starts, sizes = edges[:-1], np.diff(edges)
+    bucket_ids = np.repeat(np.arange(n_out - 2), sizes)
+
+    avg_x = np.add.reduceat(inner_x, starts) / sizes
+    avg_y = np.add.reduceat(inner_y, starts) / sizes
+    # The last bucket looks ahead to the final point
+    next_x, next_y = np.r_[avg_x[1:], x[-1]], np.r_[avg_y[1:], y[-1]]
+
+    def pick(anchor_x: np.ndarray, anchor_y: np.ndarray) -> np.ndarray:
+        ax, ay = anchor_x[bucket_ids], anchor_y[bucket_ids]
+        area = np.abs(
+            (ax - next_x[bucket_ids]) * (inner_y - ay)
+            - (ax - inner_x) * (next_y[bucket_ids] - ay)
+        )
+        # Largest area first within each bucket, ties to the earliest point
+        return np.lexsort((-area, bucket_ids))[starts]
+
+    picked = pick(np.r_[x[0], avg_x[:-1]], np.r_[y[0], avg_y[:-1]])
+    picked = pick(np.r_[x[0], inner_x[picked[:-1]]], np.r_[y[0], inner_y[picked[:-1]]])
+    return np.r_[0, picked + 1, n - 1]
+
+
+def _keep_extremes(selected: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Swap the global min/max into the selection, replacing their nearest inner point."""
+    selected = selected.copy()
+    for extreme in (int(np.argmin(y)), int(np.argmax(y))):
+        if extreme in selected or len(selected) < 3:
+            continue
+        pos = int(np.clip(np.searchsorted(selected, extreme), 1, len(selected) - 2))
+        if abs(selected[pos - 1] - extreme) < abs(selected[pos] - extreme) and pos > 1:
+            pos -= 1
+        selected[pos] = extreme
+        selected.sort()
+    return selected
+
+
+def _finite_runs(y: np.ndarray) -> list[tuple[int, int]]:
+    """``[start, end)`` ranges of consecutive finite values."""
+    finite = np.isfinite(y).astype(np.int8)
+    change = np.diff(np.r_[0, finite, 0])
+    return list(zip(np.flatnonzero(change == 1), np.flatnonzero(change == -1), strict=True))
+
+
+def _segments(runs: list[tuple[int, int]], n: int, max_points: int) -> list[tuple[int, int]]:
+    """
+    Merge finite runs into ``[start, end)`` segments separated by kept gaps.
+
+    A gap narrower than one output bucket (``n / max_points`` samples)
+    would not show on a chart and is bridged. Of the rest, only the
+    longest ``max_points // POINTS_PER_RUN - 1`` are kept.
+    """
+    starts = np.array([start for start, _ in runs])
+    ends = np.array([end for _, end in runs])
+    widths = starts[1:] - ends[:-1]
+    keep = widths >= n / max_points
+    limit = max(0, max_points // POINTS_PER_RUN - 1)
+    if np.count_nonzero(keep) > limit:
+        keep = np.zeros_like(keep)
+        keep[np.argsort(-widths, kind="stable")[:limit]] = True
+    return list(
+        zip(np.r_[starts[0], starts[1:][keep]], np.r_[ends[:-1][keep], ends[-1]], strict=True)
+    )
+
+
+def _pick(x: np.ndarray, y: np.ndarray, n_out: int, method: DownsampleMethod) -> np.ndarray:
+    """Indices of at most ``n_out`` points of one finite segment."""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    if method == "minmax" and n_out >= 2:
+        return minmax_indices(y, n_out)
+    if n_out < 3:
+        return np.array([0, n - 1])[:n_out]
+    candidates = np.union1d(minmax_indices(y, n_out * MINMAX_RATIO), [0, n - 1])
+    picked = candidates[lttb_indices(x[candidates], y[candidates], n_out)]
+    return _keep_extremes(picked, y)
+
+
+def downsample_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    method: DownsampleMethod = "lttb",
+) -> np.ndarray:
+    """
+    Sorted indices of the points ``downsample`` keeps, NaN breaks included.
+
+    Returns every index when ``max_points`` is 0 or not below ``len(x)``.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if max_points <= 0 or len(x) <= max_points:
+        return np.arange(len(x))
+
+    runs = _finite_runs(y)
+    if not runs:
+        return np.arange(0)
+
+    finite = np.isfinite(y)
+    segments = _segments(runs, len(y), max_points)
+    gaps = len(segments) - 1
+    lengths = np.array([np.count_nonzero(finite[start:end]) for start, end in segments])
+    # At least one point each, the rest split in proportion to length
+    shares = 1 + (max_points - gaps - len(segments)) * lengths // lengths.sum()
+
+    parts: list[np.ndarray] = []
+    for i, ((start, end), n_out) in enumerate(zip(segments, shares, strict=True)):
+        indices = start + np.flatnonzero(finite[start:end])
+        parts.append(indices[_pick(x[indices], y[indices], int(n_out), method)])
+        if i < gaps:
+            parts.append(np.array([end]))  # first NaN after the segment
+    return np.concatenate(parts)
+
+
+def shared_indices(
+    x: np.ndarray,
+    ys: list[np.ndarray],
+    max_points: int,
+    method: DownsampleMethod = "lttb",
+) -> np.ndarray:
+    """
+    Indices keeping the shape of every series in ``ys`` on one time axis.
+
+    Each series picks its points from an equal share of ``max_points``;
+    the union is returned, so the result stays within the budget.
+    """
+    if max_points <= 0 or len(x) <= max_points or not ys:
+        return np.arange(len(x))
+    share = max(1, max_points // len(ys))
+    return np.unique(np.concatenate([downsample_indices(x, y, share, method) for y in ys]))
+
+
+def downsample(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    method: DownsampleMethod = "lttb",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to at most ``max_points`` points.
+
+    Args:
+        x: Sorted timestamps (e.g. epoch milliseconds)
+        y: Values; NaN marks missing readings
+        max_points: Output budget; 0 or a budget above ``len(x)``
+                    returns the series unchanged
+        method: ``lttb`` (shape-preserving) or ``minmax`` (envelope)
+
+    Returns:
+        ``(x, y)`` arrays; kept gaps between finite runs are one NaN point.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    x = np.asarray(x)
+    if max_points <= 0 or len(x) <= max_points:
+        return x, y
+    indices = downsample_indices(x, y, max_points, method)
+    return x[indices], y[indices]
@@ -0,0 +1,218 @@
+"""Streaming detection of under- and over-frequency excursions.
+
+``ExcursionDetector`` consumes meter samples in micro-batches and runs a
+hysteresis state machine on the frequency deviation from nominal:
+
+- an excursion starts when the deviation exceeds ``enter_hz`` (the
+  deadband edge), under- or over-frequency;
+- it ends only once the deviation is back inside ``exit_hz``
+  (``exit_hz < enter_hz``), so noise around the threshold does not
+  split one event into many.
+
+The state of each sample is the last threshold crossing before it, a
+forward fill over the batch; the open event is carried between batches.
+Every excursion records its duration, extreme frequency (the nadir of an
+under-frequency event), peak power and the energy delivered, integrated
+from ``KW_tot`` over the sample spacing. Work per sample is constant.
+
+``ExcursionIndex`` keeps the most recent events in memory for queries.
+"""
+import bisect
+from collections import deque
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Literal
+
+import numpy as np
+
+Direction = Literal["under", "over"]
+
+_NORMAL, _UNDER, _OVER = 0, 1, 2
+_CLEAR = 3  # Crossing back inside the exit band
+_DIRECTIONS: dict[int, Direction] = {_UNDER: "under", _OVER: "over"}
+
+
+@dataclass
+class Excursion:
+    """One frequency excursion; ``end`` is None while it is still open."""
+
+    direction: Direction
+    start: datetime
+    end: datetime | None
+    last_sample: datetime
+    extreme_freq: float
+    peak_kw: float
+    energy_kwh: float
+    sample_count: int
+
+    @property
+    def duration_s(self) -> float:
+        return ((self.end or self.last_sample) - self.start).total_seconds()
+
+    @property
+    def is_open(self) -> bool:
+        return self.end is None
+
+    def merge(self, later: "Excursion") -> "Excursion":
+        """Extend with the continuation of this excursion from a later batch."""
+        pick = min if self.direction == "under" else max
+        return replace(
+            later,
+            start=self.start,
+            extreme_freq=pick(self.extreme_freq, later.extreme_freq),
+            peak_kw=max(self.peak_kw, later.peak_kw, key=abs),
+            energy_kwh=self.energy_kwh + later.energy_kwh,
+            sample_count=self.sample_count + later.sample_count,
+        )
+
+
+def _to_datetime(value: np.datetime64) -> datetime:
+    return value.astype("datetime64[us]").astype(datetime)
+
+
+@dataclass
+class ExcursionDetector:
+    """Hysteresis excursion detector with state carried between batches."""
+
+    enter_hz: float = 0.02
+    exit_hz: float = 0.015
+    nominal_hz: float = 60.0
+    max_gap_s: float = 5.0  # Longest sample spacing counted as energy
+    _state: int = _NORMAL
+    _open: Excursion | None = None
+    _last_time: np.datetime64 | None = None
+
+    @property
+    def open_excursion(self) -> Excursion | None:
+        return self._open
+
+    def resume(self, excursion: Excursion) -> None:
+        """Continue an excursion left open by a previous run."""
+        self._state = _UNDER if excursion.direction == "under" else _OVER
+        self._open = excursion
+        self._last_time = np.datetime64(excursion.last_sample, "us")
+
+    def update(self, times: np.ndarray, freq: np.ndarray, kw: np.ndarray) -> list[Excursion]:
+        """
+        Process a batch of samples in time order.
+
+        Returns the excursions touched by the batch: those that ended
+        plus the one still open, if any (with ``end`` None).
+        """
+        if len(times) == 0:
+            return [self._open] if self._open else []
+        times = times.astype("datetime64[us]")
+        freq = freq.astype(np.float64)
+        kw = np.nan_to_num(kw.astype(np.float64))
+
+        # Threshold crossings; NaN frequency keeps the current state
+        deviation = freq - self.nominal_hz
+        signal = np.select(
+            [
+                deviation < -self.enter_hz,
+                deviation > self.enter_hz,
+                np.abs(deviation) < self.exit_hz,
+            ],
+            [_UNDER, _OVER, _CLEAR],
+            default=0,
+        )
+        # Forward-fill the last crossing
+        marks = np.where(signal > 0, np.arange(len(signal)), -1)
+        last = np.maximum.accumulate(marks)
+        state = np.where(last >= 0, signal[np.clip(last, 0, None)], self._state)
+        state = np.where(state == _CLEAR, _NORMAL, state)
+
+        # Energy of each sample over the spacing to the previous one
+        previous = np.r_[self._last_time if self._last_time is not None else times[0], times[:-1]]
+        spacing = (times - previous) / np.timedelta64(1, "s")
+        energy = kw * np.clip(spacing, 0.0, self.max_gap_s) / 3600.0
+
+        # Runs of constant state; excursion runs become events
+        starts = np.flatnonzero(np.r_[True, state[1:] != state[:-1]])
+        ends = np.r_[starts[1:], len(state)]
+        touched: list[Excursion] = []
+        for run_start, run_end in zip(starts, ends, strict=True):
+            run_state = int(state[run_start])
+            continues = run_start == 0 and run_state == self._state and self._open is not None
+            if run_state == _NORMAL:
+                continue
+            segment = slice(run_start, run_end)
+            pick = np.nanmin if run_state == _UNDER else np.nanmax
+            extreme = pick(freq[segment]) if not np.isnan(freq[segment]).all() else np.nan
+            peak = kw[segment][np.argmax(np.abs(kw[segment]))]
+            closed = run_end < len(state)
+            excursion = Excursion(
+                direction=_DIRECTIONS[run_state],
+                start=_to_datetime(times[run_start]),
+                end=_to_datetime(times[run_end]) if closed else None,
+                last_sample=_to_datetime(times[run_end - 1]),
+                extreme_freq=float(extreme),
+                peak_kw=float(peak),
+                energy_kwh=float(energy[segment].sum()),
+                sample_count=int(run_end - run_start),
+            )
+            if continues:
+                excursion = self._open.merge(excursion)
+            touched.append(excursion)
+
+        # The carried open event ends at the first sample of the batch
+        if self._open is not None and state[0] != self._state:
+            touched.insert(0, replace(self._open, end=_to_datetime(times[0])))
+
+        self._state = int(state[-1])
+        self._open = touched[-1] if touched and touched[-1].is_open else None
+        self._last_time = times[-1]
+        return touched
+
+
+class ExcursionIndex:
+    """
+    Most recent excursions in memory, ordered by start.
+
+    Once full, the oldest event is evicted; ``complete_after`` is the
+    start of the newest evicted event, so the index answers exactly the
+    queries starting after it.
+    """
+
+    def __init__(self, size: int = 1000):
+        self._events: deque[Excursion] = deque(maxlen=size)
+        self.complete_after: datetime | None = None
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def upsert(self, excursion: Excursion) -> None:
+        """Add an excursion, or replace the entry with the same start and direction."""
+        for i in range(len(self._events) - 1, -1, -1):
+            event = self._events[i]
+            if event.start == excursion.start and event.direction == excursion.direction:
+                self._events[i] = excursion
+                return
+            if event.start < excursion.start:
+                break
+        if len(self._events) == self._events.maxlen:
+            self.complete_after = self._events[0].start
+        self._events.append(excursion)
+
+    @property
+    def oldest(self) -> datetime | None:
+        return self._events[0].start if self._events else None
+
+    def covers(self, start: datetime) -> bool:
+        """Whether every excursion starting at or after ``start`` is in the index."""
+        return self.complete_after is None or start > self.complete_after
+
+    def query(
+        self,
+        start: datetime,
+        end: datetime,
+        direction: Direction | None = None,
+    ) -> list[Excursion]:
+        """Excursions starting in ``[start, end)``, newest first."""
+        starts = [event.start for event in self._events]
+        lo = bisect.bisect_left(starts, start)
+        hi = bisect.bisect_left(starts, end)
+        events = list(self._events)[lo:hi]
+        if direction is not None:
+            events = [event for event in events if event.direction == direction]
+        return events[::-1]
@@ -0,0 +1,152 @@
+"""Incremental dReg execution-rate (SBSPM) calculation.
+
+Each meter sample is scored against the dReg response curve:
+
+- the reference frequency (``BaseLine.baseline_freq``) gives the required
+  power: 0 inside the deadband, rising linearly to full capacity at
+  ``full_response_hz`` deviation (discharge on under-frequency);
+- the sample passes (SBSPM = 1) if ``KW_tot`` is within ``tolerance`` of
+  capacity of the required power, otherwise it scores 0.
+
+From the per-sample scores ``SbspmCalculator`` derives:
+
+- ``roll``: the mean over the trailing ``window`` seconds;
+- ``hour``: the mean since the start of the local clock hour.
+
+Both come from prefix sums over the carried window plus the new batch,
+so each sample costs O(1) additions instead of re-summing its window.
+State is carried between batches, so feeding rows in any batch sizes
+gives the same result as one pass.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+DATETIME_DTYPE = np.dtype("datetime64[us]")
+
+
+@dataclass(frozen=True)
+class DregCurve:
+    """dReg frequency/power response curve and pass tolerance."""
+
+    capacity_kw: float
+    nominal_hz: float = 60.0
+    deadband_hz: float = 0.02
+    full_response_hz: float = 0.25
+    tolerance: float = 0.03  # Fraction of capacity
+
+    def required_kw(self, freq: np.ndarray) -> np.ndarray:
+        """Required output (positive = discharge) for each frequency."""
+        deviation = self.nominal_hz - freq
+        response = np.clip(
+            (np.abs(deviation) - self.deadband_hz) / (self.full_response_hz - self.deadband_hz),
+            0.0,
+            1.0,
+        )
+        return np.sign(deviation) * response * self.capacity_kw
+
+    def score(self, freq: np.ndarray, kw: np.ndarray) -> np.ndarray:
+        """1.0 for samples inside the tolerance band, 0.0 outside, NaN without data."""
+        passed = np.abs(kw - self.required_kw(freq)) <= self.tolerance * self.capacity_kw
+        return np.where(np.isnan(freq) | np.isnan(kw), np.nan, passed.astype(np.float64))
+
+
+@dataclass
+class SbspmBatch:
+    """Per-sample results for one batch."""
+
+    times: np.ndarray
+    sbspm: np.ndarray
+    roll: np.ndarray
+    hour: np.ndarray
+    hour_start: np.ndarray  # Local clock hour of each sample
+
+    def subset(self, mask: np.ndarray) -> "SbspmBatch":
+        return SbspmBatch(
+            times=self.times[mask],
+            sbspm=self.sbspm[mask],
+            roll=self.roll[mask],
+            hour=self.hour[mask],
+            hour_start=self.hour_start[mask],
+        )
+
+
+@dataclass
+class SbspmCalculator:
+    """
+    Streaming SBSPM scorer with carried window and hour state.
+
+    ``times`` are UTC ``datetime64`` values in ascending order;
+    ``local_offset`` shifts them to local time for the hour boundaries.
+    """
+
+    curve: DregCurve
+    window: np.timedelta64
+    local_offset: np.timedelta64 = np.timedelta64(8, "h")
+    # Samples still inside the trailing window
+    _times: np.ndarray = field(default_factory=lambda: np.empty(0, DATETIME_DTYPE))
+    _scores: np.ndarray = field(default_factory=lambda: np.empty(0))
+    # Running totals of the current local hour
+    _hour: np.datetime64 | None = None
+    _hour_sum: float = 0.0
+    _hour_count: int = 0
+
+    def update(self, times: np.ndarray, freq: np.ndarray, kw: np.ndarray) -> SbspmBatch:
+        """Score a batch and advance the state."""
+        times = times.astype(DATETIME_DTYPE)
+        scores = self.curve.score(freq.astype(np.float64), kw.astype(np.float64))
+        hours = (times + self.local_offset).astype("datetime64[h]")
+        n = len(times)
+        if n == 0:
+            empty = np.empty(0)
+            return SbspmBatch(times, scores, empty, empty, hours)
+
+        # Trailing window: prefix sums over the carried samples plus the batch
+        all_times = np.concatenate([self._times, times])
+        all_scores = np.concatenate([self._scores, scores])
+        value_prefix = np.r_[0.0, np.cumsum(np.nan_to_num(all_scores))]
+        count_prefix = np.r_[0, np.cumsum(~np.isnan(all_scores))]
+        ends = np.arange(len(self._times), len(all_times)) + 1
+        starts = np.searchsorted(all_times, times - self.window, side="right")
+        roll = _ratio(
+            value_prefix[ends] - value_prefix[starts], count_prefix[ends] - count_prefix[starts]
+        )
+
+        # Clock hour: the same prefix sums, restarted at each hour boundary
+        offset = len(self._times)
+        new_hour = np.r_[True, hours[1:] != hours[:-1]]
+        group_start = np.maximum.accumulate(np.where(new_hour, np.arange(n), 0)) + offset
+        hour_sum = value_prefix[ends] - value_prefix[group_start]
+        hour_count = count_prefix[ends] - count_prefix[group_start]
+        if hours[0] == self._hour:
+            continuing = group_start == offset
+            hour_sum[continuing] += self._hour_sum
+            hour_count[continuing] += self._hour_count
+        hour = _ratio(hour_sum, hour_count)
+
+        self._hour = hours[-1]
+        self._hour_sum = float(hour_sum[-1])
+        self._hour_count = int(hour_count[-1])
+        keep = all_times > all_times[-1] - self.window
+        self._times = all_times[keep]
+        self._scores = all_scores[keep]
+
+        return SbspmBatch(times=times, sbspm=scores, roll=roll, hour=hour, hour_start=hours)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.full(len(numerator), np.nan),
+        where=denominator > 0,
+    )
+
+
+def hourly_totals(batch: SbspmBatch) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """``(hour_start, sample_count, passed)`` per local hour in the batch."""
+    valid = ~np.isnan(batch.sbspm)
+    hours, inverse = np.unique(batch.hour_start[valid], return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(hours))
+    passed = np.bincount(inverse, weights=batch.sbspm[valid], minlength=len(hours))
+    return hours, counts, passed
@@ -0,0 +1,142 @@
+"""Per-mode frequency-response scoring of schedule events.
+
+Each ``ScheduleEvent.mode`` defines the power the battery must deliver
+during the event window:
+
+- ``dreg``, ``scan``, ``test_mode``: the dReg curve. Zero inside the
+  deadband, rising linearly to full capacity at ``full_response_hz``
+  deviation (discharge on under-frequency, charge on over-frequency);
+- ``edreg``: the same shape with a narrower deadband and a steeper slope;
+- ``step``: the event's scheduled ``power``;
+- ``full_power``: full quoted capacity.
+
+A sample complies when ``KW_tot`` is within ``tolerance`` x capacity
+of the required power. ``score_events`` maps every sample to its event
+with one ``searchsorted``, evaluates all modes with per-sample parameter
+arrays and reduces compliance per event with ``bincount``, so a day of
+events and 86,400 samples is a handful of array operations.
+"""
+from dataclasses import dataclass
+from typing import Literal
+
+import numpy as np
+
+FixedOutput = Literal["none", "event_power", "capacity"]
+_FIXED_CODES: dict[str, int] = {"none": 0, "event_power": 1, "capacity": 2}
+
+
+@dataclass(frozen=True)
+class ModeResponse:
+    """Required-power rule of one event mode."""
+
+    deadband_hz: float = 0.0
+    full_response_hz: float = 1.0
+    fixed: FixedOutput = "none"
+
+
+DREG = ModeResponse(deadband_hz=0.02, full_response_hz=0.25)
+
+MODE_RESPONSES: dict[str, ModeResponse] = {
+    "dreg": DREG,
+    "edreg": ModeResponse(deadband_hz=0.01, full_response_hz=0.15),
+    "scan": DREG,
+    "test_mode": DREG,
+    "step": ModeResponse(fixed="event_power"),
+    "full_power": ModeResponse(fixed="capacity"),
+}
+
+
+@dataclass
+class EventWindows:
+    """Schedule events as arrays, sorted by ``start`` and non-overlapping."""
+
+    start: np.ndarray  # datetime64
+    end: np.ndarray  # datetime64
+    mode: np.ndarray  # object (str)
+    capacity: np.ndarray  # kW
+    power: np.ndarray  # kW, used by fixed-output modes
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+@dataclass
+class EventScores:
+    """Per-sample compliance and per-event scores."""
+
+    event_index: np.ndarray  # Event of each sample, -1 outside every window
+    required_kw: np.ndarray  # NaN outside windows
+    compliance: np.ndarray  # 1.0 / 0.0, NaN outside windows or without data
+    score: np.ndarray  # Per event: mean compliance, NaN without samples
+    sample_count: np.ndarray  # Per event: scored samples
+
+
+def score_events(
+    times: np.ndarray,
+    freq: np.ndarray,
+    kw: np.ndarray,
+    events: EventWindows,
+    *,
+    tolerance: float = 0.03,
+    nominal_hz: float = 60.0,
+    responses: dict[str, ModeResponse] | None = None,
+) -> EventScores:
+    """
+    Score 1-second telemetry against each event's response curve.
+
+    Args:
+        times: Sorted sample timestamps (same time base as the events)
+        freq, kw: Frequency (Hz) and active power (kW, + = discharge)
+        events: Event windows; unknown modes are scored with the dReg curve
+        tolerance: Pass band as a fraction of the event capacity
+        responses: Mode table, defaults to ``MODE_RESPONSES``
+    """
+    responses = responses or MODE_RESPONSES
+    n_events = len(events)
+    freq = freq.astype(np.float64)
+    kw = kw.astype(np.float64)
+
+    # Event of each sample (windows are sorted and disjoint)
+    if n_events:
+        index = np.searchsorted(events.start, times, side="right") - 1
+        safe = np.clip(index, 0, None)
+        index = np.where((index >= 0) & (times < events.end[safe]), index, -1)
+    else:
+        index = np.full(len(times), -1)
+    inside = index >= 0
+    event = np.clip(index, 0, None)
+
+    # Per-event parameters, then per-sample through ``event``
+    rules = [responses.get(mode, DREG) for mode in events.mode.tolist()]
+    deadband = np.array([rule.deadband_hz for rule in rules] or [0.0])[event]
+    span = np.array([rule.full_response_hz - rule.deadband_hz for rule in rules] or [1.0])[event]
+    fixed = np.array([_FIXED_CODES[rule.fixed] for rule in rules] or [0])[event]
+    capacity = np.nan_to_num(events.capacity.astype(np.float64))
+    power = np.nan_to_num(events.power.astype(np.float64))
+    sample_capacity = capacity[event] if n_events else np.zeros(len(times))
+    sample_power = power[event] if n_events else np.zeros(len(times))
+
+    deviation = nominal_hz - freq
+    curve = np.sign(deviation) * np.clip((np.abs(deviation) - deadband) / span, 0.0, 1.0)
+    required = np.select(
+        [fixed == 1, fixed == 2],
+        [sample_power, sample_capacity],
+        default=curve * sample_capacity,
+    )
+    required = np.where(inside, required, np.nan)
+
+    scored = inside & ~np.isnan(kw) & (~np.isnan(freq) | (fixed != 0))
+    passed = np.abs(kw - required) <= tolerance * sample_capacity
+    compliance = np.where(scored, passed.astype(np.float64), np.nan)
+
+    counts = np.bincount(index[scored], minlength=n_events)
+    passes = np.bincount(index[scored], weights=compliance[scored], minlength=n_events)
+    score = np.divide(passes, counts, out=np.full(n_events, np.nan), where=counts > 0)
+
+    return EventScores(
+        event_index=index,
+        required_kw=required,
+        compliance=compliance,
+        score=score,
+        sample_count=counts,
+    )
@@ -1,18 +1,24 @@
 """API dependencies for dependency injection."""
-from collections.abc import AsyncGenerator
-from typing import Annotated
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Annotated, Any
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import Executable, Result, ScalarResult, select
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
+from app.core.config import settings
+from app.core.exceptions import ClientDisconnectedError
 from app.core.security import verify_token
-from app.db.session import get_db_session, db_manager
-from app.db.redis import get_redis, get_redis_gtr
+from app.db.session import DatabaseName, QueryPriority, db_manager, query_budget_var
+from app.db.redis import LazyRedis, get_redis, get_redis_gtr
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
@@ -35,7 +41,7 @@ async def get_current_user(
     if user_id is None:
         return None
 
-    async with db_manager.session("ess") as session:
+    async with db_manager.session("ess", read_only=True) as session:
         result = await session.execute(select(User).where(User.id == int(user_id)))
         user = result.scalar_one_or_none()
         return user
@@ -79,51 +85,232 @@ async def get_optional_user(
 # Type aliases for dependency injection
 CurrentUser = Annotated[User, Depends(get_current_active_user)]
 OptionalUser = Annotated[User | None, Depends(get_optional_user)]
-RedisClient = Annotated[Redis, Depends(get_redis)]
-RedisGTRClient = Annotated[Redis, Depends(get_redis_gtr)]
+RedisClient = Annotated[LazyRedis | None, Depends(get_redis)]
+RedisGTRClient = Annotated[LazyRedis | None, Depends(get_redis_gtr)]
+
+
+class LazySession:
+    """
+    Database session proxy that connects on the first query.
+
+    Handlers that never query do not touch the pool. In ``read_only``
+    mode every ``execute`` checks out a connection for that statement
+    only (results are fully buffered) and skips commit, so connections
+    are held only while queries run and several databases - or several
+    statements on one database - can be queried concurrently with
+    ``asyncio.gather``. ORM objects returned in this mode are detached;
+    eager-load any relationships the handler needs.
+
+    Read-only proxies use the database's read-only pool (autocommit at
+    READ COMMITTED). ``priority`` selects the scheduler class; analytics
+    sessions are shed with 503 when the database is saturated by other
+    work. With ``read_only=False`` the first query opens a session that is kept
+    for the rest of the request and committed (or rolled back on error)
+    when the dependency is torn down.
+    """
+
+    def __init__(
+        self,
+        db_name: DatabaseName,
+        read_only: bool = True,
+        priority: QueryPriority = "live",
+    ):
+        self.db_name = db_name
+        self.read_only = read_only
+        self.priority = priority
+        self._stack: AsyncExitStack | None = None
+        self._session: AsyncSession | None = None
+        self._open_lock = asyncio.Lock()
+
+    async def get_session(self) -> AsyncSession:
+        """Open (once) and return a request-scoped session."""
+        async with self._open_lock:
+            if self._session is None:
+                stack = AsyncExitStack()
+                self._session = await stack.enter_async_context(
+                    db_manager.session(
+                        self.db_name, read_only=self.read_only, priority=self.priority
+                    )
+                )
+                self._stack = stack
+        return self._session
+
+    async def execute(self, statement: Executable, *args: Any, **kwargs: Any) -> Result[Any]:
+        """Execute a statement, connecting on first use."""
+        if not self.read_only or self._session is not None:
+            session = await self.get_session()
+            return await session.execute(statement, *args, **kwargs)
+
+        async with db_manager.session(
+            self.db_name, read_only=True, priority=self.priority
+        ) as session:
+            return await session.execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement: Executable, *args: Any, **kwargs: Any) -> Any:
+        """Execute a statement and return the first column of the first row."""
+        result = await self.execute(statement, *args, **kwargs)
+        return result.scalar()
+
+    async def scalars(
+        self, statement: Executable, *args: Any, **kwargs: Any
+    ) -> ScalarResult[Any]:
+        """Execute a statement and return scalar results."""
+        result = await self.execute(statement, *args, **kwargs)
+        return result.scalars()
+
+    @asynccontextmanager
+    async def stream(
+        self, statement: Executable, *args: Any, **kwargs: Any
+    ) -> AsyncGenerator[AsyncResult[Any], None]:
+        """
+        Stream a statement's rows through a server-side cursor.
+
+        The connection is held until the block exits; read-only proxies
+        use a dedicated session for the stream, like ``execute``.
+        """
+        async with AsyncExitStack() as stack:
+            if not self.read_only or self._session is not None:
+                session = await self.get_session()
+            else:
+                session = await stack.enter_async_context(
+                    db_manager.session(self.db_name, read_only=True, priority=self.priority)
+                )
+            result = await session.stream(statement, *args, **kwargs)
+            try:
+                yield result
+            finally:
+                await result.close()
+
+    async def close(self, exc: BaseException | None = None) -> None:
+        """Commit/rollback and release the request-scoped session, if opened."""
+        if self._stack is None:
+            return
+        stack, self._stack, self._session = self._stack, None, None
+        if exc is None:
+            await stack.aclose()
+        else:
+            await stack.__aexit__(type(exc), exc, exc.__traceback__)
+
+    async def __aenter__(self) -> "LazySession":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: BaseException | None, tb: Any) -> None:
+        await self.close(exc)
 
 
 # Database session dependencies
-async def get_ess_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get ESS database session."""
-    async with db_manager.session("ess") as session:
+async def get_ess_db() -> AsyncGenerator[LazySession, None]:
+    """Get ESS database session (connects on first query)."""
+    async with LazySession("ess") as session:
+        yield session
+
+
+async def get_schedule_db() -> AsyncGenerator[LazySession, None]:
+    """Get Schedule database session (connects on first query)."""
+    async with LazySession("schedule") as session:
+        yield session
+
+
+async def get_meter_db() -> AsyncGenerator[LazySession, None]:
+    """Get Meter database session (connects on first query)."""
+    async with LazySession("meter") as session:
+        yield session
+
+
+async def get_pcs_db() -> AsyncGenerator[LazySession, None]:
+    """Get PCS database session (connects on first query)."""
+    async with LazySession("pcs") as session:
         yield session
 
 
-async def get_schedule_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get Schedule database session."""
-    async with db_manager.session("schedule") as session:
+async def get_inverter_db() -> AsyncGenerator[LazySession, None]:
+    """Get Inverter database session (connects on first query)."""
+    async with LazySession("inverter") as session:
         yield session
 
 
-async def get_meter_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get Meter database session."""
-    async with db_manager.session("meter") as session:
+async def get_baseline_db() -> AsyncGenerator[LazySession, None]:
+    """Get Baseline database session (connects on first query)."""
+    async with LazySession("baseline") as session:
         yield session
 
 
-async def get_pcs_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get PCS database session."""
-    async with db_manager.session("pcs") as session:
+# Analytics/report session dependencies (lower priority, may be shed with 503)
+async def get_schedule_analytics_db() -> AsyncGenerator[LazySession, None]:
+    """Get Schedule database session for reports (analytics priority)."""
+    async with LazySession("schedule", priority="analytics") as session:
         yield session
 
 
-async def get_inverter_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get Inverter database session."""
-    async with db_manager.session("inverter") as session:
+async def get_meter_analytics_db() -> AsyncGenerator[LazySession, None]:
+    """Get Meter database session for analysis (analytics priority)."""
+    async with LazySession("meter", priority="analytics") as session:
         yield session
 
 
-async def get_baseline_db() -> AsyncGenerator[AsyncSession, None]:
-    """Get Baseline database session."""
-    async with db_manager.session("baseline") as session:
+async def get_baseline_analytics_db() -> AsyncGenerator[LazySession, None]:
+    """Get Baseline database session for analysis (analytics priority)."""
+    async with LazySession("baseline", priority="analytics") as session:
         yield session
 
 
 # Type aliases for database sessions
-EssSession = Annotated[AsyncSession, Depends(get_ess_db)]
-ScheduleSession = Annotated[AsyncSession, Depends(get_schedule_db)]
-MeterSession = Annotated[AsyncSession, Depends(get_meter_db)]
-PcsSession = Annotated[AsyncSession, Depends(get_pcs_db)]
-InverterSession = Annotated[AsyncSession, Depends(get_inverter_db)]
-BaselineSession = Annotated[AsyncSession, Depends(get_baseline_db)]
+EssSession = Annotated[LazySession, Depends(get_ess_db)]
+ScheduleSession = Annotated[LazySession, Depends(get_schedule_db)]
+MeterSession = Annotated[LazySession, Depends(get_meter_db)]
+PcsSession = Annotated[LazySession, Depends(get_pcs_db)]
+InverterSession = Annotated[LazySession, Depends(get_inverter_db)]
+BaselineSession = Annotated[LazySession, Depends(get_baseline_db)]
+ScheduleAnalyticsSession = Annotated[LazySession, Depends(get_schedule_analytics_db)]
+MeterAnalyticsSession = Annotated[LazySession, Depends(get_meter_analytics_db)]
+BaselineAnalyticsSession = Annotated[LazySession, Depends(get_baseline_analytics_db)]
+
+
+# Request cancellation and query budgets
+async def cancel_on_disconnect(request: Request) -> AsyncGenerator[None, None]:
+    """
+    Cancel the endpoint when the client disconnects.
+
+    The endpoint runs inside a cancel scope owned by this dependency (an
+    ``asyncio.timeout`` without a deadline, expired on disconnect), so
+    only the endpoint is cancelled, not the ASGI task. Cancellation
+    reaches any open database session, which kills the running MySQL
+    statement instead of letting it finish for nobody; the request then
+    ends with ``ClientDisconnectedError`` (499).
+
+    Declare with ``Depends(cancel_on_disconnect, scope="function")`` so
+    the scope closes before the response is sent; streamed bodies are
+    stopped on disconnect by Starlette itself.
+    """
+    scope = asyncio.timeout(None)
+
+    async def watch() -> None:
+        while not await request.is_disconnected():
+            await asyncio.sleep(settings.disconnect_poll_interval)
+        scope.reschedule(asyncio.get_running_loop().time())
+
+    watcher = asyncio.create_task(watch())
+    try:
+        async with scope:
+            yield
+    except TimeoutError as e:
+        if not scope.expired():
+            raise
+        logger.debug(f"Client disconnected, cancelled {request.method} {request.url.path}")
+        raise ClientDisconnectedError() from e
+    finally:
+        watcher.cancel()
+
+
+def query_budget(seconds: float) -> Callable[[], Awaitable[None]]:
+    """
+    Dependency factory setting the database query budget of an endpoint.
+
+    Usage: ``@router.get(..., dependencies=[Depends(query_budget(60))])``.
+    Queries exceeding the budget fail with ``QueryTimeoutError`` (504).
+    """
+
+    async def set_query_budget() -> None:
+        query_budget_var.set(seconds)
+
+    return set_query_budget
@@ -1,28 +1,55 @@
 """Power analysis endpoints."""
-from datetime import date, datetime
+import asyncio
+from datetime import date, datetime, timedelta
 from typing import Literal
 
-from fastapi import APIRouter, Query
+import numpy as np
+from fastapi import APIRouter, Depends, Query
 
-from app.api.deps import MeterSession, BaselineSession
+from app.analytics.align import merge_asof
+from app.analytics.excursions import Direction, Excursion
+from app.api.deps import MeterAnalyticsSession, BaselineAnalyticsSession, query_budget
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.db.columnar import fetch_columns, time_series_select
+from app.models.baseline import BaseLine
+from app.models.meter import MainMeter
+from app.services.excursions import excursion_monitor, query_excursions
+from app.services.query_planner import estimate_rows, plan
+from app.services.rollup import Bucket, read_energy
+from app.services.timeseries import SOURCES, TimeSeriesQuery, fetch_query
+from app.utils.periods import local_bounds
+from app.utils.timezone import TZ_UTC8, local_to_utc, now_utc, utc_to_local
 from app.schemas.analysis import (
     PowerLossResponse,
     DailyPowerLoss,
     PowerIOResponse,
     PowerIODataPoint,
     FreqPowerResponse,
+    FrequencyExcursionEvent,
+    ExcursionResponse,
 )
 
 router = APIRouter()
 
 
-@router.get("/power-loss", response_model=PowerLossResponse)
+def _energy(bucket: Bucket | None, field: str) -> float:
+    """A bucket's energy delta in kWh, 0 when missing."""
+    value = getattr(bucket, field) if bucket is not None else None
+    return value or 0.0
+
+
+@router.get(
+    "/power-loss",
+    response_model=PowerLossResponse,
+    dependencies=[Depends(query_budget(60))],  # up to a month of rollups
+)
 async def get_power_loss(
     start_time: datetime = Query(
         ...,
         description="Start time (YYYY-MM-DD HH:MM:SS)",
     ),
-    db: MeterSession = None,
+    db: MeterAnalyticsSession = None,
 ):
     """
     Get power loss and efficiency data.
@@ -33,20 +60,46 @@ async def get_power_loss(
     - Discharge/charge energy
     - Energy loss and efficiency %
     - Auxiliary power consumption
+
+    Covers start_date to the end of its month, read from the daily
+    energy rollups (``app/services/rollup.py``); days the rollups do not
+    cover yet are computed from raw rows.
     """
     target_date = start_time.date()
 
-    # In production, calculate from meter data
+    # Days from start_date to the end of its month
+    day_start, _ = local_bounds(target_date)
+    _, month_end = local_bounds(target_date, "month")
+    rollups = await read_energy(db, "daily", day_start, month_end)
+    main, aux = rollups["MMAIN"], rollups["MAUX"]
+
     daily_data: list[DailyPowerLoss] = []
+    for bucket_start in sorted(main.keys() | aux.keys()):
+        discharge = _energy(main.get(bucket_start), "delta_kwh_del")
+        charge = _energy(main.get(bucket_start), "delta_kwh_rec")
+        aux_power = _energy(aux.get(bucket_start), "delta_kwh_del")
+        daily_data.append(
+            DailyPowerLoss(
+                date=bucket_start.date(),
+                discharge_energy=round(discharge, 3),
+                charge_energy=round(charge, 3),
+                loss=round(charge - discharge, 3),
+                efficiency=round(discharge / charge * 100, 2) if charge else 0.0,
+                aux_power=round(aux_power, 3),
+                aux_percentage=round(aux_power / charge * 100, 2) if charge else 0.0,
+            )
+        )
 
+    total_discharge = sum(day.discharge_energy for day in daily_data)
+    total_charge = sum(day.charge_energy for day in daily_data)
     return PowerLossResponse(
         start_date=target_date,
         daily_data=daily_data,
-        total_discharge=0.0,
-        total_charge=0.0,
-        total_loss=0.0,
-        avg_efficiency=0.0,
-        total_aux=0.0,
+        total_discharge=round(total_discharge, 3),
+        total_charge=round(total_charge, 3),
+        total_loss=round(total_charge - total_discharge, 3),
+        avg_efficiency=round(total_discharge / total_charge * 100, 2) if total_charge else 0.0,
+        total_aux=round(sum(day.aux_power for day in daily_data), 3),
     )
 
 
@@ -60,24 +113,42 @@ async def get_power_io(
         "daily",
         description="Data granularity: daily or monthly",
     ),
-    db: MeterSession = None,
+    db: MeterAnalyticsSession = None,
 ):
     """
     Get charge/discharge energy data.
 
     Equivalent to Flask /api/power_io
 
-    Returns time-series of energy flow.
+    Returns time-series of energy flow: hourly points for ``daily``,
+    daily points for ``monthly``, read from the energy rollups (raw rows
+    past the rollup watermark).
     """
-    # In production, query from meter database
-    data: list[PowerIODataPoint] = []
+    # Hourly buckets of the day, or daily buckets of the month (local time)
+    if data_type == "daily":
+        rollups = await read_energy(db, "hourly", *local_bounds(select_time))
+    else:
+        rollups = await read_energy(db, "daily", *local_bounds(select_time, "month"))
+
+    data = [
+        PowerIODataPoint(
+            timestamp=(
+                bucket.bucket_start.replace(tzinfo=TZ_UTC8)
+                if data_type == "daily"
+                else bucket.bucket_start.date()
+            ),
+            discharge=round(_energy(bucket, "delta_kwh_del"), 3),
+            charge=round(_energy(bucket, "delta_kwh_rec"), 3),
+        )
+        for bucket in rollups["MMAIN"].values()
+    ]
 
     return PowerIOResponse(
         select_date=select_time,
         data_type=data_type,
         data=data,
-        total_discharge=0.0,
-        total_charge=0.0,
+        total_discharge=round(sum(point.discharge for point in data), 3),
+        total_charge=round(sum(point.charge for point in data), 3),
     )
 
 
@@ -95,8 +166,14 @@ async def get_freq_power(
         "normalMode",
         description="Query mode",
     ),
-    meter_db: MeterSession = None,
-    baseline_db: BaselineSession = None,
+    max_points: int = Query(
+        2000,
+        ge=0,
+        le=100_000,
+        description="Max points per series (LTTB downsampling, 0 = raw)",
+    ),
+    meter_db: MeterAnalyticsSession = None,
+    baseline_db: BaselineAnalyticsSession = None,
 ):
     """
     Get frequency and power chart data.
@@ -107,13 +184,69 @@ async def get_freq_power(
     - Frequency data
     - Power data
     - Baseline frequency data
+
+    The series share one time axis, downsampled to at most ``max_points``
+    points; frequency and power extremes are always kept so excursions
+    stay visible. Periods longer than
+    ``query_max_raw_rows`` samples are averaged into buckets by MySQL
+    instead (``resolution`` ``bucket``), or rejected with 413 when even
+    that would scan too many rows.
     """
-    # In production, query from meter and baseline databases
-    # Returns [[timestamp, value], ...] format
+    # Window of date_period minutes ending now, or at select_time (UTC+8)
+    if select_mode == "selectTimeMode" and select_time is not None:
+        end = local_to_utc(select_time).replace(tzinfo=None)
+    else:
+        end = now_utc().replace(tzinfo=None)
+    start = end - timedelta(minutes=date_period)
+
+    meter_query = TimeSeriesQuery(SOURCES["MMAIN"], ("Freq", "KW_tot"), start, end, step=0)
+    if estimate_rows(meter_query) <= settings.query_max_raw_rows:
+        # Columnar fetch from both databases at once, without ORM entities
+        resolution, step = "raw", 0
+        meter, baseline = await asyncio.gather(
+            fetch_columns(
+                meter_db,
+                time_series_select(
+                    MainMeter.EventTime, MainMeter.Freq, MainMeter.KW_tot, start=start, end=end
+                ),
+            ),
+            fetch_columns(
+                baseline_db,
+                time_series_select(
+                    BaseLine.insert_time, BaseLine.baseline_freq, start=start, end=end
+                ),
+            ),
+        )
+    else:
+        # Too many rows to downsample here: average buckets in MySQL instead
+        query_plan = await plan(meter_query, budget=max_points or None, db=meter_db)
+        resolution, step = query_plan.resolution, query_plan.query.step
+        baseline_query = TimeSeriesQuery(
+            SOURCES["base_line"], ("baseline_freq",), start, end, step=step
+        )
+        meter, baseline = await asyncio.gather(
+            fetch_query(meter_db, query_plan.query, resolution),
+            fetch_query(baseline_db, baseline_query),
+        )
 
-    frequency_data: list[list] = []
-    power_data: list[list] = []
-    baseline_data: list[list] = []
+    if len(meter):
+        # Baseline on the meter timestamps, then one downsampling for all
+        # three series so they share a time axis. Baseline gaps only leave
+        # None values; the shape is picked from frequency and power.
+        meter = meter.with_columns(
+            **merge_asof(
+                meter["EventTime"],
+                baseline["insert_time"],
+                {"baseline_freq": baseline["baseline_freq"]},
+                tolerance=np.timedelta64(int(settings.baseline_align_tolerance * 1e6), "us"),
+                direction="nearest",
+            )
+        ).downsampled("EventTime", ["Freq", "KW_tot"], max_points)
+        baseline_data = meter.pairs("EventTime", "baseline_freq")
+    else:
+        baseline_data = baseline.pairs("insert_time", "baseline_freq", max_points)
+    frequency_data = meter.pairs("EventTime", "Freq")
+    power_data = meter.pairs("EventTime", "KW_tot")
 
     return FreqPowerResponse(
         date_period=date_period,
@@ -122,4 +255,66 @@ async def get_freq_power(
         frequency_data=frequency_data,
         power_data=power_data,
         baseline_data=baseline_data,
+        resolution=resolution,
+        step=step,
+    )
+
+
+def _excursion_event(excursion: Excursion) -> FrequencyExcursionEvent:
+    extreme = excursion.extreme_freq
+    return FrequencyExcursionEvent(
+        direction=excursion.direction,
+        start_time=utc_to_local(excursion.start),
+        end_time=utc_to_local(excursion.end),
+        duration_s=round(excursion.duration_s, 3),
+        extreme_freq=None if np.isnan(extreme) else round(extreme, 4),
+        peak_kw=round(excursion.peak_kw, 3),
+        energy_kwh=round(excursion.energy_kwh, 4),
+        sample_count=excursion.sample_count,
+    )
+
+
+@router.get("/excursions", response_model=ExcursionResponse)
+async def get_excursions(
+    start_time: datetime = Query(
+        None,
+        description="Range start, local time (default: 24 hours before end_time)",
+    ),
+    end_time: datetime = Query(
+        None,
+        description="Range end, local time (default: now)",
+    ),
+    direction: Direction | None = Query(
+        None,
+        description="under or over; both when omitted",
+    ),
+    limit: int = Query(100, ge=1, le=10_000, description="Max excursions, newest first"),
+    db: MeterAnalyticsSession = None,
+):
+    """
+    Get frequency excursions outside the deadband.
+
+    Events are detected from MMAIN within seconds by the excursion
+    monitor (``app/services/excursions.py``). Recent ranges are served
+    from its in-memory index, older ones from ``frequency_excursions``.
+    """
+    end = local_to_utc(end_time).replace(tzinfo=None) if end_time else None
+    end = end or now_utc().replace(tzinfo=None)
+    start = local_to_utc(start_time).replace(tzinfo=None) if start_time else None
+    start = start or end - timedelta(days=1)
+    if start >= end:
+        raise ValidationError("start_time must be before end_time")
+
+    excursions = excursion_monitor.query(start, end, direction, limit)
+    source = "memory"
+    if excursions is None:
+        excursions = await query_excursions(db, start, end, direction, limit)
+        source = "database"
+
+    return ExcursionResponse(
+        start_time=utc_to_local(start),
+        end_time=utc_to_local(end),
+        direction=direction,
+        source=source,
+        data=[_excursion_event(excursion) for excursion in excursions],
     )
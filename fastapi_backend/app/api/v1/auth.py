@@ -25,7 +25,7 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
 
     Get an access token for future requests.
     """
-    async with db_manager.session("ess") as db:
+    async with db_manager.session("ess", read_only=True) as db:
         user = await authenticate_user(db, form_data.username, form_data.password)
 
         if user is None:
@@ -49,7 +49,7 @@ async def login_json(login_data: LoginRequest):
     """
     JSON login endpoint (alternative to OAuth2 form).
     """
-    async with db_manager.session("ess") as db:
+    async with db_manager.session("ess", read_only=True) as db:
         user = await authenticate_user(db, login_data.username, login_data.password)
 
         if user is None:
@@ -87,7 +87,7 @@ async def refresh_token(refresh_data: RefreshTokenRequest):
             detail="Invalid token payload",
         )
 
-    async with db_manager.session("ess") as db:
+    async with db_manager.session("ess", read_only=True) as db:
         user = await get_user_by_id(db, int(user_id))
 
         if user is None:
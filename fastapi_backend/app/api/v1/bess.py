@@ -80,7 +80,8 @@ async def get_rack_alert(
     - Battery alerts (1-21): 3 levels each (保護/告警/預警/正常)
     - BAMS alerts (64-80): 2 levels each (異常/正常)
     """
-    # In production, fetch from Redis using pattern like f"{rack_number}_alert"
+    # In production, fetch from Redis via the "rack_alert" key registry
+    # Example: data = await redis_scan(redis, f"{rack_number}_alert", by_registry="rack_alert")
     # For now, return empty/normal status
 
     battery_alerts: dict[str, str] = {}
@@ -1,10 +1,15 @@
 """Meter endpoints for power monitoring."""
 from datetime import date
 
+import numpy as np
 from fastapi import APIRouter, Query
 
-from app.api.deps import RedisClient, MeterSession
+from app.api.deps import RedisClient, MeterAnalyticsSession
 from app.db.redis import redis_scan
+from app.services.query_planner import plan
+from app.services.timeseries import TimeSeriesQuery, fetch_query
+from app.utils.periods import utc_bounds
+from app.utils.timezone import now_local, utc_to_local
 from app.schemas.meter import (
     MeterData,
     MeterInfoResponse,
@@ -28,13 +33,11 @@ async def get_meter_info(redis: RedisClient = None):
     - Power (kW, kVAR, kVA)
     - Frequency, Power Factor
     """
-    meters: list[MeterData] = []
-    total_power = 0.0
+    # Read the meter hashes through the "meter" key registry
+    data = await redis_scan(redis, "meter_*", by_registry="meter")
+    meters = [MeterData.model_validate(item) for item in data]
+    total_power = sum(meter.KW_tot or 0.0 for meter in meters)
 
-    # In production, fetch from Redis using pattern "meter_*"
-    # Example: data = await redis_scan(redis, "meter_*")
-
-    # For now, return empty data
     return MeterInfoResponse(
         meters=meters,
         meter_count=len(meters),
@@ -50,7 +53,13 @@ async def get_aux_meter(
         description="Response type: chart or summary",
         pattern="^(chart|summary)$",
     ),
-    db: MeterSession = None,
+    max_points: int = Query(
+        2000,
+        ge=0,
+        le=100_000,
+        description="Max chart points (0 = the server's point budget)",
+    ),
+    db: MeterAnalyticsSession = None,
 ):
     """
     Get auxiliary meter data.
@@ -58,17 +67,31 @@ async def get_aux_meter(
     Equivalent to Flask /api/aux_meter
 
     Args:
-        time: Date to filter data
+        time: Date to filter data (default: today)
         data_type: "chart" for time-series, "summary" for aggregated stats
+        max_points: Chart point budget; the day's 1-second rows are
+                    averaged into the smallest step that fits
     """
     if data_type == "chart":
-        # Return time-series data
-        chart_data: list[AuxMeterChartData] = []
-        # In production, query from database
+        # Return time-series data, bucketed by the query planner
+        start, end = utc_bounds(time or now_local().date())
+        query = TimeSeriesQuery.build("MAUX", ["KW_tot"], start, end, step=0)
+        query_plan = await plan(query, budget=max_points or None, db=db)
+        rows = await fetch_query(db, query_plan.query, query_plan.resolution)
+
+        valid = ~np.isnan(rows["KW_tot"])
+        chart_data = [
+            AuxMeterChartData(timestamp=utc_to_local(timestamp), power=round(power, 3))
+            for timestamp, power in zip(
+                rows["EventTime"][valid].tolist(), rows["KW_tot"][valid].tolist(), strict=True
+            )
+        ]
 
         return AuxMeterResponse(
             data=chart_data,
             data_type=data_type,
+            resolution=query_plan.resolution,
+            step=query_plan.query.step,
         )
     else:
         # Return summary statistics
@@ -1,17 +1,36 @@
 """Main API router combining all v1 routes."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
-from . import auth, system, bess, pcs, meters, inverter, schedule, analysis, config
+from app.api.deps import cancel_on_disconnect
+from . import auth, system, bess, pcs, meters, inverter, schedule, analysis, config, timeseries
 
 api_router = APIRouter()
 
+# Data routes stop their database queries when the client goes away
+cancellable = [Depends(cancel_on_disconnect, scope="function")]
+
 # Include all route modules
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(system.router, prefix="/system", tags=["system"])
-api_router.include_router(bess.router, prefix="/bess", tags=["bess"])
-api_router.include_router(pcs.router, prefix="/pcs", tags=["pcs"])
-api_router.include_router(meters.router, prefix="/meters", tags=["meters"])
-api_router.include_router(inverter.router, prefix="/inverter", tags=["inverter"])
-api_router.include_router(schedule.router, prefix="/schedule", tags=["schedule"])
-api_router.include_router(analysis.router, prefix="/analysis", tags=["analysis"])
+api_router.include_router(
+    bess.router, prefix="/bess", tags=["bess"], dependencies=cancellable
+)
+api_router.include_router(
+    pcs.router, prefix="/pcs", tags=["pcs"], dependencies=cancellable
+)
+api_router.include_router(
+    meters.router, prefix="/meters", tags=["meters"], dependencies=cancellable
+)
+api_router.include_router(
+    inverter.router, prefix="/inverter", tags=["inverter"], dependencies=cancellable
+)
+api_router.include_router(
+    schedule.router, prefix="/schedule", tags=["schedule"], dependencies=cancellable
+)
+api_router.include_router(
+    analysis.router, prefix="/analysis", tags=["analysis"], dependencies=cancellable
+)
+api_router.include_router(
+    timeseries.router, prefix="/timeseries", tags=["timeseries"], dependencies=cancellable
+)
 api_router.include_router(config.router, prefix="/config", tags=["config"])
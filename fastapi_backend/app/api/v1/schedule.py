@@ -2,10 +2,14 @@
 from datetime import date, datetime, timedelta
 from typing import Literal
 
-from fastapi import APIRouter, Query
+import numpy as np
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy import select
 
-from app.api.deps import ScheduleSession
+from app.api.deps import MeterAnalyticsSession, ScheduleAnalyticsSession, query_budget
+from app.core.exceptions import ValidationError
+from app.db.columnar import fetch_columns, time_series_select
+from app.models.meter import MainMeter
 from app.models.schedule import ScheduleEvent as ScheduleEventModel
 from app.schemas.schedule import ScheduleEvent, ScheduleResponse
 from app.schemas.income import (
@@ -15,19 +19,25 @@ from app.schemas.income import (
     HourlyIncome,
     DailyIncomeSummary,
 )
-from app.utils.timezone import utc_to_local
+from app.services.income import EXEC_RATE_SCALE, settle_days
+from app.utils.periods import local_bounds, utc_bounds
+from app.utils.timezone import now_local, utc_to_local
 
 router = APIRouter()
 
 
-@router.get("", response_model=ScheduleResponse)
+@router.get(
+    "",
+    response_model=ScheduleResponse,
+    dependencies=[Depends(query_budget(60))],  # up to 52 weeks of events
+)
 async def get_schedule(
     mode: str = Query(
         "all",
         description="Filter by mode: all, dreg, edreg, test_mode, step, scan, full_power",
     ),
     weeks: int = Query(1, ge=1, le=52, description="Number of weeks to fetch"),
-    db: ScheduleSession = None,
+    db: ScheduleAnalyticsSession = None,
 ):
     """
     Get schedule events.
@@ -89,13 +99,18 @@ async def get_schedule(
     )
 
 
-@router.get("/income/daily", response_model=DailyIncomeResponse)
+@router.get(
+    "/income/daily",
+    response_model=DailyIncomeResponse,
+    dependencies=[Depends(query_budget(60))],
+)
 async def get_daily_income(
     start_time: datetime = Query(
         None,
         description="Start time (YYYY-MM-DD HH:MM:SS), defaults to today",
     ),
-    db: ScheduleSession = None,
+    db: ScheduleAnalyticsSession = None,
+    meter_db: MeterAnalyticsSession = None,
 ):
     """
     Get daily income breakdown.
@@ -107,30 +122,57 @@ async def get_daily_income(
     - Execution rate
     - Performance index
     """
-    target_date = start_time.date() if start_time else date.today()
+    target_date = start_time.date() if start_time else now_local().date()
+    settlement = await settle_days(db, meter_db, target_date, 1)
 
-    # In production, query and calculate from database
-    hourly_data: list[HourlyIncome] = []
+    day_start = datetime.combine(target_date, datetime.min.time())
+    hourly_data = [
+        HourlyIncome(
+            hour=hour,
+            time_start=day_start + timedelta(hours=hour),
+            time_end=day_start + timedelta(hours=hour + 1),
+            capacity_fee=capacity_fee,
+            efficiency_fee=efficiency_fee,
+            total=total,
+            exec_rate=exec_rate,
+            performance_index=performance_index,
+        )
+        for hour, (capacity_fee, efficiency_fee, total, exec_rate, performance_index) in enumerate(
+            zip(
+                settlement.capacity_fee.tolist(),
+                settlement.efficiency_fee.tolist(),
+                settlement.total.tolist(),
+                np.nan_to_num(settlement.exec_rate).tolist(),
+                settlement.performance_index.tolist(),
+                strict=True,
+            )
+        )
+    ]
 
     return DailyIncomeResponse(
         date=target_date,
         hourly_data=hourly_data,
-        total_capacity_fee=0.0,
-        total_efficiency_fee=0.0,
-        total_income=0.0,
-        avg_exec_rate=0.0,
-        avg_performance_index=0.0,
+        total_capacity_fee=float(settlement.capacity_fee.sum()),
+        total_efficiency_fee=float(settlement.efficiency_fee.sum()),
+        total_income=float(settlement.total.sum()),
+        avg_exec_rate=settlement.mean_over_awarded(settlement.exec_rate),
+        avg_performance_index=settlement.mean_over_awarded(settlement.performance_index),
     )
 
 
-@router.get("/income/monthly", response_model=MonthlyIncomeResponse)
+@router.get(
+    "/income/monthly",
+    response_model=MonthlyIncomeResponse,
+    dependencies=[Depends(query_budget(60))],
+)
 async def get_monthly_income(
     start_time: str = Query(
         ...,
         description="Month (YYYY-MM format)",
         pattern=r"^\d{4}-\d{2}$",
     ),
-    db: ScheduleSession = None,
+    db: ScheduleAnalyticsSession = None,
+    meter_db: MeterAnalyticsSession = None,
 ):
     """
     Get monthly income summary.
@@ -140,22 +182,44 @@ async def get_monthly_income(
     Returns daily totals for the month.
     """
     year, month = map(int, start_time.split("-"))
+    if not 1 <= month <= 12:
+        raise ValidationError(f"Invalid month: {start_time}")
+
+    first_day = date(year, month, 1)
+    month_start, month_end = local_bounds(first_day, "month")
+    settlement = await settle_days(db, meter_db, first_day, (month_end - month_start).days)
+    daily = settlement.daily_totals()
 
-    # In production, query and calculate from database
-    daily_data: list[DailyIncomeSummary] = []
+    daily_data = [
+        DailyIncomeSummary(
+            date=first_day + timedelta(days=i),
+            capacity_fee=float(daily["capacity_fee"][i]),
+            efficiency_fee=float(daily["efficiency_fee"][i]),
+            total=float(daily["total"][i]),
+            exec_rate=float(daily["exec_rate"][i]),
+        )
+        for i in np.flatnonzero(daily["awarded_hours"])
+    ]
 
     return MonthlyIncomeResponse(
         year=year,
         month=month,
         daily_data=daily_data,
-        total_capacity_fee=0.0,
-        total_efficiency_fee=0.0,
-        total_income=0.0,
-        avg_exec_rate=0.0,
+        total_capacity_fee=float(daily["capacity_fee"].sum()),
+        total_efficiency_fee=float(daily["efficiency_fee"].sum()),
+        total_income=float(daily["total"].sum()),
+        avg_exec_rate=settlement.mean_over_awarded(settlement.exec_rate),
         days_with_data=len(daily_data),
     )
 
 
+_EXEC_RATE_COLUMNS = {
+    "exec_rate": MainMeter.SBSPM,
+    "roll_exec_rate": MainMeter.roll_SBSPM,
+    "hour_exec_rate": MainMeter.hour_SBSPM,
+}
+
+
 @router.get("/exec-rate", response_model=ExecRateResponse)
 async def get_exec_rate(
     date_param: datetime = Query(
@@ -167,7 +231,13 @@ async def get_exec_rate(
         "exec_rate",
         description="Type of execution rate",
     ),
-    db: ScheduleSession = None,
+    max_points: int = Query(
+        2000,
+        ge=0,
+        le=100_000,
+        description="Max points in the series (LTTB downsampling, 0 = raw)",
+    ),
+    db: MeterAnalyticsSession = None,
 ):
     """
     Get execution rate time-series.
@@ -177,12 +247,17 @@ async def get_exec_rate(
     Args:
         date: Target date
         data_type: exec_rate, roll_exec_rate, or hour_exec_rate
+        max_points: Downsampling budget for the day's 1-second readings
     """
     target_date = date_param.date()
+    column = _EXEC_RATE_COLUMNS[data_type]
+    start, end = utc_bounds(target_date)
 
-    # In production, query from database
-    # Returns [[timestamp, rate], ...] format
-    data: list[list] = []
+    rates = await fetch_columns(
+        db, time_series_select(MainMeter.EventTime, column, start=start, end=end)
+    )
+    # Stored as rate * 100; [[timestamp, rate], ...] format
+    data = rates.pairs("EventTime", column.key, max_points, scale=EXEC_RATE_SCALE)
 
     return ExecRateResponse(
         date=target_date,
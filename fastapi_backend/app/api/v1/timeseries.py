@@ -0,0 +1,128 @@
+"""Unified time-series query endpoint."""
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from datetime import datetime, timedelta
+
+import orjson
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from starlette.types import Send
+
+from app.api.deps import LazySession, query_budget
+from app.schemas.timeseries import TimeSeriesResponse
+from app.services.query_planner import QueryPlan, plan
+from app.services.timeseries import SOURCES, Aggregation, TimeSeriesQuery, stream_query
+from app.utils.timezone import local_to_utc, now_utc, utc_to_local
+
+router = APIRouter()
+
+
+class _ClosingStreamingResponse(StreamingResponse):
+    """
+    Streaming response that starts once the body has produced its first chunk.
+
+    Errors raised before that (e.g. the database is down) still reach the
+    exception handlers and get a proper status. The body iterator is
+    closed in the sending task, also when a send is cancelled.
+    """
+
+    async def stream_response(self, send: Send) -> None:
+        async with aclosing(self.body_iterator) as body:
+            first = await anext(body, b"")
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await send({"type": "http.response.body", "body": first, "more_body": True})
+            async for chunk in body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def _json_body(header: dict, query_plan: QueryPlan) -> AsyncIterator[bytes]:
+    """
+    ``header`` with a ``data`` array appended chunk by chunk.
+
+    The streaming session is opened and closed here, in the task sending
+    the body, so its cursor, scheduler slot and deadline never outlive it.
+    """
+    query = query_plan.query
+    head = orjson.dumps(header)[:-1] + b',"data":['
+    async with (
+        LazySession(query.source.db, priority="analytics") as db,
+        aclosing(stream_query(db, query, query_plan.resolution)) as chunks,
+    ):
+        separator = b""
+        async for chunk in chunks:
+            if chunk:
+                yield head + separator + orjson.dumps(chunk)[1:-1]
+                head, separator = b"", b","
+    yield head + b"]}"
+
+
+@router.get(
+    "",
+    response_model=None,
+    responses={200: {"model": TimeSeriesResponse}},
+    dependencies=[Depends(query_budget(60))],
+)
+async def get_timeseries(
+    source: str = Query(..., description=f"Table: {', '.join(SOURCES)}"),
+    metrics: list[str] = Query(
+        ...,
+        description="Metric columns, repeated or comma-separated (e.g. KW_tot,Freq)",
+    ),
+    start_time: datetime = Query(
+        None,
+        description="Range start, local time (default: 24 hours before end_time)",
+    ),
+    end_time: datetime = Query(
+        None,
+        description="Range end, local time (default: now)",
+    ),
+    aggregation: Aggregation = Query("avg", description="Aggregation per bucket"),
+    step: int = Query(60, ge=0, le=31 * 86400, description="Bucket seconds, 0 = raw samples"),
+    downsample: bool = Query(
+        True,
+        description="Coarsen the step when over the point budget (False: 413 instead)",
+    ),
+) -> StreamingResponse:
+    """
+    Query any telemetry table with one request shape.
+
+    Buckets are aligned to local midnight of the start day. Rows come
+    from the raw table, one ``GROUP BY`` over it, or the hourly/daily
+    energy rollups, whichever answers the query exactly at the lowest
+    cost (reported as ``resolution``). The response is streamed; a
+    database error once streaming has started aborts the response.
+
+    Oversized requests are coarsened to fit the point budget, or
+    rejected with 413 (``app/services/query_planner.py``).
+    """
+    end = local_to_utc(end_time).replace(tzinfo=None) if end_time else None
+    end = end or now_utc().replace(tzinfo=None)
+    start = local_to_utc(start_time).replace(tzinfo=None) if start_time else None
+    start = start or end - timedelta(days=1)
+    names = [name.strip() for value in metrics for name in value.split(",") if name.strip()]
+    query = TimeSeriesQuery.build(source, names, start, end, aggregation, step)
+    # Row estimates run here, so planner and database errors get a proper status
+    async with LazySession(query.source.db, priority="analytics") as db:
+        query_plan = await plan(query, downsample=downsample, db=db)
+    query = query_plan.query
+
+    header = {
+        "status": "success",
+        "source": query.source.name,
+        "metrics": list(query.metrics),
+        "aggregation": query.aggregation,
+        "step": query.step,
+        "requested_step": query_plan.requested_step,
+        "resolution": query_plan.resolution,
+        "start_time": utc_to_local(query.start).isoformat(),
+        "end_time": utc_to_local(query.end).isoformat(),
+        "columns": query.columns,
+    }
+    return _ClosingStreamingResponse(_json_body(header, query_plan), media_type="application/json")
@@ -26,6 +26,7 @@ class Settings(BaseSettings):
     db_port: int = 3306
     db_user: str = "root"
     db_password: str = ""
+    db_driver: Literal["aiomysql", "asyncmy"] = "aiomysql"  # Async MySQL DBAPI driver
 
     # Database names
     db_name_ess: str = "ess"
@@ -49,6 +50,100 @@ class Settings(BaseSettings):
     db_name_bess11: str = "BESS11"
     db_name_bess12: str = "BESS12"
 
+    # Database pools (read-only pools serve nearly all traffic). Pools are per
+    # worker process; see README "Database Connections" for the worst-case
+    # connection count against MySQL max_connections.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_write_pool_size: int = 2
+    db_write_max_overflow: int = 3
+
+    # Pool layout: one pool per database, or one shared pool per MySQL host
+    # (tables addressed as <database>.<table> via schema_translate_map)
+    db_pool_mode: Literal["per_database", "per_host"] = "per_database"
+    db_host_pool_size: int = 20
+    db_host_max_overflow: int = 10
+
+    # Open sessions across all databases (0 = unlimited)
+    db_max_concurrency: int = 0
+
+    # Per-database query scheduler: live telemetry keeps reserved slots,
+    # analytics are shed (503) after waiting too long (capacity 0 = off)
+    db_scheduler_capacity: int = 12
+    db_scheduler_live_reserved: int = 4
+    db_scheduler_analytics_wait: float = 2.0
+
+    # Query time budgets in seconds (0 = no limit); endpoints may override
+    db_query_budget_live: float = 10.0
+    db_query_budget_analytics: float = 30.0
+    # How often handlers check whether the client has disconnected
+    disconnect_poll_interval: float = 0.5
+
+    # Rows per chunk when streaming time series into NumPy arrays
+    db_stream_chunk_size: int = 10000
+
+    # Background jobs writing derived tables run in one worker, elected with
+    # a MySQL GET_LOCK; other workers retry the lock every this many seconds
+    background_leader_retry: float = 15.0
+
+    # Energy rollups (hourly/daily buckets of MMAIN and MAUX)
+    rollup_update_interval: float = 60.0  # Seconds between incremental updates
+    rollup_batch_size: int = 50000  # Source rows folded per batch
+
+    # Serve /timeseries from the rollups when the step and range fit them
+    timeseries_use_rollups: bool = True
+
+    # Query cost guardrails (see app/services/query_planner.py)
+    query_point_budget: int = 50000  # Rows returned per time-series request
+    query_max_raw_rows: int = 500000  # Raw rows fetched for in-process downsampling
+    query_max_scan_rows: int = 10_000_000  # Raw rows one GROUP BY may scan
+    query_explain: bool = False  # Check scan estimates with EXPLAIN
+
+    # Baseline samples further than this from a meter sample are not paired
+    baseline_align_tolerance: float = 1.0  # Seconds
+
+    # dReg execution rate (SBSPM) calculation
+    dreg_capacity_kw: float = 1000.0
+    dreg_deadband_hz: float = 0.02
+    dreg_full_response_hz: float = 0.25  # Deviation at full capacity
+    dreg_tolerance: float = 0.03  # Pass band, fraction of capacity
+    sbspm_roll_window: float = 900.0  # Seconds in roll_SBSPM
+    sbspm_baseline_max_age: float = 5.0  # Seconds a baseline sample stays valid
+    sbspm_update_interval: float = 10.0  # Seconds between streaming passes
+    sbspm_batch_size: int = 20000  # Meter rows per streaming batch
+
+    # Frequency excursion detection
+    excursion_enter_hz: float = 0.02  # Deviation that starts an excursion (deadband)
+    excursion_exit_hz: float = 0.015  # Deviation that ends it (hysteresis)
+    excursion_poll_interval: float = 1.0  # Seconds between micro-batches
+    excursion_batch_size: int = 5000  # Meter rows per micro-batch
+    excursion_index_size: int = 1000  # Recent excursions kept in memory
+    excursion_max_gap: float = 5.0  # Longest sample spacing (s) counted as energy
+
+    # Settlement cache (closed hours are immutable)
+    settlement_cache_enabled: bool = True
+    settlement_store_path: str = "data/settlement.sqlite3"  # SQLite (WAL) store
+    settlement_cache_days: int = 93  # Days kept in the in-process LRU
+    settlement_close_delay: float = 300.0  # Seconds after an hour ends before it is final
+    settlement_redis_ttl: int = 400 * 86400  # Seconds
+
+    # Fan-out queries across BESS databases
+    db_fanout_concurrency: int = 6
+    db_fanout_timeout: float = 5.0
+
+    # Database resilience
+    db_breaker_failure_threshold: int = 3  # Consecutive failures before opening
+    db_breaker_reset_timeout: float = 10.0  # Seconds before a half-open probe
+
+    # Health monitoring
+    health_check_interval: float = 15.0  # Seconds between background probes
+    health_check_timeout: float = 2.0  # Per-target probe timeout (databases: > connect timeout)
+    health_snapshot_max_age: float = 60.0  # Refresh on demand if older than this
+
+    # Topology probing
+    topology_probe_interval: float = 30.0  # Seconds between background probes
+    topology_probe_timeout: float = 2.0  # Per-node TCP connect timeout
+
     # GTR Database
     db_host_gtr: str = "192.168.10.46"
     db_user_gtr: str = "root"
@@ -65,6 +160,13 @@ class Settings(BaseSettings):
     redis_port_gtr: int = 6379
     redis_password_gtr: str = ""
 
+    # Redis resilience (health tracking from command outcomes)
+    redis_breaker_failure_threshold: int = 3
+    redis_breaker_reset_timeout: float = 5.0
+
+    # Redis key registry
+    redis_registry_reconcile_interval: float = 300.0  # Seconds between reconcile passes
+
     # System Configuration
     bess_number: int = 2
     pcs_number: int = 2
@@ -96,40 +198,47 @@ class Settings(BaseSettings):
     refresh_token_expire_days: int = 7
 
     # Computed database URLs
+    def _database_url(self, db_name: str) -> str:
+        """Build a main-server MySQL URL using the configured driver."""
+        return (
+            f"mysql+{self.db_driver}://{self.db_user}:{self.db_password}"
+            f"@{self.db_host}:{self.db_port}/{db_name}"
+        )
+
     @computed_field
     @property
     def database_url_ess(self) -> str:
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name_ess}"
+        return self._database_url(self.db_name_ess)
 
     @computed_field
     @property
     def database_url_schedule(self) -> str:
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name_schedule}"
+        return self._database_url(self.db_name_schedule)
 
     @computed_field
     @property
     def database_url_meter(self) -> str:
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name_meter}"
+        return self._database_url(self.db_name_meter)
 
     @computed_field
     @property
     def database_url_pcs(self) -> str:
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name_pcs}"
+        return self._database_url(self.db_name_pcs)
 
     @computed_field
     @property
     def database_url_inverter(self) -> str:
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name_inverter}"
+        return self._database_url(self.db_name_inverter)
 
     @computed_field
     @property
     def database_url_baseline(self) -> str:
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name_baseline}"
+        return self._database_url(self.db_name_baseline)
 
     def get_bess_database_url(self, bess_number: int) -> str:
         """Get database URL for a specific BESS unit."""
         db_name = getattr(self, f"db_name_bess{bess_number}", f"BESS{bess_number}")
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{db_name}"
+        return self._database_url(db_name)
 
 
 @lru_cache
@@ -26,6 +26,41 @@ class RedisConnectionError(SolarHubException):
         super().__init__(message, status_code=503)
 
 
+class ServiceOverloadedError(SolarHubException):
+    """Raised when a request is shed because the database is saturated."""
+
+    def __init__(self, message: str = "Service is busy, please retry later"):
+        super().__init__(message, status_code=503)
+
+
+class DataNotReadyError(SolarHubException):
+    """Raised when derived tables a request reads from have not been created yet."""
+
+    def __init__(self, message: str = "Data is not available yet"):
+        super().__init__(message, status_code=503)
+
+
+class QueryTimeoutError(SolarHubException):
+    """Raised when a database query exceeds its time budget."""
+
+    def __init__(self, message: str = "Database query timed out"):
+        super().__init__(message, status_code=504)
+
+
+class QueryTooLargeError(SolarHubException):
+    """Raised when a query would read more rows than the planner allows."""
+
+    def __init__(self, message: str = "Query range is too large"):
+        super().__init__(message, status_code=413)
+
+
+class ClientDisconnectedError(SolarHubException):
+    """Raised when a request is abandoned because its client disconnected."""
+
+    def __init__(self, message: str = "Client closed the request"):
+        super().__init__(message, status_code=499)
+
+
 class AuthenticationError(SolarHubException):
     """Raised when authentication fails."""
 
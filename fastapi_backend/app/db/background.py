@@ -0,0 +1,193 @@
+"""Coordination of background jobs across worker processes.
+
+Every uvicorn worker runs the application lifespan, so every worker
+starts the background jobs. Jobs that fold rows into shared tables
+(rollups, SBSPM, excursions) must run in one process only:
+
+- ``LeaderLock`` elects that process with a MySQL named lock
+  (``GET_LOCK``), held by a dedicated connection for as long as the
+  process leads. MySQL releases it when the connection goes away, so
+  another worker takes over within ``retry`` seconds of a crash.
+- ``RequiredTables`` holds a job back until its tables exist, logging
+  once instead of failing on every tick.
+
+Both are used as the ``gate`` of a ``PeriodicTask``.
+"""
+import logging
+import math
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db.session import DatabaseManager, DatabaseName, db_manager
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    """
+    MySQL named lock electing the one process that runs background jobs.
+
+    ``acquire`` is cheap to call on every tick: the lock is (re)checked at
+    most every ``retry`` seconds. Engines other than MySQL (tests, local
+    SQLite) have no named locks; there the process always leads.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        name: str,
+        db_name: DatabaseName = "meter",
+        retry: float | None = None,
+    ):
+        self._db = db
+        self.name = name
+        self.db_name = db_name
+        self.retry = retry if retry is not None else settings.background_leader_retry
+        self._conn: AsyncConnection | None = None
+        self._leader = False
+        self._checked_at = -math.inf
+
+    @property
+    def is_leader(self) -> bool:
+        """Whether this process held the lock at the last check."""
+        return self._leader
+
+    async def acquire(self) -> bool:
+        """Return True while this process is the leader, taking the lock if free."""
+        now = time.monotonic()
+        if now - self._checked_at < self.retry:
+            return self._leader
+        self._checked_at = now
+        try:
+            leader = await self._check()
+        except SQLAlchemyError as e:
+            logger.warning(f"Leader lock '{self.name}' check failed: {e}")
+            await self._drop()
+            leader = False
+        if self._leader and not leader:
+            logger.warning(f"Lost leader lock '{self.name}', background jobs paused")
+        elif leader and not self._leader:
+            logger.info(f"Holding leader lock '{self.name}', running background jobs")
+        self._leader = leader
+        return leader
+
+    async def _check(self) -> bool:
+        if self._conn is not None:
+            held = await self._conn.scalar(
+                text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name}
+            )
+            if held:
+                return True
+            await self._drop()
+
+        engine = self._db.get_engine(self.db_name, read_only=True)
+        if engine.dialect.name != "mysql":
+            return True
+        conn = await engine.connect()
+        try:
+            acquired = await conn.scalar(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name})
+        except BaseException:
+            await conn.invalidate()
+            await conn.close()
+            raise
+        if acquired != 1:
+            await conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    async def _drop(self) -> None:
+        """Discard the lock connection; closing the socket frees the lock."""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            await conn.invalidate()
+            await conn.close()
+        except SQLAlchemyError as e:
+            logger.debug(f"Closing leader lock connection failed: {e}")
+
+    async def release(self) -> None:
+        """Give up leadership (on shutdown)."""
+        if self._conn is not None:
+            try:
+                await self._conn.execute(
+                    text("SELECT RELEASE_LOCK(:name)"), {"name": self.name}
+                )
+            except SQLAlchemyError as e:
+                logger.debug(f"Releasing leader lock '{self.name}' failed: {e}")
+        await self._drop()
+        self._leader = False
+        self._checked_at = -math.inf
+
+
+class RequiredTables:
+    """
+    Holds a background job back until its tables exist.
+
+    Missing tables are reported once with ``hint`` (how to create them)
+    and re-checked every ``retry`` seconds; once found they are not
+    checked again.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        db_name: DatabaseName,
+        tables: list[str],
+        job: str,
+        hint: str,
+        retry: float = 60.0,
+    ):
+        self._db = db
+        self.db_name = db_name
+        self.tables = tables
+        self.job = job
+        self.hint = hint
+        self.retry = retry
+        self._ready = False
+        self._warned = False
+        self._next_check = -math.inf
+
+    async def ready(self) -> bool:
+        """True once every table exists."""
+        if self._ready:
+            return True
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.retry
+
+        engine = self._db.get_engine(self.db_name, read_only=True)
+        # per_host engines address the database through schema_translate_map
+        schema = engine.get_execution_options().get("schema_translate_map", {}).get(None)
+        try:
+            async with engine.connect() as conn:
+                existing = await conn.run_sync(
+                    lambda sync: set(inspect(sync).get_table_names(schema=schema))
+                )
+        except SQLAlchemyError as e:
+            logger.warning(f"{self.job}: checking tables in '{self.db_name}' failed: {e}")
+            return False
+
+        missing = [table for table in self.tables if table not in existing]
+        if missing:
+            if not self._warned:
+                logger.warning(
+                    f"{self.job} skipped: tables {missing} missing in '{self.db_name}' "
+                    f"(create them with `{self.hint}`); checking again every {self.retry:.0f}s"
+                )
+                self._warned = True
+            return False
+        if self._warned:
+            logger.info(f"{self.job}: tables found, starting")
+        self._ready = True
+        return True
+
+
+# Shared by every job that writes derived tables
+background_leader = LeaderLock(db_manager, "solarhub:background")
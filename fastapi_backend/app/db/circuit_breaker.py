@@ -0,0 +1,114 @@
+"""Circuit breaker for backing services (MySQL, Redis)."""
+import logging
+import time
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+BreakerState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    - closed: requests pass through; failures are counted.
+    - open: requests fail fast until ``reset_timeout`` has elapsed.
+    - half_open: a single probe request is let through. Success closes
+      the breaker, failure re-opens it. Other requests keep failing fast
+      while the probe is in flight.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 10.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state: BreakerState = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> BreakerState:
+        """Current breaker state."""
+        return self._state
+
+    @property
+    def failures(self) -> int:
+        """Number of consecutive failures recorded."""
+        return self._failures
+
+    def is_available(self) -> bool:
+        """
+        Non-mutating check: False only while open and within the reset timeout.
+
+        Use this where callers cannot report a per-request outcome slot
+        (e.g. handing out a lazy client); ``allow_request`` reserves the
+        half-open probe.
+        """
+        if self._state != "open":
+            return True
+        return time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def allow_request(self) -> bool:
+        """
+        Return True if a request may proceed.
+
+        In the open state this transitions to half-open once the reset
+        timeout has elapsed and admits exactly one probe.
+        """
+        if self._state == "closed":
+            return True
+
+        if self._state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._state = "half_open"
+            self._probe_in_flight = False
+
+        # half_open: admit a single probe
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful request and close the breaker."""
+        if self._state != "closed":
+            logger.info(f"Circuit '{self.name}' closed")
+        self._state = "closed"
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the breaker at the threshold."""
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == "half_open" or self._failures >= self.failure_threshold:
+            if self._state != "open":
+                logger.warning(
+                    f"Circuit '{self.name}' opened after {self._failures} consecutive failures"
+                )
+            self._state = "open"
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Release a half-open probe slot without an outcome.
+
+        Used when the admitted request never reached the backend
+        (e.g. a session that was opened but not queried).
+        """
+        self._probe_in_flight = False
+
+    def reset(self) -> None:
+        """Force the breaker back to the closed state."""
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
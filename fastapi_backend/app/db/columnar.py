@@ -0,0 +1,234 @@
+"""Columnar fetch path for time-series queries.
+
+Analytics read thousands to millions of meter, baseline and inverter
+rows. Loading them as ORM entities builds one Python object per row plus
+an identity map. ``fetch_columns`` runs a Core ``select()`` with explicit
+column projection instead, streams the rows in chunks, and stores each
+column in a typed NumPy array:
+
+- ``DateTime`` columns become ``datetime64[us]`` (NULL -> NaT)
+- ``Float``/``Numeric`` and nullable integer columns become floats (NULL -> NaN)
+- non-nullable integer columns become ``int64``, non-nullable booleans ``bool``
+"""
+from collections.abc import AsyncGenerator, AsyncIterator, Iterator, Sequence
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Protocol
+
+import numpy as np
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    Executable,
+    Float,
+    Integer,
+    Numeric,
+    Row,
+    Select,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from app.analytics.downsample import DownsampleMethod, downsample, shared_indices
+from app.core.config import settings
+
+DATETIME_DTYPE = np.dtype("datetime64[us]")
+
+
+class StreamingSession(Protocol):
+    """Anything that can stream a statement, e.g. ``LazySession``."""
+
+    def stream(self, statement: Executable) -> AbstractAsyncContextManager[AsyncResult[Any]]:
+        ...
+
+
+@dataclass
+class ColumnBatch:
+    """Query result held as one NumPy array per selected column."""
+
+    columns: dict[str, np.ndarray]
+
+    def __post_init__(self) -> None:
+        lengths = {len(array) for array in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Column lengths differ: {sorted(lengths)}")
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    @property
+    def names(self) -> list[str]:
+        """Column names in selection order."""
+        return list(self.columns)
+
+    def with_columns(self, **columns: np.ndarray) -> "ColumnBatch":
+        """A new batch with ``columns`` added (e.g. aligned columns from another query)."""
+        return ColumnBatch({**self.columns, **columns})
+
+    def take(self, indices: np.ndarray) -> "ColumnBatch":
+        """A new batch with the rows at ``indices``."""
+        return ColumnBatch({name: array[indices] for name, array in self.columns.items()})
+
+    def downsampled(
+        self,
+        time: str,
+        values: Sequence[str],
+        max_points: int,
+        method: DownsampleMethod = "lttb",
+    ) -> "ColumnBatch":
+        """
+        The rows keeping the shape of every ``values`` series, at most ``max_points``.
+
+        All columns are cut at the same rows, so series charted from the
+        result share one time axis.
+        """
+        indices = shared_indices(
+            self.epoch_ms(time),
+            [self.columns[name].astype(np.float64) for name in values],
+            max_points,
+            method,
+        )
+        return self.take(indices)
+
+    def epoch_ms(self, name: str) -> np.ndarray:
+        """A datetime column as int64 epoch milliseconds (chart timestamps)."""
+        return self.columns[name].astype("datetime64[ms]").astype(np.int64)
+
+    def pairs(
+        self,
+        time: str,
+        value: str,
+        max_points: int = 0,
+        method: DownsampleMethod = "lttb",
+        scale: float = 1.0,
+    ) -> list[list]:
+        """
+        ``[[epoch_ms, value], ...]`` chart series; NaN values become None.
+
+        Naive datetimes are read as UTC, which is how the databases store
+        them. A positive ``max_points`` downsamples the series first (see
+        ``app.analytics.downsample``); ``scale`` multiplies the values.
+        """
+        times, values = downsample(
+            self.epoch_ms(time), self.columns[value].astype(np.float64), max_points, method
+        )
+        if scale != 1.0:
+            values = values * scale
+        cleaned = np.where(np.isnan(values), None, values).tolist()
+        return [list(point) for point in zip(times.tolist(), cleaned, strict=True)]
+
+
+@asynccontextmanager
+async def _stream(
+    db: StreamingSession | AsyncSession, statement: Executable
+) -> AsyncGenerator[AsyncResult[Any], None]:
+    """Stream from a ``LazySession``-style proxy or a plain ``AsyncSession``."""
+    if not isinstance(db, AsyncSession):
+        async with db.stream(statement) as result:
+            yield result
+        return
+    result = await db.stream(statement)
+    try:
+        yield result
+    finally:
+        await result.close()
+
+
+def _column_dtype(column: ColumnElement[Any], float_dtype: np.dtype) -> np.dtype:
+    """NumPy dtype for a selected column, based on its SQL type."""
+    sql_type = column.type
+    if isinstance(sql_type, (DateTime, Date)):
+        return DATETIME_DTYPE
+    if isinstance(sql_type, (Float, Numeric)):
+        return float_dtype
+    if isinstance(sql_type, Integer):
+        # NULL needs NaN, so only NOT NULL integers stay integral
+        return np.dtype(np.int64) if getattr(column, "nullable", True) is False else float_dtype
+    if isinstance(sql_type, Boolean):
+        return np.dtype(bool) if getattr(column, "nullable", True) is False else float_dtype
+    return np.dtype(object)
+
+
+def _to_array(values: tuple, dtype: np.dtype) -> np.ndarray:
+    if dtype.kind == "O":
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return np.array(values, dtype=dtype)
+
+
+def time_series_select(
+    time_column: ColumnElement[datetime],
+    *columns: ColumnElement[Any],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Select[Any]:
+    """
+    ``SELECT time, col...`` over the half-open range ``[start, end)``, in time order.
+
+    Example: ``time_series_select(MainMeter.EventTime, MainMeter.Freq, start=t0)``
+    """
+    statement = select(time_column, *columns)
+    if start is not None:
+        statement = statement.where(time_column >= start)
+    if end is not None:
+        statement = statement.where(time_column < end)
+    return statement.order_by(time_column)
+
+
+async def stream_partitions(
+    db: StreamingSession | AsyncSession,
+    statement: Select[Any],
+    chunk_size: int | None = None,
+) -> AsyncIterator[Sequence[Row[Any]]]:
+    """Rows of ``statement`` in chunks of ``chunk_size``, through a server-side cursor."""
+    chunk_size = chunk_size or settings.db_stream_chunk_size
+    async with _stream(db, statement.execution_options(yield_per=chunk_size)) as result:
+        async for rows in result.partitions(chunk_size):
+            yield rows
+
+
+async def fetch_columns(
+    db: StreamingSession | AsyncSession,
+    statement: Select[Any],
+    *,
+    chunk_size: int | None = None,
+    float_dtype: type[np.floating] = np.float64,
+) -> ColumnBatch:
+    """
+    Stream a Core select into a ``ColumnBatch``.
+
+    Rows arrive through a server-side cursor in chunks of ``chunk_size``
+    (default ``settings.db_stream_chunk_size``). Each chunk is transposed
+    into per-column arrays, so at most one chunk of Python row tuples is
+    alive at a time. Pass ``float_dtype=np.float32`` to halve the memory
+    of the metric columns.
+    """
+    dtype_for_float = np.dtype(float_dtype)
+    selected = list(statement.selected_columns)
+    names = [column.key for column in selected]
+    dtypes = [_column_dtype(column, dtype_for_float) for column in selected]
+    chunks: list[list[np.ndarray]] = [[] for _ in selected]
+
+    async for rows in stream_partitions(db, statement, chunk_size):
+        for i, values in enumerate(zip(*rows, strict=True)):
+            chunks[i].append(_to_array(values, dtypes[i]))
+
+    return ColumnBatch(
+        {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+            for name, dtype, parts in zip(names, dtypes, chunks, strict=True)
+        }
+    )
@@ -0,0 +1,52 @@
+"""Result types for fan-out queries across the BESS databases."""
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Row
+
+
+@dataclass
+class UnitResult:
+    """Outcome of one BESS database in a fan-out query."""
+
+    bess_number: int
+    rows: list[Row[Any]] = field(default_factory=list)
+    error: str | None = None
+    elapsed_ms: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        """True if the unit answered."""
+        return self.error is None
+
+
+@dataclass
+class FanOutResult:
+    """
+    Fleet-wide result ordered by BESS number.
+
+    Units that were unavailable or timed out are kept with their error,
+    so callers can render a partial fleet view.
+    """
+
+    units: list[UnitResult]
+
+    @property
+    def rows(self) -> list[tuple[int, Row[Any]]]:
+        """All rows merged in unit order, each tagged with its BESS number."""
+        return [(unit.bess_number, row) for unit in self.units for row in unit.rows]
+
+    @property
+    def available(self) -> list[int]:
+        """BESS numbers that answered."""
+        return [unit.bess_number for unit in self.units if unit.ok]
+
+    @property
+    def unavailable(self) -> dict[int, str]:
+        """BESS numbers that failed, mapped to their error."""
+        return {unit.bess_number: unit.error for unit in self.units if not unit.ok}
+
+    @property
+    def complete(self) -> bool:
+        """True if every requested unit answered."""
+        return all(unit.ok for unit in self.units)
@@ -0,0 +1,189 @@
+"""Background health monitor for databases and Redis servers."""
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Literal, get_args
+
+from app.core.config import settings
+from app.db.redis import RedisManager, redis_manager
+from app.db.session import CONNECT_TIMEOUT, DatabaseManager, DatabaseName, db_manager
+from app.utils.periodic import PeriodicTask
+from app.utils.timezone import now_utc
+
+logger = logging.getLogger(__name__)
+
+CORE_DATABASES: tuple[DatabaseName, ...] = (
+    "ess", "schedule", "meter", "pcs", "inverter", "baseline",
+)
+ALL_DATABASES: tuple[DatabaseName, ...] = get_args(DatabaseName)
+REDIS_SERVERS: tuple[str, ...] = ("main", "gtr")
+
+
+@dataclass
+class TargetHealth:
+    """Result of probing a single database or Redis server."""
+
+    name: str
+    kind: Literal["database", "redis"]
+    healthy: bool
+    latency_ms: float | None
+    checked_at: datetime
+    error: str | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "latency_ms": self.latency_ms,
+            "checked_at": self.checked_at,
+            "error": self.error,
+        }
+
+
+@dataclass
+class HealthSnapshot:
+    """Point-in-time status of all probed targets."""
+
+    databases: dict[str, TargetHealth] = field(default_factory=dict)
+    redis: dict[str, TargetHealth] = field(default_factory=dict)
+    checked_at: datetime | None = None
+    duration_ms: float = 0.0
+
+    def database_status(self, core_only: bool = False) -> dict[str, bool]:
+        """Map of database name to connected flag."""
+        return {
+            name: result.healthy
+            for name, result in self.databases.items()
+            if not core_only or name in CORE_DATABASES
+        }
+
+    def redis_status(self) -> dict[str, bool]:
+        """Map of Redis server name to connected flag."""
+        return {name: result.healthy for name, result in self.redis.items()}
+
+
+class HealthMonitor:
+    """
+    Probes every database and Redis server concurrently and caches the result.
+
+    The snapshot is refreshed by a background task started in the
+    application lifespan. Health endpoints read the cached snapshot
+    instead of probing on every request; if no monitor is running
+    (e.g. in tests) a stale snapshot is refreshed on demand.
+    """
+
+    def __init__(
+        self,
+        databases: DatabaseManager,
+        redis: RedisManager,
+        interval: float | None = None,
+        timeout: float | None = None,
+    ):
+        self._databases = databases
+        self._redis = redis
+        self.interval = interval if interval is not None else settings.health_check_interval
+        self.timeout = timeout if timeout is not None else settings.health_check_timeout
+        self._snapshot = HealthSnapshot()
+        self._refresh_lock = asyncio.Lock()
+        self._task = PeriodicTask(
+            "health-monitor", self.interval, self.refresh, run_immediately=False
+        )
+
+    @property
+    def snapshot(self) -> HealthSnapshot:
+        """Latest published snapshot (may be empty before the first probe)."""
+        return self._snapshot
+
+    @property
+    def database_timeout(self) -> float:
+        """
+        Probe timeout for databases, always past the driver's connect timeout.
+
+        Cancelling a probe mid-connect would discard a half-open breaker's
+        only probe; letting the driver time out records a real failure.
+        """
+        return max(self.timeout, CONNECT_TIMEOUT + 1.0)
+
+    async def _probe(
+        self,
+        name: str,
+        kind: Literal["database", "redis"],
+        check: Callable[[str], Awaitable[bool]],
+        timeout: float,
+    ) -> TargetHealth:
+        started = time.perf_counter()
+        error = None
+        try:
+            healthy = await asyncio.wait_for(check(name), timeout=timeout)
+        except TimeoutError:
+            healthy = False
+            error = f"timed out after {timeout:.1f}s"
+        except Exception as e:
+            healthy = False
+            error = str(e)
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        return TargetHealth(
+            name=name,
+            kind=kind,
+            healthy=healthy,
+            latency_ms=latency_ms if healthy else None,
+            checked_at=now_utc(),
+            error=error,
+        )
+
+    async def refresh(self) -> HealthSnapshot:
+        """Probe all targets concurrently and publish a new snapshot."""
+        async with self._refresh_lock:
+            started = time.perf_counter()
+            db_probes = [
+                self._probe(
+                    name, "database", self._databases.check_connection, self.database_timeout
+                )
+                for name in ALL_DATABASES
+            ]
+            redis_probes = [
+                self._probe(name, "redis", self._redis.check_connection, self.timeout)
+                for name in REDIS_SERVERS
+            ]
+            results = await asyncio.gather(*db_probes, *redis_probes)
+
+            snapshot = HealthSnapshot(checked_at=now_utc())
+            for result in results:
+                if result.kind == "database":
+                    snapshot.databases[result.name] = result
+                else:
+                    snapshot.redis[result.name] = result
+            snapshot.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            self._snapshot = snapshot
+            return snapshot
+
+    async def get_snapshot(self, max_age: float | None = None) -> HealthSnapshot:
+        """
+        Return the cached snapshot, refreshing it first if it is missing
+        or older than ``max_age`` seconds.
+        """
+        max_age = max_age if max_age is not None else settings.health_snapshot_max_age
+        checked_at = self._snapshot.checked_at
+        if checked_at is None or (now_utc() - checked_at).total_seconds() > max_age:
+            if self._refresh_lock.locked():
+                # Another caller is already probing; wait for its result.
+                async with self._refresh_lock:
+                    return self._snapshot
+            return await self.refresh()
+        return self._snapshot
+
+    async def start(self) -> HealthSnapshot:
+        """Run an initial probe and start the background refresh loop."""
+        snapshot = await self.refresh()
+        self._task.start()
+        return snapshot
+
+    async def stop(self) -> None:
+        """Stop the background refresh loop."""
+        await self._task.stop()
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor(db_manager, redis_manager)
@@ -0,0 +1,163 @@
+"""Redis key registry for device keys.
+
+Each device class keeps the names of its live keys in one Redis set
+(``registry:<class>``). Writers register keys as they create them, and a
+reconciliation pass rebuilds the set from a SCAN to catch drift. Readers
+use ``redis_scan(..., by_registry=<class>)`` so that lookup cost scales
+with the number of devices instead of the size of the keyspace.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Literal
+
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
+from app.core.config import settings
+from app.db.background import background_leader
+from app.db.redis import RedisManager, redis_manager, registry_key
+from app.utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DeviceClass:
+    """A family of device keys sharing a key pattern and Redis server."""
+
+    name: str
+    pattern: str
+    server: Literal["main", "gtr"]
+
+
+DEVICE_CLASSES: dict[str, DeviceClass] = {
+    "meter": DeviceClass("meter", "meter_*", "main"),
+    "rack_alert": DeviceClass("rack_alert", "rack*_alert", "gtr"),
+    "bess_rack": DeviceClass("bess_rack", "bess*_rack*", "gtr"),
+}
+
+
+def get_device_class(name: str) -> DeviceClass:
+    """Look up a device class by name."""
+    if name not in DEVICE_CLASSES:
+        raise ValueError(f"Unknown device class: {name}")
+    return DEVICE_CLASSES[name]
+
+
+async def register_keys(redis: Redis | None, device_class: str, *keys: str) -> bool:
+    """
+    Add keys to a device class registry.
+
+    Called by writers when they create device keys. Returns False if
+    Redis is unavailable.
+    """
+    get_device_class(device_class)
+    if redis is None or not keys:
+        return False
+    try:
+        await redis.sadd(registry_key(device_class), *keys)
+        return True
+    except (ConnectionError, TimeoutError, RedisError) as e:
+        logger.warning(f"Registering keys for '{device_class}' failed: {e}")
+        return False
+
+
+async def unregister_keys(redis: Redis | None, device_class: str, *keys: str) -> bool:
+    """Remove keys from a device class registry."""
+    get_device_class(device_class)
+    if redis is None or not keys:
+        return False
+    try:
+        await redis.srem(registry_key(device_class), *keys)
+        return True
+    except (ConnectionError, TimeoutError, RedisError) as e:
+        logger.warning(f"Unregistering keys for '{device_class}' failed: {e}")
+        return False
+
+
+async def registered_keys(redis: Redis | None, device_class: str) -> list[str]:
+    """Return the registered keys of a device class in sorted order."""
+    get_device_class(device_class)
+    if redis is None:
+        return []
+    try:
+        return sorted(await redis.smembers(registry_key(device_class)))
+    except (ConnectionError, TimeoutError, RedisError) as e:
+        logger.warning(f"Reading registry for '{device_class}' failed: {e}")
+        return []
+
+
+async def reconcile(redis: Redis, device_class: str, count: int = 500) -> int:
+    """
+    Rebuild a device class registry from a SCAN of its key pattern.
+
+    The new set is built under a temporary key and swapped in with
+    RENAME inside a MULTI block, so readers never observe a partially
+    built registry. Returns the number of registered keys.
+    """
+    spec = get_device_class(device_class)
+    target = registry_key(device_class)
+    staging = f"{target}:reconcile"
+
+    keys = {key async for key in redis.scan_iter(match=spec.pattern, count=count)}
+
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(staging)
+        if keys:
+            members = sorted(keys)
+            for i in range(0, len(members), count):
+                pipe.sadd(staging, *members[i : i + count])
+            pipe.rename(staging, target)
+        else:
+            pipe.delete(target)
+        await pipe.execute()
+
+    return len(keys)
+
+
+class KeyRegistryReconciler:
+    """
+    Periodically reconciles every device class registry against its pattern.
+
+    Runs in the ``background_leader`` process only.
+    """
+
+    def __init__(self, redis: RedisManager, interval: float | None = None):
+        self._redis = redis
+        self.interval = (
+            interval if interval is not None else settings.redis_registry_reconcile_interval
+        )
+        self._task = PeriodicTask(
+            "key-registry-reconcile",
+            self.interval,
+            self.reconcile_all,
+            gate=background_leader.acquire,
+        )
+
+    async def reconcile_all(self) -> dict[str, int | None]:
+        """Reconcile all device classes; None marks a class whose server is down."""
+        counts: dict[str, int | None] = {}
+        for name, spec in DEVICE_CLASSES.items():
+            client = (
+                self._redis.get_main_client()
+                if spec.server == "main"
+                else self._redis.get_gtr_client()
+            )
+            try:
+                counts[name] = await reconcile(client, name)
+            except (ConnectionError, TimeoutError, RedisError) as e:
+                logger.warning(f"Key registry reconcile for '{name}' failed: {e}")
+                counts[name] = None
+        return counts
+
+    def start(self) -> None:
+        """Start background reconciliation (first pass runs immediately)."""
+        self._task.start()
+
+    async def stop(self) -> None:
+        """Stop background reconciliation."""
+        await self._task.stop()
+
+
+# Global reconciler instance
+key_registry_reconciler = KeyRegistryReconciler(redis_manager)
@@ -1,18 +1,28 @@
 """Async Redis connection management with graceful error handling."""
+import asyncio
+import inspect
 import json
 import logging
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable
 from contextlib import asynccontextmanager
+from fnmatch import fnmatchcase
 from typing import Any
 
+import orjson
 from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
 from redis.exceptions import ConnectionError, TimeoutError, RedisError
 
 from app.core.config import settings
 from app.core.exceptions import RedisConnectionError
+from app.db.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
+# Prefix of the per-device-class key registry sets (see app.db.key_registry)
+REGISTRY_KEY_PREFIX = "registry:"
+
 
 class RedisManager:
     """Manages async Redis connections for main and GTR servers with graceful error handling."""
@@ -21,6 +31,7 @@ class RedisManager:
         self._pools: dict[str, ConnectionPool] = {}
         self._clients: dict[str, Redis] = {}
         self._connection_status: dict[str, bool] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
 
     def _create_pool(self, host: str, port: int, password: str, db: int = 0) -> ConnectionPool:
         """Create a Redis connection pool."""
@@ -68,28 +79,60 @@ class RedisManager:
             self._clients["gtr"] = Redis(connection_pool=self.get_gtr_pool())
         return self._clients["gtr"]
 
+    def get_client(self, server: str = "main") -> Redis:
+        """Get Redis client for a server by name."""
+        return self.get_main_client() if server == "main" else self.get_gtr_client()
+
+    def get_breaker(self, server: str = "main") -> CircuitBreaker:
+        """Get or create the health tracker (circuit breaker) for a server."""
+        if server not in self._breakers:
+            self._breakers[server] = CircuitBreaker(
+                f"redis:{server}",
+                failure_threshold=settings.redis_breaker_failure_threshold,
+                reset_timeout=settings.redis_breaker_reset_timeout,
+            )
+        return self._breakers[server]
+
+    def record_success(self, server: str) -> None:
+        """Record a command that reached the server."""
+        self._connection_status[server] = True
+        self.get_breaker(server).record_success()
+
+    def record_failure(self, server: str, error: Exception) -> None:
+        """Record a command that failed at the connection level."""
+        self._connection_status[server] = False
+        self.get_breaker(server).record_failure()
+        logger.warning(f"Redis '{server}' command failed: {error}")
+
     def is_connected(self, server: str = "main") -> bool:
         """Check if Redis server is connected."""
         return self._connection_status.get(server, False)
 
+    def is_available(self, server: str = "main") -> bool:
+        """False while the server's breaker is open after repeated failures."""
+        return self.get_breaker(server).is_available()
+
     async def check_connection(self, server: str = "main") -> bool:
         """Test Redis connection and return status."""
         try:
-            client = self.get_main_client() if server == "main" else self.get_gtr_client()
-            await client.ping()
-            self._connection_status[server] = True
+            await self.get_client(server).ping()
+            self.record_success(server)
             return True
-        except (ConnectionError, TimeoutError, RedisError) as e:
+        except (ConnectionError, TimeoutError) as e:
+            self.record_failure(server, e)
+            return False
+        except RedisError as e:
             self._connection_status[server] = False
             logger.warning(f"Redis '{server}' connection check failed: {e}")
             return False
 
     async def health_check(self) -> dict[str, bool]:
-        """Check all Redis connections and return status dict."""
-        return {
-            "main": await self.check_connection("main"),
-            "gtr": await self.check_connection("gtr"),
-        }
+        """Check all Redis connections concurrently and return status dict."""
+        main, gtr = await asyncio.gather(
+            self.check_connection("main"),
+            self.check_connection("gtr"),
+        )
+        return {"main": main, "gtr": gtr}
 
     async def close_all(self) -> None:
         """Close all Redis connections."""
@@ -100,106 +143,274 @@ class RedisManager:
         self._clients.clear()
         self._pools.clear()
         self._connection_status.clear()
+        self._breakers.clear()
 
 
 # Global Redis manager instance
 redis_manager = RedisManager()
 
 
+class _TrackedPipeline:
+    """Pipeline proxy whose ``execute`` outcome feeds the server's health tracker."""
+
+    def __init__(self, pipeline: Pipeline, handle: "LazyRedis"):
+        self._pipeline = pipeline
+        self._handle = handle
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pipeline, name)
+
+    async def __aenter__(self) -> "_TrackedPipeline":
+        await self._pipeline.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self._pipeline.__aexit__(*exc_info)
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        return await self._handle._tracked(self._pipeline.execute(raise_on_error))
+
+
+class LazyRedis:
+    """
+    Redis handle that performs no I/O until the first command.
+
+    Behaves like ``redis.asyncio.Redis``: attribute access is delegated to
+    the pooled client. Every awaited command reports its outcome to the
+    server's health tracker in ``RedisManager``, so connection state comes
+    from real traffic instead of a per-request PING.
+    """
+
+    def __init__(self, server: str = "main", manager: RedisManager | None = None):
+        self.server = server
+        self._manager = manager or redis_manager
+        self._client: Redis | None = None
+        self._methods: dict[str, Any] = {}
+
+    @property
+    def client(self) -> Redis:
+        """Underlying pooled client (created on first use, without I/O)."""
+        if self._client is None:
+            self._client = self._manager.get_client(self.server)
+        return self._client
+
+    async def _tracked(self, awaitable: Awaitable[Any]) -> Any:
+        try:
+            result = await awaitable
+        except (ConnectionError, TimeoutError) as e:
+            self._manager.record_failure(self.server, e)
+            raise
+        self._manager.record_success(self.server)
+        return result
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> _TrackedPipeline:
+        return _TrackedPipeline(self.client.pipeline(transaction, shard_hint), self)
+
+    def register_script(self, script: str) -> AsyncScript:
+        # Bind the script to this handle so EVALSHA goes through _tracked.
+        return AsyncScript(self, script)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in self._methods:
+            return self._methods[name]
+
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        # redis-py commands are plain methods returning awaitables
+        def method(*args: Any, **kwargs: Any) -> Any:
+            result = attr(*args, **kwargs)
+            if inspect.isawaitable(result):
+                return self._tracked(result)
+            return result
+
+        self._methods[name] = method
+        return method
+
+
+def _lazy_handle(server: str) -> LazyRedis | None:
+    """Return a lazy handle, or None while the server is known to be down."""
+    if not redis_manager.is_available(server):
+        logger.debug(f"Redis '{server}' circuit open, skipping")
+        return None
+    return LazyRedis(server)
+
+
 @asynccontextmanager
-async def get_redis_safe() -> AsyncGenerator[Redis | None, None]:
+async def get_redis_safe() -> AsyncGenerator[LazyRedis | None, None]:
     """
     Get main Redis client with graceful error handling.
 
-    Yields None if Redis is unavailable.
+    Yields a lazy handle that connects on first command, or None if Redis
+    is known to be unavailable. No PING is sent.
     """
-    client = redis_manager.get_main_client()
-    try:
-        await client.ping()
-        redis_manager._connection_status["main"] = True
-        yield client
-    except (ConnectionError, TimeoutError, RedisError) as e:
-        redis_manager._connection_status["main"] = False
-        logger.warning(f"Redis main connection failed: {e}")
-        yield None
+    yield _lazy_handle("main")
 
 
 @asynccontextmanager
-async def get_redis_gtr_safe() -> AsyncGenerator[Redis | None, None]:
+async def get_redis_gtr_safe() -> AsyncGenerator[LazyRedis | None, None]:
     """
     Get GTR Redis client with graceful error handling.
 
-    Yields None if Redis is unavailable.
+    Yields a lazy handle that connects on first command, or None if Redis
+    is known to be unavailable. No PING is sent.
     """
-    client = redis_manager.get_gtr_client()
-    try:
-        await client.ping()
-        redis_manager._connection_status["gtr"] = True
-        yield client
-    except (ConnectionError, TimeoutError, RedisError) as e:
-        redis_manager._connection_status["gtr"] = False
-        logger.warning(f"Redis GTR connection failed: {e}")
-        yield None
+    yield _lazy_handle("gtr")
 
 
-async def get_redis() -> AsyncGenerator[Redis | None, None]:
+async def get_redis() -> AsyncGenerator[LazyRedis | None, None]:
     """Dependency for getting main Redis client (graceful - returns None on failure)."""
     async with get_redis_safe() as client:
         yield client
 
 
-async def get_redis_gtr() -> AsyncGenerator[Redis | None, None]:
+async def get_redis_gtr() -> AsyncGenerator[LazyRedis | None, None]:
     """Dependency for getting GTR Redis client (graceful - returns None on failure)."""
     async with get_redis_gtr_safe() as client:
         yield client
 
 
-async def get_redis_required() -> AsyncGenerator[Redis, None]:
-    """Dependency for getting main Redis client (raises on failure)."""
-    client = redis_manager.get_main_client()
+async def get_redis_required() -> AsyncGenerator[LazyRedis, None]:
+    """Dependency for getting main Redis client (raises if known to be down)."""
+    client = _lazy_handle("main")
+    if client is None:
+        raise RedisConnectionError("Redis is unavailable")
+    yield client
+
+
+# Fetch TYPE plus value for every key of a SCAN page in one round trip.
+_FETCH_PAGE_LUA = """
+local out = {}
+for i, key in ipairs(KEYS) do
+    local key_type = redis.call('TYPE', key)['ok']
+    if key_type == 'hash' then
+        out[i] = {key_type, redis.call('HGETALL', key)}
+    elseif key_type == 'string' then
+        out[i] = {key_type, redis.call('GET', key)}
+    else
+        out[i] = {key_type}
+    end
+end
+return out
+"""
+
+
+def _decode_string_value(value: str | None) -> Any:
+    """Decode a string value as JSON, wrapping non-JSON payloads."""
+    if not value:
+        return {}
     try:
-        await client.ping()
-        redis_manager._connection_status["main"] = True
-        yield client
-    except (ConnectionError, TimeoutError, RedisError) as e:
-        redis_manager._connection_status["main"] = False
-        raise RedisConnectionError(f"Redis is unavailable: {e}")
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return {"value": value}
+
+
+async def _fetch_page_pipelined(redis: Redis, keys: list[str]) -> list[Any]:
+    """
+    Fetch values for a page of keys in two pipelined round trips.
+
+    The first pipeline resolves every key's TYPE; the second fetches
+    hashes with HGETALL and all strings with a single MGET. Results are
+    returned in the order of ``keys``; keys of other types are skipped.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.type(key)
+        key_types = await pipe.execute()
+
+    hash_keys = [key for key, key_type in zip(keys, key_types, strict=True) if key_type == "hash"]
+    string_keys = [
+        key for key, key_type in zip(keys, key_types, strict=True) if key_type == "string"
+    ]
+    if not hash_keys and not string_keys:
+        return []
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in hash_keys:
+            pipe.hgetall(key)
+        if string_keys:
+            pipe.mget(string_keys)
+        replies = await pipe.execute()
+
+    values: dict[str, Any] = dict(zip(hash_keys, replies[: len(hash_keys)], strict=True))
+    if string_keys:
+        for key, value in zip(string_keys, replies[-1], strict=True):
+            values[key] = _decode_string_value(value)
+
+    return [values[key] for key in keys if key in values]
+
+
+async def _fetch_page_lua(redis: Redis, keys: list[str]) -> list[Any]:
+    """Fetch values for a page of keys with a single server-side script call."""
+    script = redis.register_script(_FETCH_PAGE_LUA)
+    replies = await script(keys=keys)
+
+    results = []
+    for reply in replies:
+        key_type = reply[0]
+        if key_type == "hash":
+            flat = reply[1]
+            results.append(dict(zip(flat[::2], flat[1::2], strict=True)))
+        elif key_type == "string":
+            results.append(_decode_string_value(reply[1] if len(reply) > 1 else None))
+    return results
+
+
+def registry_key(device_class: str) -> str:
+    """Name of the Redis set holding the registered keys of a device class."""
+    return f"{REGISTRY_KEY_PREFIX}{device_class}"
 
 
 async def redis_scan(
     redis: Redis | None,
     pattern: str,
     count: int = 100,
+    use_lua: bool = False,
+    by_registry: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Scan Redis keys matching a pattern and return their values.
 
+    Each SCAN page is fetched in batch: by default with two pipelined
+    round trips (TYPE, then values grouped by type), or with
+    ``use_lua=True`` in a single script call per page. Values come back
+    in the order the keys were scanned; duplicate keys returned by SCAN
+    are fetched once.
+
+    With ``by_registry`` set to a device class (see
+    ``app.db.key_registry``), keys are read from the class's registry set
+    with one SMEMBERS instead of SCAN, narrowed to those matching
+    ``pattern``, and returned in sorted key order. Falls back to SCAN with
+    ``pattern`` while the registry is empty.
+
     Returns empty list if Redis is unavailable.
     """
     if redis is None:
         logger.warning("Redis unavailable, returning empty result for scan")
         return []
 
+    fetch_page = _fetch_page_lua if use_lua else _fetch_page_pipelined
     results = []
+    seen: set[str] = set()
     cursor = 0
 
     try:
+        if by_registry is not None:
+            members = sorted(await redis.smembers(registry_key(by_registry)))
+            if members:
+                keys = [member for member in members if fnmatchcase(member, pattern)]
+                for i in range(0, len(keys), count):
+                    results.extend(await fetch_page(redis, keys[i : i + count]))
+                return results
+
         while True:
             cursor, keys = await redis.scan(cursor=cursor, match=pattern, count=count)
 
-            for key in keys:
-                key_type = await redis.type(key)
-
-                if key_type == "hash":
-                    data = await redis.hgetall(key)
-                    results.append(data)
-                elif key_type == "string":
-                    value = await redis.get(key)
-                    try:
-                        data = json.loads(value) if value else {}
-                        results.append(data)
-                    except json.JSONDecodeError:
-                        results.append({"value": value})
+            page = [key for key in keys if key not in seen]
+            seen.update(page)
+            if page:
+                results.extend(await fetch_page(redis, page))
 
             if cursor == 0:
                 break
@@ -1,12 +1,18 @@
 """Async database session management for multiple databases."""
+import asyncio
 import logging
-from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Callable, Iterable
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from typing import Literal
 
-from sqlalchemy import text
+from sqlalchemy import URL, Executable, event, make_url, text
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
@@ -14,7 +20,13 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from app.core.config import settings
-from app.core.exceptions import DatabaseConnectionError
+from app.core.exceptions import (
+    DatabaseConnectionError,
+    QueryTimeoutError,
+    ServiceOverloadedError,
+)
+from app.db.circuit_breaker import CircuitBreaker
+from app.db.fanout import FanOutResult, UnitResult
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +37,205 @@ DatabaseName = Literal[
     "bess7", "bess8", "bess9", "bess10", "bess11", "bess12",
 ]
 
+# Query priority classes
+QueryPriority = Literal["live", "analytics"]
+
+# Per-request query budget in seconds, set by endpoint dependencies.
+# None falls back to the priority's default budget.
+query_budget_var: ContextVar[float | None] = ContextVar("query_budget", default=None)
+
+# MySQL errors for a statement stopped by MAX_EXECUTION_TIME or KILL QUERY
+_QUERY_INTERRUPTED_CODES = {1317, 3024}
+
+# Seconds the driver waits to open a MySQL connection
+CONNECT_TIMEOUT = 5
+
+# Extra time the client waits past the budget, so the server-side
+# MAX_EXECUTION_TIME abort (which keeps the connection usable) usually wins
+_DEADLINE_GRACE = 1.0
+
+
+def _init_read_only_connection(dbapi_connection, connection_record) -> None:
+    """Session setup for read-only pools, run once per new MySQL connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+        cursor.execute("SET SESSION TRANSACTION READ ONLY")
+    finally:
+        cursor.close()
+
+
+def _store_thread_id(dbapi_connection, connection_record) -> None:
+    """Remember the MySQL thread id of a new connection for KILL QUERY."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT CONNECTION_ID()")
+        connection_record.info["mysql_thread_id"] = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def _apply_max_execution_time(conn, cursor, statement, parameters, context, executemany):
+    """Add a MAX_EXECUTION_TIME optimizer hint to SELECTs run under a budget."""
+    budget_ms = context.execution_options.get("max_execution_time_ms") if context else None
+    if not budget_ms or "MAX_EXECUTION_TIME" in statement:
+        return statement, parameters
+    stripped = statement.lstrip()
+    if stripped[:6].upper() == "SELECT":
+        statement = f"SELECT /*+ MAX_EXECUTION_TIME({int(budget_ms)}) */{stripped[6:]}"
+    return statement, parameters
+
+
+def _is_query_interrupted(error: OperationalError) -> bool:
+    """True if MySQL stopped the statement because of a time budget or KILL."""
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] in _QUERY_INTERRUPTED_CODES
+
+
+@dataclass
+class _Lane:
+    """Admission state and metrics of one database."""
+
+    in_use: dict[str, int] = field(default_factory=lambda: {"live": 0, "analytics": 0})
+    waiters: dict[str, deque[asyncio.Future[None]]] = field(
+        default_factory=lambda: {"live": deque(), "analytics": deque()}
+    )
+    admitted: dict[str, int] = field(default_factory=lambda: {"live": 0, "analytics": 0})
+    shed: int = 0
+    wait_total: dict[str, float] = field(default_factory=lambda: {"live": 0.0, "analytics": 0.0})
+    wait_max: dict[str, float] = field(default_factory=lambda: {"live": 0.0, "analytics": 0.0})
+
+    @property
+    def total(self) -> int:
+        return self.in_use["live"] + self.in_use["analytics"]
+
+
+class QueryScheduler:
+    """
+    Per-database admission control with two priority classes.
+
+    Each database admits at most ``capacity`` concurrent sessions.
+    Analytics sessions may only fill ``capacity - live_reserved`` of
+    them, so live telemetry reads always have reserved slots and are
+    woken before any queued analytics. Analytics that wait longer than
+    ``analytics_wait`` seconds are shed with ``ServiceOverloadedError``
+    (503). A ``capacity`` of 0 disables admission control.
+    """
+
+    def __init__(self, capacity: int, live_reserved: int, analytics_wait: float):
+        self.capacity = capacity
+        self.live_reserved = min(live_reserved, capacity)
+        self.analytics_wait = analytics_wait
+        self._lanes: dict[str, _Lane] = {}
+
+    def _lane(self, db_name: str) -> _Lane:
+        if db_name not in self._lanes:
+            self._lanes[db_name] = _Lane()
+        return self._lanes[db_name]
+
+    def _limit(self, priority: QueryPriority) -> int:
+        if priority == "live":
+            return self.capacity
+        return self.capacity - self.live_reserved
+
+    def _can_admit(self, lane: _Lane, priority: QueryPriority) -> bool:
+        if lane.waiters["live"]:
+            return False
+        if priority == "analytics" and lane.waiters["analytics"]:
+            return False
+        return lane.total < self._limit(priority)
+
+    def _wake(self, lane: _Lane) -> None:
+        """Hand free slots to queued sessions, live first."""
+        for priority in ("live", "analytics"):
+            queue = lane.waiters[priority]
+            while queue and lane.total < self._limit(priority):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    lane.in_use[priority] += 1
+                    waiter.set_result(None)
+            if queue:
+                # Analytics never overtake queued live sessions
+                return
+
+    def _record_wait(self, lane: _Lane, priority: QueryPriority, waited: float) -> None:
+        lane.admitted[priority] += 1
+        lane.wait_total[priority] += waited
+        lane.wait_max[priority] = max(lane.wait_max[priority], waited)
+
+    async def acquire(self, db_name: str, priority: QueryPriority) -> None:
+        """Wait for a slot; analytics are shed after ``analytics_wait``."""
+        if self.capacity <= 0:
+            return
+        lane = self._lane(db_name)
+        if self._can_admit(lane, priority):
+            lane.in_use[priority] += 1
+            self._record_wait(lane, priority, 0.0)
+            return
+
+        started = time.monotonic()
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        lane.waiters[priority].append(waiter)
+        try:
+            if priority == "analytics":
+                async with asyncio.timeout(self.analytics_wait):
+                    await waiter
+            else:
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self.release(db_name, priority)
+            else:
+                waiter.cancel()
+                if waiter in lane.waiters[priority]:
+                    lane.waiters[priority].remove(waiter)
+            if isinstance(e, TimeoutError):
+                lane.shed += 1
+                raise ServiceOverloadedError(
+                    f"Database '{db_name}' is busy, please retry later"
+                ) from None
+            raise
+        self._record_wait(lane, priority, time.monotonic() - started)
+
+    def release(self, db_name: str, priority: QueryPriority) -> None:
+        """Return a slot and wake the next queued session."""
+        if self.capacity <= 0:
+            return
+        lane = self._lane(db_name)
+        lane.in_use[priority] -= 1
+        self._wake(lane)
+
+    @asynccontextmanager
+    async def slot(self, db_name: str, priority: QueryPriority) -> AsyncGenerator[None, None]:
+        """Hold a slot for the duration of the block."""
+        await self.acquire(db_name, priority)
+        try:
+            yield
+        finally:
+            self.release(db_name, priority)
+
+    def metrics(self) -> dict[str, dict]:
+        """Per-database slot usage, queue depth and wait times."""
+        metrics = {}
+        for db_name, lane in self._lanes.items():
+            metrics[db_name] = {
+                "in_use": dict(lane.in_use),
+                "queued": {p: len(q) for p, q in lane.waiters.items()},
+                "admitted": dict(lane.admitted),
+                "shed": lane.shed,
+                "avg_wait_ms": {
+                    p: round(lane.wait_total[p] / n * 1000, 2) if (n := lane.admitted[p]) else 0.0
+                    for p in lane.admitted
+                },
+                "max_wait_ms": {p: round(w * 1000, 2) for p, w in lane.wait_max.items()},
+            }
+        return {
+            "capacity": self.capacity,
+            "live_reserved": self.live_reserved,
+            "databases": metrics,
+        }
+
 
 class DatabaseManager:
     """Manages multiple async database connections with graceful error handling."""
@@ -33,6 +244,15 @@ class DatabaseManager:
         self._engines: dict[str, AsyncEngine] = {}
         self._session_factories: dict[str, async_sessionmaker[AsyncSession]] = {}
         self._connection_status: dict[str, bool] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._host_engines: dict[str, AsyncEngine] = {}
+        self._global_limiter: asyncio.Semaphore | None = None
+        self._kill_tasks: set[asyncio.Task[None]] = set()
+        self.scheduler = QueryScheduler(
+            capacity=settings.db_scheduler_capacity,
+            live_reserved=settings.db_scheduler_live_reserved,
+            analytics_wait=settings.db_scheduler_analytics_wait,
+        )
 
     def _get_database_url(self, db_name: DatabaseName) -> str:
         """Get database URL for a specific database."""
@@ -55,82 +275,364 @@ class DatabaseManager:
 
         raise ValueError(f"Unknown database: {db_name}")
 
-    def _create_engine(self, db_name: DatabaseName) -> AsyncEngine:
-        """Create an async engine for a database."""
+    def _create_engine(self, db_name: DatabaseName, read_only: bool = False) -> AsyncEngine:
+        """
+        Create an async engine for a database.
+
+        In ``per_database`` pool mode every database gets its own pool.
+        In ``per_host`` mode all databases on one MySQL server share the
+        host's engine; the returned engine is a lightweight proxy of it
+        whose ``schema_translate_map`` qualifies ORM tables with the
+        database name (raw ``text()`` SQL is not translated).
+        """
         url = self._get_database_url(db_name)
-        return create_async_engine(
-            url,
-            echo=settings.debug,
-            pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
-            pool_recycle=3600,
-            connect_args={"connect_timeout": 5},  # 5 second timeout
+        if settings.db_pool_mode == "per_host":
+            schema = make_url(url).database
+            return self._get_host_engine(url, read_only).execution_options(
+                schema_translate_map={None: schema}
+            )
+
+        if read_only:
+            return self._build_engine(
+                url, read_only, settings.db_pool_size, settings.db_max_overflow
+            )
+        return self._build_engine(
+            url, read_only, settings.db_write_pool_size, settings.db_write_max_overflow
         )
 
-    def get_engine(self, db_name: DatabaseName) -> AsyncEngine:
+    def _get_host_engine(self, url: str, read_only: bool) -> AsyncEngine:
+        """Get or create the shared engine for the MySQL server behind ``url``."""
+        # URL.set() skips None values, so clear the database on the tuple itself
+        host_url = make_url(url)._replace(database=None)
+        key = f"{host_url.render_as_string(hide_password=False)}|{'ro' if read_only else 'rw'}"
+        if key not in self._host_engines:
+            if read_only:
+                pool_size, max_overflow = settings.db_host_pool_size, settings.db_host_max_overflow
+            else:
+                pool_size, max_overflow = (
+                    settings.db_write_pool_size,
+                    settings.db_write_max_overflow,
+                )
+            self._host_engines[key] = self._build_engine(
+                host_url, read_only, pool_size, max_overflow
+            )
+        return self._host_engines[key]
+
+    def _build_engine(
+        self,
+        url: str | URL,
+        read_only: bool,
+        pool_size: int,
+        max_overflow: int,
+    ) -> AsyncEngine:
+        """
+        Build an engine with the shared pool settings.
+
+        No ``pool_pre_ping``: liveness is tracked by the per-database
+        circuit breaker from real query outcomes instead of a ping on
+        every checkout. ``pool_recycle`` stays below MySQL's
+        ``wait_timeout`` so idle connections are not reused after the
+        server has dropped them.
+
+        Read-only engines run in autocommit mode: every SELECT is its own
+        InnoDB read-only transaction, so there is no BEGIN/COMMIT/ROLLBACK
+        round trip and no snapshot is held between statements. Their
+        session settings (READ COMMITTED, READ ONLY) are applied once per
+        connection by a pool ``connect`` event.
+
+        On MySQL every connection also records its thread id (for
+        ``KILL QUERY``), and SELECTs run under a query budget get a
+        ``MAX_EXECUTION_TIME`` optimizer hint.
+        """
+        if not read_only:
+            engine = create_async_engine(
+                url,
+                echo=settings.debug,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_recycle=3600,
+                connect_args={"connect_timeout": CONNECT_TIMEOUT},
+            )
+        else:
+            engine = create_async_engine(
+                url,
+                echo=settings.debug,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_recycle=3600,
+                isolation_level="AUTOCOMMIT",
+                skip_autocommit_rollback=True,
+                pool_reset_on_return=None,
+                connect_args={"connect_timeout": CONNECT_TIMEOUT},
+            )
+
+        if engine.dialect.name == "mysql":
+            if read_only:
+                event.listen(engine.sync_engine, "connect", _init_read_only_connection)
+            event.listen(engine.sync_engine, "connect", _store_thread_id)
+            event.listen(
+                engine.sync_engine,
+                "before_cursor_execute",
+                _apply_max_execution_time,
+                retval=True,
+            )
+        return engine
+
+    @staticmethod
+    def _engine_key(db_name: DatabaseName, read_only: bool) -> str:
+        return f"{db_name}:ro" if read_only else db_name
+
+    def get_engine(self, db_name: DatabaseName, read_only: bool = False) -> AsyncEngine:
         """Get or create an engine for a database."""
-        if db_name not in self._engines:
-            self._engines[db_name] = self._create_engine(db_name)
-        return self._engines[db_name]
+        key = self._engine_key(db_name, read_only)
+        if key not in self._engines:
+            self._engines[key] = self._create_engine(db_name, read_only=read_only)
+        return self._engines[key]
 
     def get_session_factory(
-        self, db_name: DatabaseName
+        self, db_name: DatabaseName, read_only: bool = False
     ) -> async_sessionmaker[AsyncSession]:
         """Get or create a session factory for a database."""
-        if db_name not in self._session_factories:
-            engine = self.get_engine(db_name)
-            self._session_factories[db_name] = async_sessionmaker(
+        key = self._engine_key(db_name, read_only)
+        if key not in self._session_factories:
+            engine = self.get_engine(db_name, read_only=read_only)
+            self._session_factories[key] = async_sessionmaker(
                 engine,
                 class_=AsyncSession,
                 expire_on_commit=False,
                 autocommit=False,
                 autoflush=False,
             )
-        return self._session_factories[db_name]
+        return self._session_factories[key]
+
+    def get_breaker(self, db_name: DatabaseName) -> CircuitBreaker:
+        """Get or create the circuit breaker for a database."""
+        if db_name not in self._breakers:
+            self._breakers[db_name] = CircuitBreaker(
+                f"db:{db_name}",
+                failure_threshold=settings.db_breaker_failure_threshold,
+                reset_timeout=settings.db_breaker_reset_timeout,
+            )
+        return self._breakers[db_name]
+
+    async def _acquire_slots(
+        self, db_name: DatabaseName, priority: QueryPriority
+    ) -> AsyncExitStack:
+        """
+        Acquire the scheduler slot and the global slot (if capped).
+
+        Returns a stack that releases them. The global cap bounds open
+        sessions across all databases, e.g. on a shared host pool.
+        """
+        stack = AsyncExitStack()
+        try:
+            await stack.enter_async_context(self.scheduler.slot(db_name, priority))
+            if settings.db_max_concurrency > 0:
+                if self._global_limiter is None:
+                    self._global_limiter = asyncio.Semaphore(settings.db_max_concurrency)
+                await stack.enter_async_context(self._global_limiter)
+        except BaseException:
+            await stack.aclose()
+            raise
+        return stack
 
     def is_connected(self, db_name: DatabaseName) -> bool:
         """Check if database is connected."""
         return self._connection_status.get(db_name, False)
 
+    def _record_failure(self, db_name: DatabaseName, error: Exception) -> None:
+        """Record a connection-level failure for a database."""
+        self._connection_status[db_name] = False
+        self.get_breaker(db_name).record_failure()
+        logger.warning(f"Database '{db_name}' connection failed: {error}")
+
+    def _record_success(self, db_name: DatabaseName) -> None:
+        """Record a successful round trip to a database."""
+        self._connection_status[db_name] = True
+        self.get_breaker(db_name).record_success()
+
     @asynccontextmanager
     async def session(
-        self, db_name: DatabaseName, required: bool = True
+        self,
+        db_name: DatabaseName,
+        required: bool = True,
+        read_only: bool = False,
+        priority: QueryPriority = "live",
     ) -> AsyncGenerator[AsyncSession | None, None]:
         """
         Context manager for database sessions with graceful error handling.
 
+        A pooled connection is checked out before yielding, without an
+        extra ``SELECT 1`` round trip. While the database's circuit
+        breaker is open the call fails fast instead of waiting out
+        ``connect_timeout``.
+
         Args:
             db_name: Database to connect to
             required: If True, raise exception on connection failure.
                      If False, yield None and continue gracefully.
+            read_only: Use the database's read-only pool (autocommit,
+                     READ COMMITTED, READ ONLY) and skip the commit.
+            priority: Scheduling class; ``analytics`` sessions can be
+                     shed with ``ServiceOverloadedError`` when the
+                     database is saturated.
+
+        Statements run under a time budget: ``query_budget_var`` if an
+        endpoint set one, else the priority's default. MySQL aborts
+        SELECTs that exceed it (``MAX_EXECUTION_TIME``); anything still
+        running shortly after is cancelled client-side. Both surface as
+        ``QueryTimeoutError`` (504). If the request is cancelled (e.g. the
+        client disconnected) the statement is killed with ``KILL QUERY``
+        and its connection is discarded.
+
+        Failures raised by queries inside the block are always surfaced
+        as ``DatabaseConnectionError``, since the session has already
+        been handed out.
         """
-        factory = self.get_session_factory(db_name)
-        try:
-            async with factory() as session:
-                # Test connection
-                await session.execute(text("SELECT 1"))
-                self._connection_status[db_name] = True
-                try:
-                    yield session
-                    await session.commit()
-                except Exception:
-                    await session.rollback()
-                    raise
-        except OperationalError as e:
+        breaker = self.get_breaker(db_name)
+        if not breaker.allow_request():
             self._connection_status[db_name] = False
-            logger.warning(f"Database '{db_name}' connection failed: {e}")
             if required:
                 raise DatabaseConnectionError(
                     f"Database '{db_name}' is unavailable. Please try again later."
                 )
             yield None
+            return
+
+        factory = self.get_session_factory(db_name, read_only=read_only)
+        try:
+            slots = await self._acquire_slots(db_name, priority)
+        except BaseException:
+            breaker.release()
+            raise
+        budget = self._query_budget(priority)
+        async with slots, factory() as session:
+            try:
+                connection = await session.connection(
+                    execution_options=(
+                        {"max_execution_time_ms": int(budget * 1000)} if budget else None
+                    )
+                )
+            except OperationalError as e:
+                self._record_failure(db_name, e)
+                if required:
+                    raise DatabaseConnectionError(
+                        f"Database '{db_name}' is unavailable. Please try again later."
+                    ) from e
+                yield None
+                return
+            except SQLAlchemyError as e:
+                breaker.release()
+                self._connection_status[db_name] = False
+                logger.error(f"Database '{db_name}' error: {e}")
+                if required:
+                    raise DatabaseConnectionError(f"Database error: {e}") from e
+                yield None
+                return
+            except TimeoutError as e:
+                # Connect outlived a caller's timeout: treat as unreachable
+                self._record_failure(db_name, e)
+                raise
+            except BaseException:
+                # Cancelled mid-connect: free the half-open probe slot, or
+                # the breaker would refuse every request from now on
+                breaker.release()
+                raise
+
+            deadline = asyncio.timeout(budget + _DEADLINE_GRACE if budget else None)
+            try:
+                async with deadline:
+                    yield session
+                    if not read_only:
+                        await session.commit()
+            except OperationalError as e:
+                await self._safe_rollback(session)
+                if _is_query_interrupted(e):
+                    # The server answered; it is slow, not down
+                    self._record_success(db_name)
+                    raise QueryTimeoutError(
+                        f"Query on '{db_name}' exceeded its {budget}s budget"
+                    ) from e
+                self._record_failure(db_name, e)
+                raise DatabaseConnectionError(
+                    f"Database '{db_name}' is unavailable. Please try again later."
+                ) from e
+            except SQLAlchemyError as e:
+                await self._safe_rollback(session)
+                breaker.release()
+                logger.error(f"Database '{db_name}' error: {e}")
+                raise DatabaseConnectionError(f"Database error: {e}") from e
+            except Exception as e:
+                if isinstance(e, TimeoutError) and deadline.expired():
+                    await self._abort_query(db_name, connection)
+                    breaker.release()
+                    raise QueryTimeoutError(
+                        f"Query on '{db_name}' exceeded its {budget}s budget"
+                    ) from e
+                await self._safe_rollback(session)
+                breaker.release()
+                raise
+            except asyncio.CancelledError:
+                # Cancelled mid-request (e.g. client disconnect): stop the
+                # statement on the server instead of letting it run on.
+                await self._abort_query(db_name, connection)
+                breaker.release()
+                raise
+            except BaseException:
+                breaker.release()
+                raise
+            self._record_success(db_name)
+
+    @staticmethod
+    def _query_budget(priority: QueryPriority) -> float | None:
+        """Budget in seconds for the current request, or None for no limit."""
+        budget = query_budget_var.get()
+        if budget is None:
+            budget = (
+                settings.db_query_budget_live
+                if priority == "live"
+                else settings.db_query_budget_analytics
+            )
+        return budget if budget > 0 else None
+
+    async def _abort_query(self, db_name: DatabaseName, connection: AsyncConnection) -> None:
+        """
+        Discard a connection whose statement was abandoned.
+
+        The connection is invalidated so it never returns to the pool with
+        unread results, and ``KILL QUERY`` is sent for its MySQL thread in
+        the background (closing the socket alone does not stop the query).
+        """
+        thread_id = None
+        try:
+            raw = await connection.get_raw_connection()
+            thread_id = raw.info.get("mysql_thread_id")
+            await connection.invalidate()
         except SQLAlchemyError as e:
-            self._connection_status[db_name] = False
-            logger.error(f"Database '{db_name}' error: {e}")
-            if required:
-                raise DatabaseConnectionError(f"Database error: {e}")
-            yield None
+            logger.debug(f"Invalidating connection to '{db_name}' failed: {e}")
+        if thread_id is None:
+            return
+        task = asyncio.create_task(self._kill_query(db_name, thread_id))
+        self._kill_tasks.add(task)
+        task.add_done_callback(self._kill_tasks.discard)
+
+    async def _kill_query(self, db_name: DatabaseName, thread_id: int) -> None:
+        """Run KILL QUERY for a MySQL thread on a separate connection."""
+        try:
+            async with asyncio.timeout(5):
+                async with self.get_engine(db_name, read_only=True).connect() as conn:
+                    await conn.execute(text(f"KILL QUERY {int(thread_id)}"))
+            logger.info(f"Killed abandoned query on '{db_name}' (thread {thread_id})")
+        except (SQLAlchemyError, TimeoutError) as e:
+            logger.warning(f"KILL QUERY {thread_id} on '{db_name}' failed: {e}")
+
+    @staticmethod
+    async def _safe_rollback(session: AsyncSession) -> None:
+        """Roll back a session, ignoring errors from a dead connection."""
+        try:
+            await session.rollback()
+        except SQLAlchemyError:
+            pass
 
     @asynccontextmanager
     async def optional_session(
@@ -146,27 +648,91 @@ class DatabaseManager:
             yield session
 
     async def check_connection(self, db_name: DatabaseName) -> bool:
-        """Test database connection and return status."""
+        """Test database connection with an explicit probe and return status."""
         try:
-            async with self.session(db_name, required=True):
+            async with self.session(db_name, required=True, read_only=True) as session:
+                await session.execute(text("SELECT 1"))
                 return True
         except DatabaseConnectionError:
             return False
 
     async def health_check(self) -> dict[str, bool]:
-        """Check all database connections and return status dict."""
-        status = {}
-        for db_name in ["ess", "schedule", "meter", "pcs", "inverter", "baseline"]:
-            status[db_name] = await self.check_connection(db_name)
-        return status
+        """Check the core database connections concurrently and return status dict."""
+        db_names = ["ess", "schedule", "meter", "pcs", "inverter", "baseline"]
+        results = await asyncio.gather(
+            *(self.check_connection(db_name) for db_name in db_names)
+        )
+        return dict(zip(db_names, results, strict=True))
+
+    async def fan_out(
+        self,
+        statement_factory: Callable[[int], Executable],
+        bess_numbers: Iterable[int] | None = None,
+        *,
+        timeout: float | None = None,
+        concurrency: int | None = None,
+        priority: QueryPriority = "live",
+    ) -> FanOutResult:
+        """
+        Run one statement per BESS database concurrently.
+
+        Args:
+            statement_factory: Builds the statement for a BESS number
+            bess_numbers: Units to query (default: 1..``settings.bess_number``)
+            timeout: Per-database timeout in seconds
+                     (default: ``settings.db_fanout_timeout``)
+            concurrency: Max databases queried at once
+                     (default: ``settings.db_fanout_concurrency``)
+            priority: Scheduling class of the per-unit sessions
+
+        A unit that is down, errors or times out does not fail the call;
+        it is reported in ``FanOutResult.unavailable``. The whole fan-out
+        takes about as long as the slowest unit.
+        """
+        if bess_numbers is None:
+            bess_numbers = range(1, settings.bess_number + 1)
+        numbers = sorted(set(bess_numbers))
+        for number in numbers:
+            if not 1 <= number <= 12:
+                raise ValueError(f"Invalid BESS number: {number}")
+
+        timeout = timeout if timeout is not None else settings.db_fanout_timeout
+        gate = asyncio.Semaphore(concurrency or settings.db_fanout_concurrency)
+
+        async def run_unit(number: int) -> UnitResult:
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    async with asyncio.timeout(timeout):
+                        async with self.session(
+                            f"bess{number}", read_only=True, priority=priority
+                        ) as session:
+                            result = await session.execute(statement_factory(number))
+                            rows = list(result.all())
+                except TimeoutError:
+                    return UnitResult(number, error=f"Timed out after {timeout}s")
+                except (
+                    DatabaseConnectionError,
+                    QueryTimeoutError,
+                    ServiceOverloadedError,
+                ) as e:
+                    return UnitResult(number, error=e.message)
+                elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+                return UnitResult(number, rows=rows, elapsed_ms=elapsed_ms)
+
+        units = await asyncio.gather(*(run_unit(number) for number in numbers))
+        return FanOutResult(units=list(units))
 
     async def close_all(self) -> None:
         """Close all database connections."""
-        for engine in self._engines.values():
+        for engine in [*self._engines.values(), *self._host_engines.values()]:
             await engine.dispose()
         self._engines.clear()
+        self._host_engines.clear()
+        self._global_limiter = None
         self._session_factories.clear()
         self._connection_status.clear()
+        self._breakers.clear()
 
 
 # Global database manager instance
@@ -13,8 +13,16 @@ from app.core.exceptions import (
     generic_exception_handler,
     solarhub_exception_handler,
 )
+from app.db.background import background_leader
+from app.db.health import health_monitor
+from app.db.key_registry import key_registry_reconciler
 from app.db.session import db_manager
 from app.db.redis import redis_manager
+from app.services.excursions import excursion_monitor
+from app.services.rollup import rollup_updater
+from app.services.sbspm import sbspm_updater
+from app.services.settlement_store import settlement_store
+from app.services.topology import topology_prober
 
 # Configure logging
 logging.basicConfig(
@@ -31,18 +39,22 @@ async def lifespan(app: FastAPI):
     logger.info("Starting SolarHub API...")
     app.state.debug = settings.debug
 
-    # Check connections on startup (non-blocking)
-    logger.info("Checking database connections...")
-    db_status = await db_manager.health_check()
-    for db_name, connected in db_status.items():
-        status = "connected" if connected else "unavailable"
+    # Probe all connections concurrently and keep probing in the background
+    logger.info("Checking database and Redis connections...")
+    snapshot = await health_monitor.start()
+    for db_name, result in snapshot.databases.items():
+        status = "connected" if result.healthy else "unavailable"
         logger.info(f"  Database '{db_name}': {status}")
-
-    logger.info("Checking Redis connections...")
-    redis_status = await redis_manager.health_check()
-    for server, connected in redis_status.items():
-        status = "connected" if connected else "unavailable"
+    for server, result in snapshot.redis.items():
+        status = "connected" if result.healthy else "unavailable"
         logger.info(f"  Redis '{server}': {status}")
+    logger.info(f"  Health probe completed in {snapshot.duration_ms:.0f} ms")
+
+    await topology_prober.start()
+    key_registry_reconciler.start()
+    rollup_updater.start()
+    sbspm_updater.start()
+    excursion_monitor.start()
 
     logger.info("SolarHub API started successfully!")
 
@@ -50,6 +62,14 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down SolarHub API...")
+    await health_monitor.stop()
+    await topology_prober.stop()
+    await key_registry_reconciler.stop()
+    await rollup_updater.stop()
+    await sbspm_updater.stop()
+    await excursion_monitor.stop()
+    await background_leader.release()
+    settlement_store.close()
     await db_manager.close_all()
     await redis_manager.close_all()
     logger.info("SolarHub API shutdown complete.")
@@ -129,13 +149,16 @@ async def detailed_health_check():
 
     Returns status of all databases and Redis connections.
     The API can still function with some services unavailable.
+
+    Reads the snapshot published by the background health monitor;
+    no connections are probed on the request path.
     """
-    # Check database connections
-    db_status = await db_manager.health_check()
+    snapshot = await health_monitor.get_snapshot()
+
+    db_status = snapshot.database_status()
     db_healthy = any(db_status.values())  # At least one DB connected
 
-    # Check Redis connections
-    redis_status = await redis_manager.health_check()
+    redis_status = snapshot.redis_status()
     redis_healthy = any(redis_status.values())  # At least one Redis connected
 
     # Overall status
@@ -151,12 +174,21 @@ async def detailed_health_check():
             "databases": {
                 "status": "healthy" if db_healthy else "unhealthy",
                 "connections": db_status,
+                "checks": {
+                    name: result.to_dict() for name, result in snapshot.databases.items()
+                },
             },
             "redis": {
                 "status": "healthy" if redis_healthy else "unhealthy",
                 "connections": redis_status,
+                "checks": {
+                    name: result.to_dict() for name, result in snapshot.redis.items()
+                },
             },
         },
+        "scheduler": db_manager.scheduler.metrics(),
+        "checked_at": snapshot.checked_at,
+        "probe_duration_ms": snapshot.duration_ms,
         "message": (
             "All systems operational"
             if overall_status == "healthy"
@@ -180,11 +212,12 @@ async def readiness_check():
     """
     Kubernetes readiness probe endpoint.
 
-    Returns 200 if at least one database is connected.
+    Returns 200 if at least one core database is connected.
     Returns 503 if no databases are available.
+    Reads the cached health snapshot, so the probe answers immediately.
     """
-    db_status = await db_manager.health_check()
-    if any(db_status.values()):
+    snapshot = await health_monitor.get_snapshot()
+    if any(snapshot.database_status(core_only=True).values()):
         return {"status": "ready"}
 
     # Return 503 if no databases available
@@ -6,6 +6,8 @@ from .meter import MainMeter, AuxMeter
 from .pcs import PcsData
 from .inverter import Inverter
 from .baseline import BaseLine
+from .excursion import FrequencyExcursion
+from .rollup import EnergyRollupHourly, EnergyRollupDaily, RollupWatermark, SbspmHourly
 
 __all__ = [
     "User",
@@ -19,4 +21,9 @@ __all__ = [
     "PcsData",
     "Inverter",
     "BaseLine",
+    "EnergyRollupHourly",
+    "EnergyRollupDaily",
+    "RollupWatermark",
+    "SbspmHourly",
+    "FrequencyExcursion",
 ]
@@ -0,0 +1,30 @@
+"""Frequency excursion model (detected from MMAIN, see ``app.services.excursions``)."""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class FrequencyExcursion(Base):
+    """Under- or over-frequency excursion outside the deadband."""
+
+    __tablename__ = "frequency_excursions"
+    __table_args__ = (UniqueConstraint("start_time", "direction"),)
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    direction: Mapped[str] = mapped_column(String(8), nullable=False, comment="under or over")
+    start_time: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    end_time: Mapped[datetime | None] = mapped_column(
+        DateTime, nullable=True, comment="NULL while the excursion is open"
+    )
+    duration_s: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    extreme_freq: Mapped[float | None] = mapped_column(
+        Float, nullable=True, comment="Nadir (under) or peak (over) frequency in Hz"
+    )
+    peak_kw: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    energy_kwh: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0, comment="Energy delivered during the excursion"
+    )
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
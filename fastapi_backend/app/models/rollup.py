@@ -0,0 +1,109 @@
+"""Rollup models (materialized hourly/daily buckets of MMAIN and MAUX)."""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class EnergyRollupMixin:
+    """Columns shared by the hourly and daily rollup tables."""
+
+    source: Mapped[str] = mapped_column(
+        String(16),
+        primary_key=True,
+        comment="Source meter table: MMAIN or MAUX",
+    )
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime,
+        primary_key=True,
+        comment="Bucket start in local time (UTC+8)",
+    )
+
+    # Energy counters (kWh): first/last reading in the bucket and their difference
+    first_kwh_del: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_kwh_del: Mapped[float | None] = mapped_column(Float, nullable=True)
+    delta_kwh_del: Mapped[float | None] = mapped_column(
+        Float, nullable=True, comment="Energy delivered (discharge) in the bucket"
+    )
+    first_kwh_rec: Mapped[float | None] = mapped_column(Float, nullable=True)
+    last_kwh_rec: Mapped[float | None] = mapped_column(Float, nullable=True)
+    delta_kwh_rec: Mapped[float | None] = mapped_column(
+        Float, nullable=True, comment="Energy received (charge) in the bucket"
+    )
+
+    # Active power (kW)
+    min_kw: Mapped[float | None] = mapped_column(Float, nullable=True)
+    max_kw: Mapped[float | None] = mapped_column(Float, nullable=True)
+    avg_kw: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_item: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment="Highest source item folded into the bucket",
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class EnergyRollupHourly(EnergyRollupMixin, Base):
+    """Hourly energy rollup."""
+
+    __tablename__ = "energy_rollup_hourly"
+
+
+class EnergyRollupDaily(EnergyRollupMixin, Base):
+    """Daily energy rollup."""
+
+    __tablename__ = "energy_rollup_daily"
+
+
+class RollupWatermark(Base):
+    """Last source item folded into the rollups, per source table."""
+
+    __tablename__ = "energy_rollup_watermark"
+
+    source: Mapped[str] = mapped_column(String(16), primary_key=True)
+    last_item: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class SbspmHourly(Base):
+    """Hourly dReg execution rate computed from MMAIN (see ``app.services.sbspm``)."""
+
+    __tablename__ = "sbspm_hourly"
+
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime,
+        primary_key=True,
+        comment="Bucket start in local time (UTC+8)",
+    )
+    sample_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, comment="Scored samples"
+    )
+    passed: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0, comment="Samples inside the tolerance band"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    @property
+    def exec_rate(self) -> float | None:
+        """Hourly execution rate as a fraction."""
+        return self.passed / self.sample_count if self.sample_count else None
@@ -14,6 +14,7 @@ from .inverter import InverterResponse
 from .schedule import ScheduleResponse, ScheduleEvent
 from .income import DailyIncomeResponse, MonthlyIncomeResponse, ExecRateResponse
 from .analysis import PowerLossResponse, PowerIOResponse, FreqPowerResponse
+from .timeseries import TimeSeriesResponse
 from .config import SidebarInfoResponse, HeaderInfoResponse
 from .system import SystemOverviewResponse, TopologyResponse
 
@@ -51,6 +52,8 @@ __all__ = [
     "PowerLossResponse",
     "PowerIOResponse",
     "FreqPowerResponse",
+    # Time series
+    "TimeSeriesResponse",
     # Config
     "SidebarInfoResponse",
     "HeaderInfoResponse",
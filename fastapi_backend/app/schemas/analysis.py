@@ -73,6 +73,32 @@ class FreqPowerResponse(BaseModel):
     )
     baseline_data: list[list] = Field(
         default_factory=list,
-        description="[[timestamp, baseline], ...]",
+        description="[[timestamp, baseline], ...] on the frequency_data timestamps",
     )
+    resolution: str = Field("raw", description="raw samples, or bucket averages for long ranges")
+    step: int = Field(0, description="Bucket size in seconds, 0 for raw samples")
+    status: str = "success"
+
+
+class FrequencyExcursionEvent(BaseModel):
+    """Under- or over-frequency excursion."""
+
+    direction: str = Field(..., description="under or over")
+    start_time: datetime
+    end_time: datetime | None = Field(None, description="None while the excursion is open")
+    duration_s: float = 0.0
+    extreme_freq: float | None = Field(None, description="Nadir (under) or peak (over) in Hz")
+    peak_kw: float = 0.0
+    energy_kwh: float = Field(0.0, description="Energy delivered during the excursion")
+    sample_count: int = 0
+
+
+class ExcursionResponse(BaseModel):
+    """Frequency excursions starting in a time range, newest first."""
+
+    start_time: datetime
+    end_time: datetime
+    direction: str | None = None
+    source: str = Field(..., description="memory (recent index) or database")
+    data: list[FrequencyExcursionEvent] = Field(default_factory=list)
     status: str = "success"
@@ -74,4 +74,6 @@ class AuxMeterResponse(BaseModel):
 
     data: list[AuxMeterChartData] | AuxMeterSummary | None = None
     data_type: str = Field(..., description="chart or summary")
+    resolution: str | None = Field(None, description="Chart rows: raw samples or bucket averages")
+    step: int | None = Field(None, description="Chart bucket size in seconds, 0 for raw samples")
     status: str = "success"
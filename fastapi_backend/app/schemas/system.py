@@ -20,6 +20,7 @@ class TopologyNode(BaseModel):
     status: str = Field(..., description="Status: online, offline, error")
     ip: str | None = None
     port: int | None = None
+    latency_ms: float | None = Field(None, description="TCP connect round-trip time (ms)")
 
 
 class TopologyLink(BaseModel):
@@ -28,6 +29,7 @@ class TopologyLink(BaseModel):
     source: str = Field(..., description="Source node ID")
     target: str = Field(..., description="Target node ID")
     status: str = Field(..., description="Link status: connected, disconnected")
+    latency_ms: float | None = Field(None, description="Round-trip time to target (ms)")
 
 
 class TopologyResponse(BaseModel):
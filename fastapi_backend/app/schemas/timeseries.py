@@ -0,0 +1,25 @@
+"""Unified time-series query schemas."""
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class TimeSeriesResponse(BaseModel):
+    """Time-series query result (streamed; ``data`` comes last)."""
+
+    status: str = "success"
+    source: str
+    metrics: list[str]
+    aggregation: str = Field(..., description="avg, min, max, first, last or delta")
+    step: int = Field(..., description="Bucket size in seconds used, 0 for raw samples")
+    requested_step: int = Field(..., description="Step asked for; smaller when downsampled")
+    resolution: str = Field(
+        ..., description="Rows read: raw samples, bucket (GROUP BY), hourly or daily rollups"
+    )
+    start_time: datetime
+    end_time: datetime
+    columns: list[str] = Field(..., description='["time", metric, ...]')
+    data: list[list] = Field(
+        default_factory=list,
+        description="[[epoch_ms, value, ...], ...]; time is the bucket start",
+    )
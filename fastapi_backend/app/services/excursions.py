@@ -0,0 +1,291 @@
+"""Frequency excursion monitor over the raw MMAIN stream.
+
+``ExcursionMonitor`` tails MMAIN by ``item`` (watermark ``EXCURSION`` in
+``energy_rollup_watermark``) every ``excursion_poll_interval`` seconds,
+runs each micro-batch through ``app.analytics.excursions`` and:
+
+- upserts the excursions it touched into ``frequency_excursions`` (Meter
+  DB), keyed by start time and direction, so an open excursion is
+  rewritten until it ends;
+- keeps the most recent ones in an in-memory ``ExcursionIndex`` for the
+  ``/analysis/excursions`` endpoint.
+
+The detector and index live in one process: in the server the monitor
+runs in the ``background_leader`` process only, and other workers serve
+``/analysis/excursions`` from the table. Each batch is detected, stored
+and the watermark advanced in one transaction holding the watermark row
+(``app.services.rollup.lock_watermark``). Whenever the watermark is not
+where the detector stopped (first run, failed commit, leadership moved),
+the index is reloaded from the table and an excursion left open is
+resumed. Without a watermark the monitor starts at the newest MMAIN row
+instead of replaying history.
+
+Usage (from fastapi_backend/):
+    python -m app.services.excursions create-tables
+    python -m app.services.excursions update
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analytics.excursions import Direction, Excursion, ExcursionDetector, ExcursionIndex
+from app.core.config import settings
+from app.db.background import RequiredTables, background_leader
+from app.db.base import Base
+from app.db.columnar import fetch_columns
+from app.db.session import DatabaseManager, db_manager
+from app.models.excursion import FrequencyExcursion
+from app.models.meter import MainMeter
+from app.models.rollup import RollupWatermark
+from app.services.rollup import lock_watermark, set_watermark
+from app.utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_SOURCE = "EXCURSION"
+
+_SAMPLE_COLUMNS = [MainMeter.item, MainMeter.EventTime, MainMeter.Freq, MainMeter.KW_tot]
+
+
+def default_detector() -> ExcursionDetector:
+    """Detector configured from settings."""
+    return ExcursionDetector(
+        enter_hz=settings.excursion_enter_hz,
+        exit_hz=settings.excursion_exit_hz,
+        max_gap_s=settings.excursion_max_gap,
+    )
+
+
+def from_row(row: FrequencyExcursion) -> Excursion:
+    """Excursion from a ``frequency_excursions`` row."""
+    return Excursion(
+        direction=row.direction,
+        start=row.start_time,
+        end=row.end_time,
+        last_sample=row.start_time + timedelta(seconds=row.duration_s),
+        extreme_freq=row.extreme_freq if row.extreme_freq is not None else float("nan"),
+        peak_kw=row.peak_kw,
+        energy_kwh=row.energy_kwh,
+        sample_count=row.sample_count,
+    )
+
+
+def _values(excursion: Excursion) -> dict:
+    extreme = excursion.extreme_freq
+    return {
+        "direction": excursion.direction,
+        "start_time": excursion.start,
+        "end_time": excursion.end,
+        "duration_s": excursion.duration_s,
+        "extreme_freq": None if extreme != extreme else extreme,  # NaN -> NULL
+        "peak_kw": excursion.peak_kw,
+        "energy_kwh": excursion.energy_kwh,
+        "sample_count": excursion.sample_count,
+    }
+
+
+async def _upsert(session: AsyncSession, excursions: list[Excursion]) -> None:
+    """Insert or update excursions by (start_time, direction)."""
+    if not excursions:
+        return
+    statement = insert(FrequencyExcursion).values([_values(e) for e in excursions])
+    await session.execute(
+        statement.on_duplicate_key_update(
+            end_time=statement.inserted.end_time,
+            duration_s=statement.inserted.duration_s,
+            extreme_freq=statement.inserted.extreme_freq,
+            peak_kw=statement.inserted.peak_kw,
+            energy_kwh=statement.inserted.energy_kwh,
+            sample_count=statement.inserted.sample_count,
+        )
+    )
+
+
+async def query_excursions(
+    session: AsyncSession,
+    start: datetime,
+    end: datetime,
+    direction: Direction | None = None,
+    limit: int = 100,
+) -> list[Excursion]:
+    """Excursions starting in ``[start, end)`` (UTC) from the table, newest first."""
+    statement = (
+        select(FrequencyExcursion)
+        .where(FrequencyExcursion.start_time >= start, FrequencyExcursion.start_time < end)
+        .order_by(FrequencyExcursion.start_time.desc())
+        .limit(limit)
+    )
+    if direction is not None:
+        statement = statement.where(FrequencyExcursion.direction == direction)
+    rows = (await session.scalars(statement)).all()
+    return [from_row(row) for row in rows]
+
+
+class ExcursionMonitor:
+    """Streaming excursion detection stage over new MMAIN rows."""
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        interval: float | None = None,
+        batch_size: int | None = None,
+        index_size: int | None = None,
+    ):
+        self._db = db
+        self.interval = interval if interval is not None else settings.excursion_poll_interval
+        self.batch_size = batch_size if batch_size is not None else settings.excursion_batch_size
+        self.index_size = index_size if index_size is not None else settings.excursion_index_size
+        self.index = ExcursionIndex(self.index_size)
+        self._detector: ExcursionDetector | None = None
+        # Last item the detector has consumed in a committed batch
+        self._position: int | None = None
+        self._lock = asyncio.Lock()
+        self._tables = RequiredTables(
+            db,
+            "meter",
+            [FrequencyExcursion.__tablename__, RollupWatermark.__tablename__],
+            job="Excursion monitor",
+            hint="python -m app.services.excursions create-tables",
+        )
+        self._task = PeriodicTask("excursions", self.interval, self.update_all, gate=self._can_run)
+
+    async def _can_run(self) -> bool:
+        """Run in the leader process only, once the tables exist."""
+        if not await background_leader.acquire():
+            # Another process writes the table; serve queries from it
+            self._detector = None
+            return False
+        return await self._tables.ready()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the in-memory index reflects the table."""
+        return self._detector is not None
+
+    async def _warm_up(self, session: AsyncSession) -> None:
+        """Load the index from the table and resume an excursion left open."""
+        rows = (
+            await session.scalars(
+                select(FrequencyExcursion)
+                .order_by(FrequencyExcursion.start_time.desc())
+                .limit(self.index_size + 1)  # One past the index marks its coverage
+            )
+        ).all()
+        index = ExcursionIndex(self.index_size)
+        for row in reversed(rows):
+            index.upsert(from_row(row))
+
+        detector = default_detector()
+        open_rows = [row for row in rows if row.end_time is None]
+        if open_rows:
+            detector.resume(from_row(open_rows[0]))
+        self.index = index
+        self._detector = detector
+
+    async def update_batch(self) -> int:
+        """Detect over one batch of rows past the watermark. Returns the rows consumed."""
+        async with self._db.session("meter", priority="analytics") as session:
+            watermark = await lock_watermark(session, WATERMARK_SOURCE)
+            if watermark is None:
+                # First run: start at the live edge
+                watermark = await session.scalar(select(func.max(MainMeter.item))) or 0
+                await set_watermark(session, WATERMARK_SOURCE, watermark)
+            if self._detector is None or self._position != watermark:
+                await self._warm_up(session)
+            samples = await fetch_columns(
+                session,
+                select(*_SAMPLE_COLUMNS)
+                .where(MainMeter.item > watermark, MainMeter.EventTime.is_not(None))
+                .order_by(MainMeter.item)
+                .limit(self.batch_size),
+            )
+            if len(samples) == 0:
+                self._position = watermark
+                return 0
+
+            # The detector runs ahead of the watermark until the commit
+            self._position = None
+            touched = self._detector.update(
+                samples["EventTime"], samples["Freq"], samples["KW_tot"]
+            )
+            last_item = int(samples["item"].max())
+            await _upsert(session, touched)
+            await set_watermark(session, WATERMARK_SOURCE, last_item)
+        self._position = last_item
+        for excursion in touched:
+            self.index.upsert(excursion)
+            if not excursion.is_open:
+                logger.info(
+                    f"{excursion.direction}-frequency excursion {excursion.start} - "
+                    f"{excursion.end}: extreme {excursion.extreme_freq:.3f} Hz, "
+                    f"{excursion.energy_kwh:.2f} kWh"
+                )
+        return len(samples)
+
+    async def update_all(self) -> int:
+        """Catch up with MMAIN."""
+        async with self._lock:
+            total = 0
+            while True:
+                count = await self.update_batch()
+                total += count
+                if count < self.batch_size:
+                    break
+            return total
+
+    def query(
+        self,
+        start: datetime,
+        end: datetime,
+        direction: Direction | None = None,
+        limit: int = 100,
+    ) -> list[Excursion] | None:
+        """Excursions from the index, or None when it does not cover ``start``."""
+        if not self.ready or not self.index.covers(start):
+            return None
+        return self.index.query(start, end, direction)[:limit]
+
+    def start(self) -> None:
+        """Start background detection (first pass runs immediately)."""
+        self._task.start()
+
+    async def stop(self) -> None:
+        """Stop background detection."""
+        await self._task.stop()
+
+
+async def create_tables(db: DatabaseManager) -> None:
+    """Create ``frequency_excursions`` (and the shared watermark table) if missing."""
+    tables = [FrequencyExcursion.__table__, RollupWatermark.__table__]
+    async with db.get_engine("meter").begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+
+# Global excursion monitor instance
+excursion_monitor = ExcursionMonitor(db_manager)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Detect frequency excursions in MMAIN")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create-tables", help="Create the frequency_excursions table")
+    commands.add_parser("update", help="Detect over new rows past the watermark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        if args.command == "create-tables":
+            await create_tables(db_manager)
+        else:
+            print(f"{await excursion_monitor.update_all()} rows processed")
+    finally:
+        await db_manager.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
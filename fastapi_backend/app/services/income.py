@@ -0,0 +1,212 @@
+"""Income settlement over schedule events and meter telemetry.
+
+Loads the schedule events for a range of local hours, scores the won
+events against their mode's response curve with
+``app.analytics.scoring.score_events`` (MMAIN ``Freq``/``KW_tot`` at
+1 s), then settles the hours with ``app.analytics.settlement.settle``
+using each event's score as its execution rate. Telemetry is read for
+the event windows only, in batches of at most ``query_max_raw_rows``
+expected rows.
+
+``settle_days`` serves closed hours from the write-once settlement store
+(``app.services.settlement_store``) and only queries the databases for
+the runs of uncached hours, which is usually just the open hour.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from sqlalchemy import and_, or_, select
+
+from app.analytics.scoring import MODE_RESPONSES, EventWindows, ModeResponse, score_events
+from app.analytics.settlement import HOURS_PER_DAY, Settlement, hour_offsets, settle
+from app.core.config import settings
+from app.db.columnar import ColumnBatch, StreamingSession, fetch_columns, time_series_select
+from app.models.meter import MainMeter
+from app.models.schedule import ScheduleEvent
+from app.services.settlement_store import SettlementStore, settlement_store
+from app.services.timeseries import SOURCES
+from app.utils.timezone import LOCAL_OFFSET, now_local
+
+# MMAIN stores execution rates as rate * 100
+EXEC_RATE_SCALE = 0.01
+
+# Event windows ORed into one telemetry query at most
+MAX_WINDOWS_PER_QUERY = 200
+
+_HOUR = timedelta(hours=1)
+
+
+async def settle_hours(
+    schedule_db: StreamingSession,
+    meter_db: StreamingSession,
+    start: datetime,
+    hours: int,
+) -> Settlement:
+    """Settle ``hours`` hours from the local hour ``start`` straight from the databases."""
+    start_utc = start - LOCAL_OFFSET
+    end_utc = start_utc + hours * _HOUR
+
+    events = await fetch_columns(
+        schedule_db,
+        time_series_select(
+            ScheduleEvent.time_start,
+            ScheduleEvent.time_end,
+            ScheduleEvent.mode,
+            ScheduleEvent.quote_capacity,
+            ScheduleEvent.power,
+            ScheduleEvent.price,
+            ScheduleEvent.is_get,
+            ScheduleEvent.interrupt,
+            ScheduleEvent.quote_code,
+            start=start_utc,
+            end=end_utc,
+        ),
+    )
+    event_hours = hour_offsets(events["time_start"], start_utc)
+    won = np.flatnonzero(events["is_get"].astype(bool))
+    scores = await score_won_events(meter_db, events, won)
+
+    return settle(
+        start,
+        hours,
+        event_hours=event_hours,
+        quote_capacity=events["quote_capacity"],
+        price=events["price"],
+        is_get=events["is_get"],
+        interrupt=events["interrupt"],
+        quote_code=events["quote_code"],
+        rate_hours=event_hours[won],
+        exec_rate=scores,
+    )
+
+
+def _mode_responses() -> dict[str, ModeResponse]:
+    dreg = ModeResponse(settings.dreg_deadband_hz, settings.dreg_full_response_hz)
+    return {**MODE_RESPONSES, "dreg": dreg, "scan": dreg, "test_mode": dreg}
+
+
+def _batches(windows: EventWindows, max_rows: int) -> list[slice]:
+    """Consecutive events whose windows hold at most ``max_rows`` samples together."""
+    seconds = (windows.end - windows.start) / np.timedelta64(1, "s")
+    rows = np.ceil(np.maximum(seconds, 0) / SOURCES["MMAIN"].cadence_s)
+    batches: list[slice] = []
+    first, total = 0, 0.0
+    for i, count in enumerate(rows.tolist()):
+        if i > first and (total + count > max_rows or i - first >= MAX_WINDOWS_PER_QUERY):
+            batches.append(slice(first, i))
+            first, total = i, 0.0
+        total += count
+    if len(rows):
+        batches.append(slice(first, len(rows)))
+    return batches
+
+
+async def score_won_events(
+    meter_db: StreamingSession, events: ColumnBatch, won: np.ndarray
+) -> np.ndarray:
+    """
+    Score the events at ``won`` against MMAIN telemetry over their windows.
+
+    Only samples inside the windows are read, one query per batch of
+    events. Returns each event's score (NaN without samples).
+    """
+    start = events["time_start"][won]
+    end = events["time_end"][won]
+    end = np.where(np.isnat(end), start + np.timedelta64(1, "h"), end)
+    windows = EventWindows(
+        start=start,
+        end=end,
+        mode=events["mode"][won],
+        capacity=events["quote_capacity"][won],
+        power=events["power"][won],
+    )
+
+    scores = np.full(len(windows), np.nan)
+    for batch in _batches(windows, settings.query_max_raw_rows):
+        ranges = [
+            and_(MainMeter.EventTime >= window_start, MainMeter.EventTime < window_end)
+            for window_start, window_end in zip(
+                windows.start[batch].astype(datetime),
+                windows.end[batch].astype(datetime),
+                strict=True,
+            )
+        ]
+        meter = await fetch_columns(
+            meter_db,
+            select(MainMeter.EventTime, MainMeter.Freq, MainMeter.KW_tot)
+            .where(or_(*ranges))
+            .order_by(MainMeter.EventTime),
+        )
+        scores[batch] = score_events(
+            meter["EventTime"],
+            meter["Freq"],
+            meter["KW_tot"],
+            EventWindows(
+                start=windows.start[batch],
+                end=windows.end[batch],
+                mode=windows.mode[batch],
+                capacity=windows.capacity[batch],
+                power=windows.power[batch],
+            ),
+            tolerance=settings.dreg_tolerance,
+            responses=_mode_responses(),
+        ).score
+    return scores
+
+
+def closed_hours(start: datetime, hours: int, now: datetime | None = None) -> int:
+    """How many of the ``hours`` hours from ``start`` are closed (final)."""
+    now = now or now_local().replace(tzinfo=None)
+    cutoff = now - timedelta(seconds=settings.settlement_close_delay)
+    closed = (cutoff - start) // _HOUR
+    return max(0, min(hours, closed))
+
+
+def _is_final(row: tuple[str, tuple[float, ...]]) -> bool:
+    """Awarded hours without meter data may still be backfilled; don't freeze them."""
+    awarded, _, exec_rate = row[1][:3]
+    return not (awarded and np.isnan(exec_rate))
+
+
+def _runs(indices: list[int]) -> list[tuple[int, int]]:
+    """``(first, count)`` of each run of consecutive ``indices``."""
+    runs: list[tuple[int, int]] = []
+    for i in indices:
+        if runs and runs[-1][0] + runs[-1][1] == i:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((i, 1))
+    return runs
+
+
+async def settle_days(
+    schedule_db: StreamingSession,
+    meter_db: StreamingSession,
+    first_day: date,
+    days: int,
+    store: SettlementStore | None = None,
+) -> Settlement:
+    """Settle ``days`` local days starting at ``first_day``, reusing closed hours."""
+    start = datetime.combine(first_day, datetime.min.time())
+    hours = days * HOURS_PER_DAY
+    if not settings.settlement_cache_enabled:
+        return await settle_hours(schedule_db, meter_db, start, hours)
+
+    store = store or settlement_store
+    closed = closed_hours(start, hours)
+    grid = [start + i * _HOUR for i in range(hours)]
+    cached = await store.get(grid[:closed]) if closed else {}
+
+    # Uncached hours (the open ones included) are settled in contiguous runs,
+    # so an hour that cannot be stored yet only costs its own run
+    rows = [cached.get(hour) for hour in grid]
+    fresh = {}
+    for first, count in _runs([i for i, hour in enumerate(grid) if hour not in cached]):
+        live = await settle_hours(schedule_db, meter_db, grid[first], count)
+        for i, row in enumerate(live.rows(), first):
+            rows[i] = row
+            if i < closed and _is_final(row):
+                fresh[grid[i]] = row
+    await store.put(fresh)
+
+    return Settlement.from_rows(start, rows)
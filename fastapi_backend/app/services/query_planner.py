@@ -0,0 +1,172 @@
+"""Cost guardrails for time-series queries.
+
+Before a time-series query runs, ``plan`` estimates its cost from the
+range and the source's sample cadence (``TimeSeriesSource.cadence_s``):
+
+- rows returned must fit the point budget. An oversized ``raw`` or
+  fine-grained request is switched to the smallest step from
+  ``STEP_LADDER`` that fits, or rejected when the caller asked for
+  the exact step;
+- rows scanned by a ``GROUP BY`` must stay under
+  ``settings.query_max_scan_rows``. Beyond that the step is raised to
+  whole hours when the energy rollups can answer, otherwise the request
+  is rejected with ``QueryTooLargeError`` (413).
+
+With ``settings.query_explain`` the scan estimate is checked against
+MySQL's own (``EXPLAIN``), which also catches ranges that cannot use an
+index. The plan is reported to clients (``resolution``/``step``) so a
+chart can say what it shows.
+"""
+import math
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.dialects import mysql
+
+from app.core.config import settings
+from app.core.exceptions import QueryTooLargeError
+from app.db.columnar import StreamingSession, time_series_select
+from app.db.session import db_manager
+from app.services.timeseries import (
+    DAY,
+    HOUR,
+    Resolution,
+    TimeSeriesQuery,
+    aggregate_select,
+    plan_query,
+)
+
+# Bucket sizes (seconds) that divide a day, then whole days
+STEP_LADDER = (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200)
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """How a time-series query will run."""
+
+    query: TimeSeriesQuery  # With the step actually used
+    resolution: Resolution
+    requested_step: int
+    scan_rows: int  # Estimated rows read
+    points: int  # Estimated rows returned
+
+    @property
+    def downsampled(self) -> bool:
+        return self.query.step != self.requested_step
+
+
+def estimate_rows(query: TimeSeriesQuery) -> int:
+    """Raw rows in the query range at the source's cadence."""
+    return math.ceil(query.duration_s / query.source.cadence_s)
+
+
+def estimate_points(query: TimeSeriesQuery, resolution: Resolution | None = None) -> int:
+    """Rows the query returns: samples for ``raw``, otherwise buckets."""
+    rows = estimate_rows(query)
+    if (resolution or plan_query(query)) == "raw":
+        return rows
+    return min(rows, math.ceil(query.duration_s / query.step))
+
+
+def _scan_rows(query: TimeSeriesQuery, resolution: Resolution) -> int:
+    if resolution == "hourly":
+        return math.ceil(query.duration_s / HOUR)
+    if resolution == "daily":
+        return math.ceil(query.duration_s / DAY)
+    return estimate_rows(query)
+
+
+def fit_step(duration_s: float, budget: int, minimum: int = 1) -> int:
+    """Smallest ladder step >= ``minimum`` giving at most ``budget`` buckets."""
+    needed = max(duration_s / max(budget, 1), minimum)
+    for step in STEP_LADDER:
+        if step >= needed:
+            return step
+    return math.ceil(needed / DAY) * DAY
+
+
+def _hourly(query: TimeSeriesQuery) -> TimeSeriesQuery | None:
+    """The query at a whole-hour step, if the rollups can answer it."""
+    step = max(HOUR, math.ceil(query.step / HOUR) * HOUR)
+    coarse = query.with_step(step)
+    return coarse if plan_query(coarse) in ("hourly", "daily") else None
+
+
+async def explain_rows(db: StreamingSession, query: TimeSeriesQuery) -> int | None:
+    """MySQL's estimate of the rows a ``raw``/``bucket`` query examines."""
+    if query.step == 0:
+        columns = (query.source.column(m) for m in query.metrics)
+        statement = time_series_select(
+            query.source.time, *columns, start=query.start, end=query.end
+        )
+    else:
+        statement = aggregate_select(query)
+    # text() SQL is not schema-translated: render per_host schemas into it
+    engine = db_manager.get_engine(query.source.db, read_only=True)
+    translate = engine.get_execution_options().get("schema_translate_map")
+    sql = statement.compile(
+        dialect=mysql.dialect(),
+        schema_translate_map=translate,
+        render_schema_translate=translate is not None,
+        compile_kwargs={"literal_binds": True},
+    )
+    result = await db.execute(text(f"EXPLAIN {sql}"))
+    rows = [row.get("rows") for row in result.mappings().all()]
+    return max((int(r) for r in rows if r is not None), default=None)
+
+
+async def plan(
+    query: TimeSeriesQuery,
+    *,
+    budget: int | None = None,
+    downsample: bool = True,
+    db: StreamingSession | None = None,
+) -> QueryPlan:
+    """
+    Fit ``query`` into the point budget and the scan limit.
+
+    Args:
+        query: Validated query as requested
+        budget: Max rows returned, defaults to ``settings.query_point_budget``
+        downsample: Coarsen the step when over budget; False rejects instead
+        db: Session on the source database, used for ``EXPLAIN`` when enabled
+
+    Raises:
+        QueryTooLargeError: The query cannot be made to fit
+    """
+    budget = budget or settings.query_point_budget
+    requested = query.step
+
+    points = estimate_points(query)
+    if points > budget:
+        if not downsample:
+            raise QueryTooLargeError(
+                f"About {points:,} points requested, the limit is {budget:,}; "
+                f"use a step of at least {fit_step(query.duration_s, budget)} s"
+            )
+        query = query.with_step(fit_step(query.duration_s, budget, minimum=query.step))
+
+    resolution = plan_query(query)
+    scan = _scan_rows(query, resolution)
+    if settings.query_explain and db is not None and resolution in ("raw", "bucket"):
+        scan = await explain_rows(db, query) or scan
+
+    if scan > settings.query_max_scan_rows:
+        coarse = _hourly(query) if downsample else None
+        if coarse is None:
+            raise QueryTooLargeError(
+                f"The range covers about {scan:,} rows of {query.source.name}, "
+                f"the limit is {settings.query_max_scan_rows:,}; "
+                "use a shorter range, or whole-hour steps and bounds where rollups exist"
+            )
+        query = coarse
+        resolution = plan_query(query)
+        scan = _scan_rows(query, resolution)
+
+    return QueryPlan(
+        query=query,
+        resolution=resolution,
+        requested_step=requested,
+        scan_rows=scan,
+        points=estimate_points(query, resolution),
+    )
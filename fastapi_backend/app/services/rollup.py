@@ -0,0 +1,569 @@
+"""Materialized hourly/daily energy rollups for MMAIN and MAUX.
+
+Charge/discharge energy comes from the ``KWH_del``/``KWH_rec`` counters
+of the 1-second meter tables; a month of raw rows is ~2.6M per meter.
+This module keeps hourly and daily bucket tables in the Meter database
+(see ``app/models/rollup.py``) so analytics read 24-31 rows instead:
+
+- ``RollupUpdater`` tails new rows by the ``item`` watermark, folds them
+  into the hourly buckets and recomputes the affected days.
+- ``backfill`` rebuilds a date range from the raw rows.
+- ``read_energy`` answers a range from the rollups where they are
+  complete and from the raw rows past the watermark.
+
+Folding is additive, so each batch is read, folded and the watermark
+advanced in one transaction that holds the watermark row
+(``lock_watermark``): a concurrent or retried pass waits, then starts
+after the rows already folded. In the server the updater runs in the
+``background_leader`` process only, once the tables exist.
+
+Buckets are keyed by their start in local time (UTC+8, see
+``app/utils/timezone.py``); the raw tables store UTC.
+
+Usage (from fastapi_backend/):
+    python -m app.services.rollup create-tables
+    python -m app.services.rollup update
+    python -m app.services.rollup backfill --start 2024-01-01 --end 2024-02-01
+"""
+import argparse
+import asyncio
+import logging
+from dataclasses import asdict, dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Any, Literal
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.exceptions import DataNotReadyError
+from app.db.background import RequiredTables, background_leader
+from app.db.base import Base
+from app.db.columnar import ColumnBatch, fetch_columns
+from app.db.session import DatabaseManager, db_manager
+from app.models.meter import AuxMeter, MainMeter
+from app.models.rollup import (
+    EnergyRollupDaily,
+    EnergyRollupHourly,
+    EnergyRollupMixin,
+    RollupWatermark,
+)
+from app.services import timeseries
+from app.utils.periodic import PeriodicTask
+from app.utils.periods import local_bounds, period_filter, utc_bounds
+from app.utils.timezone import LOCAL_OFFSET
+
+logger = logging.getLogger(__name__)
+
+RollupSource = Literal["MMAIN", "MAUX"]
+SOURCES: dict[str, type[MainMeter] | type[AuxMeter]] = {"MMAIN": MainMeter, "MAUX": AuxMeter}
+
+_LOCAL_OFFSET_NP = np.timedelta64(int(LOCAL_OFFSET.total_seconds()), "s")
+
+
+def _first(values: np.ndarray) -> float | None:
+    valid = values[~np.isnan(values)]
+    return float(valid[0]) if len(valid) else None
+
+
+def _last(values: np.ndarray) -> float | None:
+    valid = values[~np.isnan(values)]
+    return float(valid[-1]) if len(valid) else None
+
+
+def _delta(first: float | None, last: float | None) -> float | None:
+    return None if first is None or last is None else last - first
+
+
+@dataclass
+class Bucket:
+    """Aggregates of one source over one local-time bucket."""
+
+    source: str
+    bucket_start: datetime
+    first_kwh_del: float | None = None
+    last_kwh_del: float | None = None
+    first_kwh_rec: float | None = None
+    last_kwh_rec: float | None = None
+    min_kw: float | None = None
+    max_kw: float | None = None
+    avg_kw: float | None = None
+    sample_count: int = 0
+    last_item: int = 0
+
+    @property
+    def delta_kwh_del(self) -> float | None:
+        return _delta(self.first_kwh_del, self.last_kwh_del)
+
+    @property
+    def delta_kwh_rec(self) -> float | None:
+        return _delta(self.first_kwh_rec, self.last_kwh_rec)
+
+    def merge(self, later: "Bucket") -> "Bucket":
+        """Fold in samples that come after this bucket's samples."""
+        counts = [(b.avg_kw, b.sample_count) for b in (self, later) if b.avg_kw is not None]
+        total = sum(n for _, n in counts)
+        return replace(
+            self,
+            first_kwh_del=_coalesce(self.first_kwh_del, later.first_kwh_del),
+            last_kwh_del=_coalesce(later.last_kwh_del, self.last_kwh_del),
+            first_kwh_rec=_coalesce(self.first_kwh_rec, later.first_kwh_rec),
+            last_kwh_rec=_coalesce(later.last_kwh_rec, self.last_kwh_rec),
+            min_kw=_fold(min, self.min_kw, later.min_kw),
+            max_kw=_fold(max, self.max_kw, later.max_kw),
+            avg_kw=sum(avg * n for avg, n in counts) / total if total else None,
+            sample_count=self.sample_count + later.sample_count,
+            last_item=max(self.last_item, later.last_item),
+        )
+
+    def with_start(self, bucket_start: datetime) -> "Bucket":
+        return replace(self, bucket_start=bucket_start)
+
+    def to_row(self) -> dict[str, Any]:
+        """Column values for the rollup tables."""
+        return {
+            **asdict(self),
+            "delta_kwh_del": self.delta_kwh_del,
+            "delta_kwh_rec": self.delta_kwh_rec,
+        }
+
+    @classmethod
+    def from_model(cls, row: EnergyRollupMixin) -> "Bucket":
+        return cls(
+            source=row.source,
+            bucket_start=row.bucket_start,
+            first_kwh_del=row.first_kwh_del,
+            last_kwh_del=row.last_kwh_del,
+            first_kwh_rec=row.first_kwh_rec,
+            last_kwh_rec=row.last_kwh_rec,
+            min_kw=row.min_kw,
+            max_kw=row.max_kw,
+            avg_kw=row.avg_kw,
+            sample_count=row.sample_count,
+            last_item=row.last_item,
+        )
+
+
+def _coalesce(a: float | None, b: float | None) -> float | None:
+    return a if a is not None else b
+
+
+def _fold(func, a: float | None, b: float | None) -> float | None:
+    if a is None or b is None:
+        return _coalesce(a, b)
+    return func(a, b)
+
+
+def bucket_samples(
+    source: str, samples: ColumnBatch, unit: Literal["h", "D"] = "h"
+) -> list[Bucket]:
+    """
+    Aggregate raw meter samples into local-time buckets.
+
+    ``samples`` holds ``item``, ``EventTime`` (UTC), ``KW_tot``,
+    ``KWH_del`` and optionally ``KWH_rec``. Rows without a timestamp are
+    skipped. Buckets come back in time order.
+    """
+    times = samples["EventTime"]
+    keep = ~np.isnat(times)
+    if not keep.any():
+        return []
+
+    keys = (times[keep] + _LOCAL_OFFSET_NP).astype(f"datetime64[{unit}]")
+    order = np.lexsort((times[keep], keys))
+    keys = keys[order]
+    items = samples["item"][keep][order]
+    kw = samples["KW_tot"][keep][order].astype(np.float64)
+    kwh_del = samples["KWH_del"][keep][order].astype(np.float64)
+    kwh_rec = (
+        samples["KWH_rec"][keep][order].astype(np.float64)
+        if "KWH_rec" in samples
+        else np.full(len(keys), np.nan)
+    )
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+
+    buckets = []
+    for start, end in zip(starts, ends, strict=True):
+        group_kw = kw[start:end]
+        valid_kw = group_kw[~np.isnan(group_kw)]
+        buckets.append(
+            Bucket(
+                source=source,
+                bucket_start=keys[start].astype("datetime64[s]").astype(datetime),
+                first_kwh_del=_first(kwh_del[start:end]),
+                last_kwh_del=_last(kwh_del[start:end]),
+                first_kwh_rec=_first(kwh_rec[start:end]),
+                last_kwh_rec=_last(kwh_rec[start:end]),
+                min_kw=float(valid_kw.min()) if len(valid_kw) else None,
+                max_kw=float(valid_kw.max()) if len(valid_kw) else None,
+                avg_kw=float(valid_kw.mean()) if len(valid_kw) else None,
+                sample_count=int(end - start),
+                last_item=int(items[start:end].max()),
+            )
+        )
+    return buckets
+
+
+def combine(buckets: list[Bucket], bucket_start: datetime) -> Bucket:
+    """Merge consecutive buckets (e.g. the hours of a day) into one."""
+    combined = buckets[0].with_start(bucket_start)
+    for bucket in buckets[1:]:
+        combined = combined.merge(bucket)
+    return combined
+
+
+def local_day_bounds_utc(day: date) -> tuple[datetime, datetime]:
+    """Naive UTC range ``[start, end)`` covering one local (UTC+8) day."""
+    return utc_bounds(day, "day")
+
+
+def _sample_columns(model: type[MainMeter] | type[AuxMeter]) -> list[Any]:
+    columns = [model.item, model.EventTime, model.KW_tot, model.KWH_del]
+    if hasattr(model, "KWH_rec"):
+        columns.append(model.KWH_rec)
+    return columns
+
+
+async def lock_watermark(session: AsyncSession, source: str) -> int | None:
+    """
+    Read a watermark with ``SELECT ... FOR UPDATE``.
+
+    The row stays locked until ``session`` commits, so passes that fold
+    rows and advance the same watermark run one after the other, each
+    starting where the previous one committed.
+    """
+    return await session.scalar(
+        select(RollupWatermark.last_item)
+        .where(RollupWatermark.source == source)
+        .with_for_update()
+    )
+
+
+async def set_watermark(session: AsyncSession, source: str, last_item: int) -> None:
+    """Store a watermark (in the transaction that folded the rows up to it)."""
+    await session.execute(
+        insert(RollupWatermark)
+        .values(source=source, last_item=last_item)
+        .on_duplicate_key_update(last_item=last_item)
+    )
+
+
+async def _upsert(
+    session: AsyncSession, table: type[EnergyRollupMixin], buckets: list[Bucket]
+) -> None:
+    if not buckets:
+        return
+    statement = insert(table).values([bucket.to_row() for bucket in buckets])
+    updates = {
+        name: statement.inserted[name]
+        for name in buckets[0].to_row()
+        if name not in ("source", "bucket_start")
+    }
+    await session.execute(statement.on_duplicate_key_update(**updates))
+
+
+async def _load(
+    session: AsyncSession,
+    table: type[EnergyRollupMixin],
+    source: str,
+    start: datetime,
+    end: datetime,
+) -> list[Bucket]:
+    rows = await session.scalars(
+        select(table)
+        .where(table.source == source, table.bucket_start >= start, table.bucket_start < end)
+        .order_by(table.bucket_start)
+    )
+    return [Bucket.from_model(row) for row in rows]
+
+
+async def _refresh_days(session: AsyncSession, source: str, days: set[date]) -> None:
+    """Recompute daily buckets from their hourly buckets."""
+    daily = []
+    for day in sorted(days):
+        start, end = local_bounds(day)
+        hours = await _load(session, EnergyRollupHourly, source, start, end)
+        if hours:
+            daily.append(combine(hours, start))
+    await _upsert(session, EnergyRollupDaily, daily)
+
+
+class RollupUpdater:
+    """Incrementally folds new meter rows into the rollup tables."""
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        interval: float | None = None,
+        batch_size: int | None = None,
+    ):
+        self._db = db
+        self.interval = interval if interval is not None else settings.rollup_update_interval
+        self.batch_size = batch_size if batch_size is not None else settings.rollup_batch_size
+        self._lock = asyncio.Lock()
+        self._tables = RequiredTables(
+            db,
+            "meter",
+            [t.__tablename__ for t in (EnergyRollupHourly, EnergyRollupDaily, RollupWatermark)],
+            job="Energy rollups",
+            hint="python -m app.services.rollup create-tables",
+        )
+        self._task = PeriodicTask(
+            "energy-rollup", self.interval, self.update_all, gate=self._can_run
+        )
+
+    async def _can_run(self) -> bool:
+        """Run in the leader process only, once the rollup tables exist."""
+        return await background_leader.acquire() and await self._tables.ready()
+
+    async def update_source(self, source: RollupSource) -> int:
+        """
+        Fold one batch of rows past the watermark into the rollups.
+
+        The batch is read, folded and the watermark advanced in one
+        transaction holding the watermark row. Returns the number of
+        source rows consumed.
+        """
+        model = SOURCES[source]
+        async with self._db.session("meter", priority="analytics") as session:
+            watermark = await lock_watermark(session, source)
+            samples = await fetch_columns(
+                session,
+                select(*_sample_columns(model))
+                .where(model.item > (watermark or 0))
+                .order_by(model.item)
+                .limit(self.batch_size),
+            )
+            if len(samples) == 0:
+                return 0
+
+            new_hours = bucket_samples(source, samples, "h")
+            if new_hours:
+                existing = {
+                    bucket.bucket_start: bucket
+                    for bucket in await _load(
+                        session,
+                        EnergyRollupHourly,
+                        source,
+                        new_hours[0].bucket_start,
+                        new_hours[-1].bucket_start + timedelta(hours=1),
+                    )
+                }
+                merged = [
+                    existing[b.bucket_start].merge(b) if b.bucket_start in existing else b
+                    for b in new_hours
+                ]
+                await _upsert(session, EnergyRollupHourly, merged)
+                await _refresh_days(session, source, {b.bucket_start.date() for b in new_hours})
+            await set_watermark(session, source, int(samples["item"].max()))
+        return len(samples)
+
+    async def update_all(self) -> dict[str, int]:
+        """Catch every source up with its raw table."""
+        async with self._lock:
+            consumed = {}
+            for source in SOURCES:
+                total = 0
+                while True:
+                    count = await self.update_source(source)
+                    total += count
+                    if count < self.batch_size:
+                        break
+                consumed[source] = total
+            return consumed
+
+    async def backfill(self, start: date, end: date, sources: list[str] | None = None) -> int:
+        """
+        Rebuild the rollups for local days ``[start, end)`` from raw rows.
+
+        Existing buckets in the range are replaced. Each day is rebuilt
+        under the watermark lock from the rows at or below the watermark
+        only; newer rows are left to the updater, so no row is counted
+        twice. Without a watermark (fresh tables) it is first set to the
+        last row before ``end``, and the updater continues from there.
+        Returns the number of buckets written.
+        """
+        written = 0
+        async with self._lock:
+            for source in sources or list(SOURCES):
+                model = SOURCES[source]
+                day = start
+                while day < end:
+                    local_start, local_end = local_bounds(day)
+                    async with self._db.session("meter", priority="analytics") as session:
+                        watermark = await lock_watermark(session, source)
+                        if watermark is None:
+                            watermark = await session.scalar(
+                                select(func.max(model.item)).where(
+                                    model.EventTime < utc_bounds(end)[0]
+                                )
+                            ) or 0
+                            await set_watermark(session, source, watermark)
+                        samples = await fetch_columns(
+                            session,
+                            select(*_sample_columns(model))
+                            .where(period_filter(model.EventTime, day), model.item <= watermark)
+                            .order_by(model.EventTime),
+                        )
+                        hours = bucket_samples(source, samples, "h")
+                        for table in (EnergyRollupHourly, EnergyRollupDaily):
+                            await session.execute(
+                                delete(table).where(
+                                    table.source == source,
+                                    table.bucket_start >= local_start,
+                                    table.bucket_start < local_end,
+                                )
+                            )
+                        await _upsert(session, EnergyRollupHourly, hours)
+                        if hours:
+                            await _upsert(
+                                session, EnergyRollupDaily, [combine(hours, local_start)]
+                            )
+                    written += len(hours) + (1 if hours else 0)
+                    logger.info(f"Backfilled {source} rollups for {day} ({len(hours)} hours)")
+                    day += timedelta(days=1)
+        return written
+
+    def start(self) -> None:
+        """Start background updates (first pass runs immediately)."""
+        self._task.start()
+
+    async def stop(self) -> None:
+        """Stop background updates."""
+        await self._task.stop()
+
+
+async def create_tables(db: DatabaseManager) -> None:
+    """Create the rollup tables in the Meter database if missing."""
+    tables = [
+        EnergyRollupHourly.__table__,
+        EnergyRollupDaily.__table__,
+        RollupWatermark.__table__,
+    ]
+    async with db.get_engine("meter").begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+
+async def read_rollups(
+    db: Any,
+    granularity: Literal["hourly", "daily"],
+    start: datetime,
+    end: datetime,
+) -> dict[str, dict[datetime, Bucket]]:
+    """
+    Rollup buckets of every source in local-time range ``[start, end)``.
+
+    ``db`` is a Meter session (``LazySession`` or ``AsyncSession``).
+    Returns ``{source: {bucket_start: Bucket}}``.
+    """
+    table = EnergyRollupHourly if granularity == "hourly" else EnergyRollupDaily
+    rows = await db.scalars(
+        select(table)
+        .where(table.bucket_start >= start, table.bucket_start < end)
+        .order_by(table.bucket_start)
+    )
+    buckets: dict[str, dict[datetime, Bucket]] = {source: {} for source in SOURCES}
+    for row in rows:
+        buckets.setdefault(row.source, {})[row.bucket_start] = Bucket.from_model(row)
+    return buckets
+
+
+def _is_missing_table(error: DBAPIError) -> bool:
+    """True if the statement failed because a table does not exist."""
+    args = getattr(error.orig, "args", ())
+    # MySQL ER_NO_SUCH_TABLE; SQLite has no error codes
+    return bool(args) and (args[0] == 1146 or "no such table" in str(args[0]))
+
+
+async def read_energy(
+    db: Any,
+    granularity: Literal["hourly", "daily"],
+    start: datetime,
+    end: datetime,
+) -> dict[str, dict[datetime, Bucket]]:
+    """
+    Energy buckets of every source in local-time range ``[start, end)``.
+
+    Buckets the rollups cover (before ``timeseries.rollup_coverage``)
+    are read from them; later buckets, not folded yet, are aggregated
+    from the raw rows. Raises ``DataNotReadyError`` (503) while the
+    rollup tables are missing. Same result shape as ``read_rollups``.
+    """
+    try:
+        cuts = {}
+        for source in SOURCES:
+            covered = await timeseries.rollup_coverage(db, timeseries.SOURCES[source])
+            cut = start
+            if covered is not None:
+                cut = covered + LOCAL_OFFSET
+                if granularity == "daily":
+                    cut = cut.replace(hour=0)
+            cuts[source] = min(end, max(start, cut))
+
+        buckets = await read_rollups(db, granularity, start, max(cuts.values()))
+        for source, model in SOURCES.items():
+            cut = cuts[source]
+            buckets[source] = {
+                bucket_start: bucket
+                for bucket_start, bucket in buckets[source].items()
+                if bucket_start < cut
+            }
+            if cut == end:
+                continue
+            # Past the watermark: the raw rows are not folded yet
+            samples = await fetch_columns(
+                db,
+                select(*_sample_columns(model))
+                .where(
+                    model.EventTime >= cut - LOCAL_OFFSET,
+                    model.EventTime < end - LOCAL_OFFSET,
+                )
+                .order_by(model.EventTime),
+            )
+            unit = "h" if granularity == "hourly" else "D"
+            for bucket in bucket_samples(source, samples, unit):
+                buckets[source][bucket.bucket_start] = bucket
+    except DBAPIError as e:
+        if not _is_missing_table(e):
+            raise
+        raise DataNotReadyError(
+            "Energy rollups are not set up yet (see app/services/rollup.py)"
+        ) from e
+    return buckets
+
+
+# Global rollup updater instance
+rollup_updater = RollupUpdater(db_manager)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the energy rollup tables")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create-tables", help="Create the rollup tables")
+    commands.add_parser("update", help="Fold new rows past the watermark")
+    backfill = commands.add_parser("backfill", help="Rebuild local days [start, end)")
+    backfill.add_argument("--start", type=date.fromisoformat, required=True)
+    backfill.add_argument("--end", type=date.fromisoformat, required=True)
+    backfill.add_argument("--source", choices=list(SOURCES), action="append")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        if args.command == "create-tables":
+            await create_tables(db_manager)
+        elif args.command == "update":
+            print(await rollup_updater.update_all())
+        else:
+            written = await rollup_updater.backfill(args.start, args.end, args.source)
+            print(f"{written} buckets written")
+    finally:
+        await db_manager.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
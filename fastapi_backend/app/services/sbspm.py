@@ -0,0 +1,338 @@
+"""dReg execution rate (SBSPM) from the raw MMAIN stream.
+
+``SbspmUpdater`` tails MMAIN by ``item`` (watermark ``SBSPM`` in
+``energy_rollup_watermark``), scores each sample against the baseline
+frequency with ``app.analytics.sbspm`` and writes:
+
+- the per-hour sample and pass counts to ``sbspm_hourly`` (Meter DB);
+- the latest SBSPM, rolling and hourly rates to the Redis hash
+  ``sbspm:latest``.
+
+Hourly counts are added to the stored ones, so each batch is scored,
+added and the watermark advanced in one transaction holding the
+watermark row (``app.services.rollup.lock_watermark``); a failed or
+concurrent pass cannot add a batch twice. In the server the updater
+runs in the ``background_leader`` process only.
+
+The calculator carries the rolling state between batches. Whenever the
+watermark is not where the calculator stopped (first pass, a failed
+commit, another process advanced it), it is warmed up again from the
+rows just before the watermark, so the rolling and hourly rates
+continue where they stopped. Without a watermark the updater starts at
+the live edge (the last MMAIN row); ``backfill`` rebuilds
+``sbspm_hourly`` for past local days.
+
+Usage (from fastapi_backend/):
+    python -m app.services.sbspm create-tables
+    python -m app.services.sbspm update
+    python -m app.services.sbspm backfill --start 2024-01-01 --end 2024-02-01
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from redis.exceptions import RedisError
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.analytics.align import merge_asof
+from app.analytics.sbspm import DregCurve, SbspmBatch, SbspmCalculator, hourly_totals
+from app.core.config import settings
+from app.db.background import RequiredTables, background_leader
+from app.db.base import Base
+from app.db.columnar import ColumnBatch, fetch_columns, time_series_select
+from app.db.redis import get_redis_safe
+from app.db.session import DatabaseManager, db_manager
+from app.models.baseline import BaseLine
+from app.models.meter import MainMeter
+from app.models.rollup import RollupWatermark, SbspmHourly
+from app.services.rollup import lock_watermark, set_watermark
+from app.utils.periodic import PeriodicTask
+from app.utils.periods import local_bounds, utc_bounds
+from app.utils.timezone import LOCAL_OFFSET
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_SOURCE = "SBSPM"
+REDIS_LATEST_KEY = "sbspm:latest"
+
+_SAMPLE_COLUMNS = [MainMeter.item, MainMeter.EventTime, MainMeter.Freq, MainMeter.KW_tot]
+
+
+def _seconds(value: float) -> np.timedelta64:
+    return np.timedelta64(int(value * 1_000_000), "us")
+
+
+def default_calculator() -> SbspmCalculator:
+    """Calculator configured from settings."""
+    return SbspmCalculator(
+        curve=DregCurve(
+            capacity_kw=settings.dreg_capacity_kw,
+            deadband_hz=settings.dreg_deadband_hz,
+            full_response_hz=settings.dreg_full_response_hz,
+            tolerance=settings.dreg_tolerance,
+        ),
+        window=_seconds(settings.sbspm_roll_window),
+        local_offset=_seconds(LOCAL_OFFSET.total_seconds()),
+    )
+
+
+async def _reference_freq(session: AsyncSession, samples: ColumnBatch) -> np.ndarray:
+    """Baseline frequency as of each sample, falling back to the meter's own reading."""
+    times = samples["EventTime"]
+    max_age = _seconds(settings.sbspm_baseline_max_age)
+    first = times[0].astype(datetime) - timedelta(seconds=settings.sbspm_baseline_max_age)
+    baseline = await fetch_columns(
+        session,
+        time_series_select(
+            BaseLine.insert_time,
+            BaseLine.baseline_freq,
+            start=first,
+            end=times[-1].astype(datetime) + timedelta(microseconds=1),
+        ),
+    )
+    reference = merge_asof(
+        times,
+        baseline["insert_time"],
+        {"baseline_freq": baseline["baseline_freq"]},
+        tolerance=max_age,
+    )["baseline_freq"]
+    return np.where(np.isnan(reference), samples["Freq"], reference)
+
+
+async def _score(
+    db: DatabaseManager, calculator: SbspmCalculator, samples: ColumnBatch
+) -> SbspmBatch:
+    async with db.session("baseline", read_only=True, priority="analytics") as session:
+        reference = await _reference_freq(session, samples)
+    return calculator.update(samples["EventTime"], reference, samples["KW_tot"])
+
+
+async def _add_hours(session: AsyncSession, batch: SbspmBatch) -> None:
+    """Add a batch's per-hour counts to ``sbspm_hourly``."""
+    hours, counts, passed = hourly_totals(batch)
+    if not len(hours):
+        return
+    statement = insert(SbspmHourly).values(
+        [
+            {"bucket_start": hour, "sample_count": int(count), "passed": float(ok)}
+            for hour, count, ok in zip(
+                hours.astype("datetime64[s]").astype(datetime), counts, passed, strict=True
+            )
+        ]
+    )
+    await session.execute(
+        statement.on_duplicate_key_update(
+            sample_count=SbspmHourly.sample_count + statement.inserted.sample_count,
+            passed=SbspmHourly.passed + statement.inserted.passed,
+        )
+    )
+
+
+async def _publish_latest(batch: SbspmBatch) -> None:
+    """Store the newest sample's rates in Redis (percent, as in MMAIN)."""
+    if not len(batch.times):
+        return
+
+    def percent(values: np.ndarray) -> str:
+        return "" if np.isnan(values[-1]) else f"{values[-1] * 100:.2f}"
+
+    async with get_redis_safe() as redis:
+        if redis is None:
+            return
+        try:
+            await redis.hset(
+                REDIS_LATEST_KEY,
+                mapping={
+                    "EventTime": str(batch.times[-1].astype("datetime64[s]")),
+                    "SBSPM": percent(batch.sbspm),
+                    "roll_SBSPM": percent(batch.roll),
+                    "hour_SBSPM": percent(batch.hour),
+                },
+            )
+        except RedisError as e:
+            logger.warning(f"SBSPM Redis publish failed: {e}")
+
+
+class SbspmUpdater:
+    """Streaming SBSPM stage over new MMAIN rows."""
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        interval: float | None = None,
+        batch_size: int | None = None,
+    ):
+        self._db = db
+        self.interval = interval if interval is not None else settings.sbspm_update_interval
+        self.batch_size = batch_size if batch_size is not None else settings.sbspm_batch_size
+        self._calculator: SbspmCalculator | None = None
+        # Last item the calculator has consumed in a committed batch
+        self._position: int | None = None
+        self._lock = asyncio.Lock()
+        self._tables = RequiredTables(
+            db,
+            "meter",
+            [SbspmHourly.__tablename__, RollupWatermark.__tablename__],
+            job="SBSPM",
+            hint="python -m app.services.sbspm create-tables",
+        )
+        self._task = PeriodicTask("sbspm", self.interval, self.update_all, gate=self._can_run)
+
+    async def _can_run(self) -> bool:
+        """Run in the leader process only, once the tables exist."""
+        return await background_leader.acquire() and await self._tables.ready()
+
+    async def _warm_up(self, session: AsyncSession, watermark: int, first: datetime) -> None:
+        """Replay the window and current hour before ``first`` into a fresh calculator."""
+        calculator = default_calculator()
+        hour_start = (first + LOCAL_OFFSET).replace(minute=0, second=0, microsecond=0)
+        window_start = first - timedelta(seconds=settings.sbspm_roll_window)
+        since = min(window_start, hour_start - LOCAL_OFFSET)
+        history = await fetch_columns(
+            session,
+            select(*_SAMPLE_COLUMNS)
+            .where(MainMeter.item <= watermark, MainMeter.EventTime >= since)
+            .order_by(MainMeter.item),
+        )
+        if len(history):
+            await _score(self._db, calculator, history)
+        self._calculator = calculator
+
+    async def update_batch(self) -> int:
+        """Score one batch of rows past the watermark. Returns the rows consumed."""
+        async with self._db.session("meter", priority="analytics") as session:
+            watermark = await lock_watermark(session, WATERMARK_SOURCE)
+            if watermark is None:
+                # First run: start at the live edge, history is left to backfill
+                watermark = await session.scalar(select(func.max(MainMeter.item))) or 0
+                await set_watermark(session, WATERMARK_SOURCE, watermark)
+            samples = await fetch_columns(
+                session,
+                select(*_SAMPLE_COLUMNS)
+                .where(MainMeter.item > watermark, MainMeter.EventTime.is_not(None))
+                .order_by(MainMeter.item)
+                .limit(self.batch_size),
+            )
+            if len(samples) == 0:
+                return 0
+            if self._calculator is None or self._position != watermark:
+                await self._warm_up(session, watermark, samples["EventTime"][0].astype(datetime))
+
+            # The calculator runs ahead of the watermark until the commit
+            self._position = None
+            batch = await _score(self._db, self._calculator, samples)
+            last_item = int(samples["item"].max())
+            await _add_hours(session, batch)
+            await set_watermark(session, WATERMARK_SOURCE, last_item)
+        self._position = last_item
+        await _publish_latest(batch)
+        return len(samples)
+
+    async def update_all(self) -> int:
+        """Catch up with MMAIN."""
+        async with self._lock:
+            total = 0
+            while True:
+                count = await self.update_batch()
+                total += count
+                if count < self.batch_size:
+                    break
+            return total
+
+    async def backfill(self, start: date, end: date) -> int:
+        """
+        Rebuild ``sbspm_hourly`` for local days ``[start, end)``.
+
+        Each day is scored in one pass, warmed up with the preceding
+        rolling window, and replaces the stored hours under the watermark
+        lock. Only rows at or below the watermark are counted; newer rows
+        are left to the updater. Without a watermark it is first set to
+        the last row before ``end``. Returns the number of hours written.
+        """
+        written = 0
+        window = timedelta(seconds=settings.sbspm_roll_window)
+        async with self._lock:
+            day = start
+            while day < end:
+                utc_start, utc_end = utc_bounds(day)
+                local_start, local_end = local_bounds(day)
+                async with self._db.session("meter", priority="analytics") as session:
+                    watermark = await lock_watermark(session, WATERMARK_SOURCE)
+                    if watermark is None:
+                        watermark = await session.scalar(
+                            select(func.max(MainMeter.item)).where(
+                                MainMeter.EventTime < utc_bounds(end)[0]
+                            )
+                        ) or 0
+                        await set_watermark(session, WATERMARK_SOURCE, watermark)
+                    samples = await fetch_columns(
+                        session,
+                        time_series_select(
+                            *_SAMPLE_COLUMNS[1:], start=utc_start - window, end=utc_end
+                        ).where(MainMeter.item <= watermark),
+                    )
+                    await session.execute(
+                        delete(SbspmHourly).where(
+                            SbspmHourly.bucket_start >= local_start,
+                            SbspmHourly.bucket_start < local_end,
+                        )
+                    )
+                    if len(samples):
+                        batch = await _score(self._db, default_calculator(), samples)
+                        # Drop the warm-up window before the day
+                        day_batch = batch.subset(batch.times >= np.datetime64(utc_start))
+                        await _add_hours(session, day_batch)
+                        written += len(hourly_totals(day_batch)[0])
+                logger.info(f"Backfilled SBSPM for {day}")
+                day += timedelta(days=1)
+        return written
+
+    def start(self) -> None:
+        """Start background updates (first pass runs immediately)."""
+        self._task.start()
+
+    async def stop(self) -> None:
+        """Stop background updates."""
+        await self._task.stop()
+
+
+async def create_tables(db: DatabaseManager) -> None:
+    """Create ``sbspm_hourly`` (and the shared watermark table) if missing."""
+    tables = [SbspmHourly.__table__, RollupWatermark.__table__]
+    async with db.get_engine("meter").begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+
+# Global SBSPM updater instance
+sbspm_updater = SbspmUpdater(db_manager)
+
+
+async def _main() -> None:
+    parser = argparse.ArgumentParser(description="Compute dReg execution rates from MMAIN")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("create-tables", help="Create the sbspm_hourly table")
+    commands.add_parser("update", help="Score new rows past the watermark")
+    backfill = commands.add_parser("backfill", help="Rebuild local days [start, end)")
+    backfill.add_argument("--start", type=date.fromisoformat, required=True)
+    backfill.add_argument("--end", type=date.fromisoformat, required=True)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        if args.command == "create-tables":
+            await create_tables(db_manager)
+        elif args.command == "update":
+            print(f"{await sbspm_updater.update_all()} rows scored")
+        else:
+            written = await sbspm_updater.backfill(args.start, args.end)
+            print(f"{written} hours written")
+    finally:
+        await db_manager.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,261 @@
+"""Write-once store for closed settlement hours.
+
+Once an hour is closed (``settings.settlement_close_delay`` after it
+ends), its settlement never changes. Closed hours are kept in three
+tiers, read in this order:
+
+1. an in-process LRU of whole days (``settings.settlement_cache_days``);
+2. a local SQLite database in WAL mode (``settings.settlement_store_path``),
+   which survives restarts;
+3. Redis, one hash per local day (``settlement:v<N>:<YYYY-MM-DD>``) with one
+   field per hour (``<HH>``) holding ``[quote_code, values]``, shared
+   between instances.
+
+Writes use ``HSETNX`` and ``INSERT OR IGNORE``: the first value stored
+for an hour wins. ``put`` writes Redis first and carries its winners
+into SQLite, then caches what SQLite holds, so the in-process tier never
+disagrees with the stores. Hours are keyed by their local (UTC+8) start.
+
+Both stores carry ``STORE_VERSION``. Bump it whenever stored values would
+be computed differently; rows of other versions are then discarded
+(SQLite) or no longer read (Redis, where they expire).
+"""
+import asyncio
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.analytics.settlement import HOUR_FIELDS
+from app.core.config import settings
+from app.db.redis import get_redis_safe
+
+logger = logging.getLogger(__name__)
+
+# (quote_code, values in HOUR_FIELDS order)
+HourRow = tuple[str, tuple[float, ...]]
+
+# 3: execution rates from per-event scoring (was AVG(SBSPM)) and
+# per-hour Redis fields with the quote code in the value
+STORE_VERSION = 3
+
+REDIS_KEY_PREFIX = f"settlement:v{STORE_VERSION}:"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS settlement_hours (
+    hour_start TEXT PRIMARY KEY,
+    quote_code TEXT NOT NULL,
+    {", ".join(f"{name} REAL" for name in HOUR_FIELDS)}
+);
+CREATE INDEX IF NOT EXISTS ix_settlement_hours_quote
+    ON settlement_hours (quote_code, hour_start);
+"""
+
+
+def _hour_key(hour: datetime) -> str:
+    return hour.strftime("%Y-%m-%dT%H:00")
+
+
+def _redis_key(day: date) -> str:
+    return f"{REDIS_KEY_PREFIX}{day.isoformat()}"
+
+
+def _encode(row: HourRow) -> bytes:
+    # orjson writes NaN as null
+    return orjson.dumps(row)
+
+
+def _nan_for_null(values: list[float | None]) -> tuple[float, ...]:
+    return tuple(float("nan") if value is None else value for value in values)
+
+
+def _decode(payload: str | bytes) -> HourRow:
+    code, values = orjson.loads(payload)
+    return code, _nan_for_null(values)
+
+
+class SettlementStore:
+    """LRU, SQLite and Redis tiers for closed settlement hours."""
+
+    def __init__(self, path: str | None = None, cache_days: int | None = None):
+        self.path = Path(path or settings.settlement_store_path)
+        self.cache_days = cache_days if cache_days is not None else settings.settlement_cache_days
+        self._days: OrderedDict[date, dict[datetime, HourRow]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+
+    # In-process tier
+
+    def _remember(self, rows: dict[datetime, HourRow]) -> None:
+        for hour, row in rows.items():
+            day = hour.date()
+            self._days.setdefault(day, {})[hour] = row
+            self._days.move_to_end(day)
+        while len(self._days) > self.cache_days:
+            self._days.popitem(last=False)
+
+    def _recall(self, hours: list[datetime]) -> dict[datetime, HourRow]:
+        found = {}
+        for hour in hours:
+            day_rows = self._days.get(hour.date())
+            if day_rows is not None and hour in day_rows:
+                found[hour] = day_rows[hour]
+                self._days.move_to_end(hour.date())
+        return found
+
+    # SQLite tier (blocking; run in a worker thread)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if db.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION:
+                # Rows settled under other rules
+                with db:
+                    db.execute("DROP TABLE IF EXISTS settlement_hours")
+                    db.execute(f"PRAGMA user_version = {STORE_VERSION}")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def _select(self, first: datetime, last: datetime) -> dict[datetime, HourRow]:
+        with self._db_lock:
+            cursor = self._connection().execute(
+                f"SELECT hour_start, quote_code, {', '.join(HOUR_FIELDS)} FROM settlement_hours "
+                "WHERE hour_start BETWEEN ? AND ?",
+                (_hour_key(first), _hour_key(last)),
+            )
+            return {
+                # SQLite stores NaN as NULL
+                datetime.fromisoformat(hour): (code, _nan_for_null(values))
+                for hour, code, *values in cursor.fetchall()
+            }
+
+    def _insert(self, rows: dict[datetime, HourRow]) -> dict[datetime, HourRow]:
+        """Insert new hours and return what the database holds for them."""
+        placeholders = ", ".join("?" * (len(HOUR_FIELDS) + 2))
+        with self._db_lock:
+            db = self._connection()
+            with db:
+                db.executemany(
+                    f"INSERT OR IGNORE INTO settlement_hours VALUES ({placeholders})",
+                    [(_hour_key(hour), code, *values) for hour, (code, values) in rows.items()],
+                )
+        stored = self._select(min(rows), max(rows))
+        return {hour: row for hour, row in stored.items() if hour in rows}
+
+    async def _load_local(self, hours: list[datetime]) -> dict[datetime, HourRow]:
+        try:
+            rows = await asyncio.to_thread(self._select, hours[0], hours[-1])
+        except sqlite3.Error as e:
+            logger.warning(f"Settlement store read failed: {e}")
+            return {}
+        wanted = set(hours)
+        return {hour: row for hour, row in rows.items() if hour in wanted}
+
+    async def _save_local(self, rows: dict[datetime, HourRow]) -> dict[datetime, HourRow]:
+        try:
+            return await asyncio.to_thread(self._insert, rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Settlement store write failed: {e}")
+            return {}
+
+    # Redis tier
+
+    async def _load_redis(self, hours: list[datetime]) -> dict[datetime, HourRow]:
+        days = sorted({hour.date() for hour in hours})
+        async with get_redis_safe() as redis:
+            if redis is None:
+                return {}
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for day in days:
+                        pipe.hgetall(_redis_key(day))
+                    replies = await pipe.execute()
+            except RedisError as e:
+                logger.warning(f"Settlement Redis read failed: {e}")
+                return {}
+
+        wanted = set(hours)
+        found = {}
+        for day, fields in zip(days, replies, strict=True):
+            for field, payload in fields.items():
+                hour = datetime.combine(day, datetime.min.time()) + timedelta(hours=int(field))
+                if hour in wanted:
+                    found[hour] = _decode(payload)
+        return found
+
+    async def _save_redis(self, rows: dict[datetime, HourRow]) -> dict[datetime, HourRow]:
+        """Store new hours; returns ``rows`` with hours already in Redis replaced by theirs."""
+        hours = list(rows)
+        async with get_redis_safe() as redis:
+            if redis is None:
+                return rows
+            try:
+                async with redis.pipeline(transaction=False) as pipe:
+                    for hour in hours:
+                        pipe.hsetnx(_redis_key(hour.date()), f"{hour:%H}", _encode(rows[hour]))
+                    for day in {hour.date() for hour in hours}:
+                        pipe.expire(_redis_key(day), settings.settlement_redis_ttl)
+                    replies = await pipe.execute()
+                # Replies to HSETNX come first, then the EXPIREs
+                added = replies[: len(hours)]
+                taken = [hour for hour, new in zip(hours, added, strict=True) if not new]
+                if taken:
+                    async with redis.pipeline(transaction=False) as pipe:
+                        for hour in taken:
+                            pipe.hget(_redis_key(hour.date()), f"{hour:%H}")
+                        existing = await pipe.execute()
+                    rows = {
+                        **rows,
+                        **{
+                            hour: _decode(payload)
+                            for hour, payload in zip(taken, existing, strict=True)
+                            if payload is not None
+                        },
+                    }
+            except RedisError as e:
+                logger.warning(f"Settlement Redis write failed: {e}")
+        return rows
+
+    # Public API
+
+    async def get(self, hours: list[datetime]) -> dict[datetime, HourRow]:
+        """Cached rows for ``hours`` (sorted local hour starts); misses are left out."""
+        found = self._recall(hours)
+        for load in (self._load_local, self._load_redis):
+            missing = [hour for hour in hours if hour not in found]
+            if not missing:
+                break
+            loaded = await load(missing)
+            if load is self._load_redis and loaded:
+                await self._save_local(loaded)
+            self._remember(loaded)
+            found.update(loaded)
+        return found
+
+    async def put(self, rows: dict[datetime, HourRow]) -> None:
+        """Persist closed hours in every tier; existing hours are kept."""
+        if not rows:
+            return
+        rows = await self._save_redis(rows)
+        self._remember(await self._save_local(rows))
+
+    def close(self) -> None:
+        """Close the SQLite connection and drop the in-process tier."""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        self._days.clear()
+
+
+# Global settlement store instance
+settlement_store = SettlementStore()
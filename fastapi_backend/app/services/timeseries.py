@@ -0,0 +1,471 @@
+"""Unified time-series query engine over the telemetry tables.
+
+One query shape serves every source: a metric list, a UTC range
+``[start, end)``, an aggregation and a step in seconds. Buckets are
+aligned to local (UTC+8) midnight of the start day, so hourly and daily
+steps line up with the energy rollups. Depending on the query, rows
+come from one of three plans (the ``Resolution`` reported to clients):
+
+- ``raw``: the samples themselves (``step`` 0);
+- ``bucket``: one ``GROUP BY`` over the raw table. The range predicate
+  is on the bare time column, so MySQL can use its index; the bucket is
+  ``TIMESTAMPDIFF(SECOND, origin, time) DIV step``. ``first``/``last``
+  pick each bucket's lowest/highest ``item`` with a non-NULL value and
+  join back on the primary key, ``delta`` is ``last - first``;
+- ``hourly``/``daily``: the energy rollups (``app/services/rollup.py``)
+  of MMAIN/MAUX, when the step and range fall on their buckets and every
+  metric/aggregation has a rollup column; a year reads 8,760 rows. The
+  rollups only cover the hours before their watermark's; the rest of
+  the range is answered with ``bucket``.
+
+``stream_query`` yields ``[epoch_ms, value, ...]`` rows in chunks so
+the endpoint can stream them out without holding the whole result.
+"""
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Literal
+
+import numpy as np
+from sqlalchemy import Float, Integer, Numeric, Select, case, func, literal_column, select
+from sqlalchemy.sql import ColumnElement
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.db.base import Base
+from app.db.columnar import (
+    ColumnBatch,
+    StreamingSession,
+    fetch_columns,
+    stream_partitions,
+    time_series_select,
+)
+from app.db.session import DatabaseName
+from app.models.baseline import BaseLine
+from app.models.inverter import Inverter
+from app.models.meter import AuxMeter, MainMeter
+from app.models.pcs import PcsData
+from app.models.rollup import EnergyRollupDaily, EnergyRollupHourly, RollupWatermark
+from app.utils.periods import utc_bounds
+from app.utils.timezone import LOCAL_OFFSET
+
+Aggregation = Literal["avg", "min", "max", "first", "last", "delta"]
+Resolution = Literal["raw", "bucket", "hourly", "daily"]
+
+HOUR = 3600
+DAY = 86400
+
+_SQL_AGGREGATES = {"avg": func.avg, "min": func.min, "max": func.max}
+
+# Rollup columns answering (metric, aggregation); delta uses (first, last)
+_ROLLUP_COLUMNS: dict[tuple[str, str], tuple[str, ...]] = {
+    ("KW_tot", "avg"): ("avg_kw",),
+    ("KW_tot", "min"): ("min_kw",),
+    ("KW_tot", "max"): ("max_kw",),
+    ("KWH_del", "first"): ("first_kwh_del",),
+    ("KWH_del", "last"): ("last_kwh_del",),
+    ("KWH_del", "delta"): ("first_kwh_del", "last_kwh_del"),
+    ("KWH_rec", "first"): ("first_kwh_rec",),
+    ("KWH_rec", "last"): ("last_kwh_rec",),
+    ("KWH_rec", "delta"): ("first_kwh_rec", "last_kwh_rec"),
+}
+
+
+@dataclass(frozen=True)
+class TimeSeriesSource:
+    """A telemetry table queryable by the engine."""
+
+    name: str
+    db: DatabaseName
+    model: type[Base]
+    time_column: str = "EventTime"
+    cadence_s: float = 1.0  # Nominal seconds between samples
+    has_rollups: bool = False
+    metrics: tuple[str, ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        metrics = tuple(
+            column.key
+            for column in self.model.__table__.columns
+            if isinstance(column.type, (Float, Integer, Numeric))
+            and not column.primary_key
+            and column.key != self.time_column
+        )
+        object.__setattr__(self, "metrics", metrics)
+
+    @property
+    def time(self) -> ColumnElement[datetime]:
+        return getattr(self.model, self.time_column)
+
+    def column(self, metric: str) -> ColumnElement[Any]:
+        return getattr(self.model, metric)
+
+
+SOURCES: dict[str, TimeSeriesSource] = {
+    source.name: source
+    for source in (
+        TimeSeriesSource("MMAIN", "meter", MainMeter, has_rollups=True),
+        TimeSeriesSource("MAUX", "meter", AuxMeter, has_rollups=True),
+        TimeSeriesSource("INVERTER_1", "inverter", Inverter),
+        TimeSeriesSource("pcs0_data", "pcs", PcsData),
+        TimeSeriesSource("base_line", "baseline", BaseLine, time_column="insert_time"),
+    )
+}
+
+
+def local_midnight_utc(moment: datetime) -> datetime:
+    """UTC instant of local midnight on the local day of the UTC ``moment``."""
+    return utc_bounds((moment + LOCAL_OFFSET).date())[0]
+
+
+@dataclass(frozen=True)
+class TimeSeriesQuery:
+    """A validated time-series query; times are naive UTC."""
+
+    source: TimeSeriesSource
+    metrics: tuple[str, ...]
+    start: datetime
+    end: datetime
+    aggregation: Aggregation = "avg"
+    step: int = 60  # Seconds; 0 returns raw samples
+    anchor: datetime | None = None  # Bucket alignment when not the start day's midnight
+
+    @classmethod
+    def build(
+        cls,
+        source: str,
+        metrics: list[str],
+        start: datetime,
+        end: datetime,
+        aggregation: Aggregation = "avg",
+        step: int = 60,
+    ) -> "TimeSeriesQuery":
+        """Validate request parameters into a query (``ValidationError`` otherwise)."""
+        if source not in SOURCES:
+            raise ValidationError(f"Unknown source {source!r}, expected one of {list(SOURCES)}")
+        table = SOURCES[source]
+        unknown = [metric for metric in metrics if metric not in table.metrics]
+        if unknown or not metrics:
+            raise ValidationError(f"Unknown metrics for {source}: {unknown or 'none given'}")
+        if start >= end:
+            raise ValidationError("start_time must be before end_time")
+        if step < 0:
+            raise ValidationError("step must be 0 (raw) or a number of seconds")
+        return cls(table, tuple(dict.fromkeys(metrics)), start, end, aggregation, step)
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end - self.start).total_seconds()
+
+    def with_step(self, step: int) -> "TimeSeriesQuery":
+        return replace(self, step=step)
+
+    @property
+    def origin(self) -> datetime:
+        """Bucket alignment: local midnight of the start day, in UTC."""
+        return self.anchor or local_midnight_utc(self.start)
+
+    @property
+    def columns(self) -> list[str]:
+        """Names of the values in each output row."""
+        return ["time", *self.metrics]
+
+
+def _aligned(moment: datetime, step: int) -> bool:
+    return ((moment + LOCAL_OFFSET) - datetime.min) % timedelta(seconds=step) == timedelta(0)
+
+
+def plan_query(query: TimeSeriesQuery) -> Resolution:
+    """Pick the cheapest resolution that answers ``query`` exactly."""
+    if query.step == 0:
+        return "raw"
+    rollups_fit = (
+        settings.timeseries_use_rollups
+        and query.source.has_rollups
+        and all((metric, query.aggregation) in _ROLLUP_COLUMNS for metric in query.metrics)
+    )
+    if rollups_fit:
+        for resolution, size in (("daily", DAY), ("hourly", HOUR)):
+            if (
+                query.step % size == 0
+                and _aligned(query.start, size)
+                and _aligned(query.end, size)
+            ):
+                return resolution
+    return "bucket"
+
+
+def bucket_index(query: TimeSeriesQuery) -> ColumnElement[int]:
+    """``TIMESTAMPDIFF(SECOND, origin, time) DIV step``: the bucket of each row."""
+    seconds = func.timestampdiff(literal_column("SECOND"), query.origin, query.source.time)
+    return seconds.op("DIV")(query.step).label("bucket")
+
+
+def _in_range(query: TimeSeriesQuery) -> list[ColumnElement[bool]]:
+    return [query.source.time >= query.start, query.source.time < query.end]
+
+
+def aggregate_select(query: TimeSeriesQuery) -> Select[Any]:
+    """The single ``GROUP BY`` statement of the ``bucket`` plan."""
+    source = query.source
+    bucket = bucket_index(query)
+
+    if query.aggregation in _SQL_AGGREGATES:
+        aggregate = _SQL_AGGREGATES[query.aggregation]
+        return (
+            select(bucket, *(aggregate(source.column(m)).label(m) for m in query.metrics))
+            .where(*_in_range(query))
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+
+    # first/last/delta: the bucket's edge items per metric, joined back by primary key
+    edges = {"first": ["first"], "last": ["last"], "delta": ["first", "last"]}[query.aggregation]
+    pick = {"first": func.min, "last": func.max}
+    item = source.model.item
+    keys = [
+        pick[edge](case((source.column(m).is_not(None), item))).label(f"{m}__{edge}")
+        for m in query.metrics
+        for edge in edges
+    ]
+    inner = select(bucket, *keys).where(*_in_range(query)).group_by(bucket).subquery("edges")
+
+    joined = inner
+    values: list[ColumnElement[Any]] = []
+    for m in query.metrics:
+        ends = {}
+        for edge in edges:
+            row = source.model.__table__.alias(f"{m}__{edge}")
+            joined = joined.outerjoin(row, row.c.item == inner.c[f"{m}__{edge}"])
+            ends[edge] = row.c[m]
+        value = ends["last"] - ends["first"] if query.aggregation == "delta" else ends[edges[0]]
+        values.append(value.label(m))
+    return select(inner.c.bucket, *values).select_from(joined).order_by(inner.c.bucket)
+
+
+def _clean(value: Any) -> float | None:
+    if value is None:
+        return None
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _epoch_ms(moment: datetime) -> int:
+    return int((moment - datetime(1970, 1, 1)) / timedelta(milliseconds=1))
+
+
+async def _stream_sql(db: StreamingSession, query: TimeSeriesQuery) -> AsyncIterator[list[list]]:
+    if query.step == 0:
+        statement = time_series_select(
+            query.source.time,
+            *(query.source.column(m) for m in query.metrics),
+            start=query.start,
+            end=query.end,
+        )
+        async for rows in stream_partitions(db, statement):
+            yield [[_epoch_ms(row[0]), *map(_clean, row[1:])] for row in rows]
+        return
+
+    origin_ms = _epoch_ms(query.origin)
+    step_ms = query.step * 1000
+    async for rows in stream_partitions(db, aggregate_select(query)):
+        yield [[origin_ms + int(row[0]) * step_ms, *map(_clean, row[1:])] for row in rows]
+
+
+def _first_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """First non-NaN value of each ``[start, end)`` group, NaN if none."""
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return np.full(len(starts), np.nan)
+    position = np.searchsorted(valid, starts)
+    index = valid[np.clip(position, 0, len(valid) - 1)]
+    return np.where((position < len(valid)) & (index < ends), values[index], np.nan)
+
+
+def _last_valid(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Last non-NaN value of each ``[start, end)`` group, NaN if none."""
+    valid = np.flatnonzero(~np.isnan(values))
+    if not len(valid):
+        return np.full(len(starts), np.nan)
+    position = np.searchsorted(valid, ends) - 1
+    index = valid[np.clip(position, 0, None)]
+    return np.where((position >= 0) & (index >= starts), values[index], np.nan)
+
+
+def combine_rollups(
+    query: TimeSeriesQuery, bucket_start_utc: np.ndarray, rollups: dict[str, np.ndarray]
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Fold rollup rows (sorted by bucket) into the query's step buckets.
+
+    Returns the bucket start times (``datetime64``) and one array per metric.
+    """
+    origin = np.datetime64(query.origin, "us")
+    step = np.timedelta64(query.step, "s")
+    bucket = (bucket_start_utc - origin) // step
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]]) if len(bucket) else bucket
+    ends = np.r_[starts[1:], len(bucket)].astype(np.int64)
+    times = origin + bucket[starts] * step
+
+    values: dict[str, np.ndarray] = {}
+    for metric in query.metrics:
+        names = _ROLLUP_COLUMNS[(metric, query.aggregation)]
+        column = rollups[names[0]]
+        if not len(starts):
+            values[metric] = np.empty(0)
+        elif query.aggregation == "avg":
+            counts = rollups["sample_count"] * ~np.isnan(column)
+            totals = np.add.reduceat(np.nan_to_num(column) * counts, starts)
+            weights = np.add.reduceat(counts, starts)
+            values[metric] = np.divide(
+                totals, weights, out=np.full(len(starts), np.nan), where=weights > 0
+            )
+        elif query.aggregation in ("min", "max"):
+            reduce = np.fmin if query.aggregation == "min" else np.fmax
+            values[metric] = reduce.reduceat(column, starts)
+        elif query.aggregation == "first":
+            values[metric] = _first_valid(column, starts, ends)
+        elif query.aggregation == "last":
+            values[metric] = _last_valid(column, starts, ends)
+        else:
+            values[metric] = _last_valid(rollups[names[1]], starts, ends) - _first_valid(
+                column, starts, ends
+            )
+    return times, values
+
+
+async def rollup_coverage(db: StreamingSession, source: TimeSeriesSource) -> datetime | None:
+    """
+    UTC start of the hour holding ``source``'s rollup watermark row.
+
+    The rollups are complete before it; None without a watermark.
+    """
+    watermark = (
+        select(RollupWatermark.last_item)
+        .where(RollupWatermark.source == source.name)
+        .scalar_subquery()
+    )
+    rows = await fetch_columns(
+        db, select(source.time).where(source.column("item") == watermark)
+    )
+    if not len(rows):
+        return None
+    moment = rows[source.time_column][0].astype(datetime)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def split_at_coverage(
+    query: TimeSeriesQuery, covered: datetime | None
+) -> tuple[TimeSeriesQuery | None, TimeSeriesQuery | None]:
+    """
+    ``query`` split on a step boundary into the part the rollups cover and the rest.
+
+    Both parts keep the original bucket alignment.
+    """
+    step = timedelta(seconds=query.step)
+    cut = query.start
+    if covered is not None and covered > query.origin:
+        boundary = query.origin + (covered - query.origin) // step * step
+        cut = min(query.end, max(query.start, boundary))
+    anchored = replace(query, anchor=query.origin)
+    covered_part = replace(anchored, end=cut) if cut > query.start else None
+    rest = replace(anchored, start=cut) if cut < query.end else None
+    return covered_part, rest
+
+
+async def _stream_rollups(
+    db: StreamingSession, query: TimeSeriesQuery, resolution: Resolution
+) -> AsyncIterator[list[list]]:
+    covered, rest = split_at_coverage(query, await rollup_coverage(db, query.source))
+    if covered is not None:
+        async for chunk in _stream_rollup_rows(db, covered, resolution):
+            yield chunk
+    if rest is not None:
+        # Past the watermark: the raw rows are not folded yet
+        async for chunk in _stream_sql(db, rest):
+            yield chunk
+
+
+async def _stream_rollup_rows(
+    db: StreamingSession, query: TimeSeriesQuery, resolution: Resolution
+) -> AsyncIterator[list[list]]:
+    table = EnergyRollupDaily if resolution == "daily" else EnergyRollupHourly
+    names = sorted(
+        {name for metric in query.metrics for name in _ROLLUP_COLUMNS[(metric, query.aggregation)]}
+    )
+    rows = await fetch_columns(
+        db,
+        time_series_select(
+            table.bucket_start,
+            table.sample_count,
+            *(getattr(table, name) for name in names),
+            start=query.start + LOCAL_OFFSET,
+            end=query.end + LOCAL_OFFSET,
+        ).where(table.source == query.source.name),
+    )
+    utc_start = rows["bucket_start"] - np.timedelta64(int(LOCAL_OFFSET.total_seconds()), "s")
+    times, values = combine_rollups(query, utc_start, rows.columns)
+    epoch_ms = times.astype("datetime64[ms]").astype(np.int64).tolist()
+    columns = [np.where(np.isnan(values[m]), None, values[m]).tolist() for m in query.metrics]
+    yield [list(row) for row in zip(epoch_ms, *columns, strict=True)]
+
+
+def stream_query(
+    db: StreamingSession, query: TimeSeriesQuery, resolution: Resolution | None = None
+) -> AsyncIterator[list[list]]:
+    """
+    Rows of ``query`` as ``[epoch_ms, value, ...]`` chunks, in time order.
+
+    ``db`` is a session on ``query.source.db``; ``resolution`` defaults
+    to ``plan_query(query)``. Bucket rows carry the bucket start; buckets
+    without samples are omitted.
+    """
+    resolution = resolution or plan_query(query)
+    if resolution in ("hourly", "daily"):
+        return _stream_rollups(db, query, resolution)
+    return _stream_sql(db, query)
+
+
+async def fetch_query(
+    db: StreamingSession, query: TimeSeriesQuery, resolution: Resolution | None = None
+) -> ColumnBatch:
+    """
+    Rows of ``query`` as a ``ColumnBatch``.
+
+    The time column keeps the source's name (e.g. ``EventTime``) as
+    ``datetime64[us]``; metrics are floats with NaN for NULL. Raw and
+    bucket plans are read straight into arrays with ``fetch_columns``.
+    """
+    resolution = resolution or plan_query(query)
+    source = query.source
+    if resolution == "raw":
+        rows = await fetch_columns(
+            db,
+            time_series_select(
+                source.time,
+                *(source.column(m) for m in query.metrics),
+                start=query.start,
+                end=query.end,
+            ),
+        )
+        times = rows[source.time_column]
+    elif resolution == "bucket":
+        rows = await fetch_columns(db, aggregate_select(query))
+        step = np.timedelta64(query.step, "s")
+        times = np.datetime64(query.origin, "us") + rows["bucket"].astype(np.int64) * step
+    else:
+        # Rollup rows, possibly followed by a bucket tail past the watermark
+        chunks = [row async for chunk in stream_query(db, query, resolution) for row in chunk]
+        epoch_ms = np.array([row[0] for row in chunks], dtype=np.int64)
+        rows = ColumnBatch(
+            {
+                metric: np.array([row[i] for row in chunks], dtype=np.float64)
+                for i, metric in enumerate(query.metrics, start=1)
+            }
+        )
+        times = epoch_ms.astype("datetime64[ms]")
+
+    columns = {source.time_column: times.astype("datetime64[us]")}
+    for metric in query.metrics:
+        columns[metric] = rows[metric].astype(np.float64)
+    return ColumnBatch(columns)
@@ -0,0 +1,190 @@
+"""Non-blocking topology prober with a cached topology graph."""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.config import settings
+from app.schemas.system import TopologyLink, TopologyNode, TopologyResponse
+from app.utils.periodic import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PortProbe:
+    """Result of a single TCP reachability probe."""
+
+    host: str
+    port: int
+    reachable: bool
+    latency_ms: float | None
+
+
+async def probe_port(host: str, port: int, timeout: float) -> PortProbe:
+    """Open (and immediately close) a TCP connection to measure reachability."""
+    started = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout=timeout
+        )
+    except (OSError, TimeoutError):
+        return PortProbe(host=host, port=port, reachable=False, latency_ms=None)
+
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return PortProbe(host=host, port=port, reachable=True, latency_ms=latency_ms)
+
+
+def _link(source: str, target: str, probe: PortProbe) -> TopologyLink:
+    return TopologyLink(
+        source=source,
+        target=target,
+        status="connected" if probe.reachable else "disconnected",
+        latency_ms=probe.latency_ms,
+    )
+
+
+def build_topology(
+    main_mysql: PortProbe,
+    main_redis: PortProbe,
+    gtr_mysql: PortProbe,
+    gtr_redis: PortProbe,
+    timestamp: datetime,
+) -> TopologyResponse:
+    """Build the topology graph from the four service probes."""
+    main_server_id = "main_server"
+    gtr_server_id = "gtr_server"
+
+    nodes = [
+        TopologyNode(
+            id=main_server_id,
+            name="Main Server",
+            type="server",
+            status="online",
+            ip=settings.db_host,
+        ),
+        TopologyNode(
+            id="main_mysql",
+            name="Main MySQL",
+            type="database",
+            status="online" if main_mysql.reachable else "offline",
+            ip=main_mysql.host,
+            port=main_mysql.port,
+            latency_ms=main_mysql.latency_ms,
+        ),
+        TopologyNode(
+            id="main_redis",
+            name="Main Redis",
+            type="redis",
+            status="online" if main_redis.reachable else "offline",
+            ip=main_redis.host,
+            port=main_redis.port,
+            latency_ms=main_redis.latency_ms,
+        ),
+        # The GTR server is considered online when its MySQL answers
+        TopologyNode(
+            id=gtr_server_id,
+            name="GTR Server",
+            type="server",
+            status="online" if gtr_mysql.reachable else "offline",
+            ip=settings.db_host_gtr,
+            latency_ms=gtr_mysql.latency_ms,
+        ),
+        TopologyNode(
+            id="gtr_mysql",
+            name="GTR MySQL",
+            type="database",
+            status="online" if gtr_mysql.reachable else "offline",
+            ip=gtr_mysql.host,
+            port=gtr_mysql.port,
+            latency_ms=gtr_mysql.latency_ms,
+        ),
+        TopologyNode(
+            id="gtr_redis",
+            name="GTR Redis",
+            type="redis",
+            status="online" if gtr_redis.reachable else "offline",
+            ip=gtr_redis.host,
+            port=gtr_redis.port,
+            latency_ms=gtr_redis.latency_ms,
+        ),
+    ]
+
+    links = [
+        _link(main_server_id, "main_mysql", main_mysql),
+        _link(main_server_id, "main_redis", main_redis),
+        _link(gtr_server_id, "gtr_mysql", gtr_mysql),
+        _link(gtr_server_id, "gtr_redis", gtr_redis),
+        _link(main_server_id, gtr_server_id, gtr_mysql),
+    ]
+
+    return TopologyResponse(nodes=nodes, links=links, timestamp=timestamp)
+
+
+class TopologyProber:
+    """
+    Probes all topology nodes concurrently and caches the resulting graph.
+
+    A background task refreshes the graph every ``interval`` seconds so
+    the endpoint can answer without touching the network. Concurrent
+    forced refreshes share a single probe round.
+    """
+
+    def __init__(self, interval: float | None = None, timeout: float | None = None):
+        self.interval = interval if interval is not None else settings.topology_probe_interval
+        self.timeout = timeout if timeout is not None else settings.topology_probe_timeout
+        self._topology: TopologyResponse | None = None
+        self._refresh_lock = asyncio.Lock()
+        self._task = PeriodicTask(
+            "topology-prober", self.interval, self.refresh, run_immediately=False
+        )
+
+    @property
+    def topology(self) -> TopologyResponse | None:
+        """Latest topology graph, or None before the first probe."""
+        return self._topology
+
+    async def refresh(self) -> TopologyResponse:
+        """Probe every node concurrently and publish a new graph."""
+        if self._refresh_lock.locked():
+            # A probe round is already in flight; reuse its result.
+            async with self._refresh_lock:
+                if self._topology is not None:
+                    return self._topology
+
+        async with self._refresh_lock:
+            main_mysql, main_redis, gtr_mysql, gtr_redis = await asyncio.gather(
+                probe_port(settings.db_host, settings.db_port, self.timeout),
+                probe_port(settings.redis_host, settings.redis_port, self.timeout),
+                probe_port(settings.db_host_gtr, settings.db_port, self.timeout),
+                probe_port(settings.redis_host_gtr, settings.redis_port_gtr, self.timeout),
+            )
+            self._topology = build_topology(
+                main_mysql, main_redis, gtr_mysql, gtr_redis, timestamp=datetime.now()
+            )
+            return self._topology
+
+    async def get_topology(self, refresh: bool = False) -> TopologyResponse:
+        """Return the cached graph, probing first if forced or not yet available."""
+        if refresh or self._topology is None:
+            return await self.refresh()
+        return self._topology
+
+    async def start(self) -> None:
+        """Run an initial probe and start the background refresh loop."""
+        await self.refresh()
+        self._task.start()
+
+    async def stop(self) -> None:
+        """Stop the background refresh loop."""
+        await self._task.stop()
+
+
+# Global topology prober instance
+topology_prober = TopologyProber()
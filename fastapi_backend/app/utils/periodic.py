@@ -0,0 +1,83 @@
+"""Background task that runs an async callable at a fixed interval."""
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# Longest pause between retries of a failing task, in seconds
+MAX_BACKOFF = 60.0
+
+
+class PeriodicTask:
+    """
+    Run an async callable every ``interval`` seconds on the event loop.
+
+    Exceptions raised by the callable do not stop the loop. The first
+    failure is logged with its traceback; while it keeps failing, the
+    pause doubles up to ``MAX_BACKOFF`` and each retry logs one line.
+    With a ``gate``, a run is skipped while ``gate()`` returns
+    False (e.g. another process holds the job's leader lock). Started
+    from the application ``lifespan`` and stopped on shutdown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        func: Callable[[], Awaitable[object]],
+        run_immediately: bool = True,
+        gate: Callable[[], Awaitable[bool]] | None = None,
+    ):
+        self.name = name
+        self.interval = interval
+        self._func = func
+        self._run_immediately = run_immediately
+        self._gate = gate
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """True while the background loop is active."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the background loop (no-op if already running)."""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        """Cancel the background loop and wait for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        if not self._run_immediately:
+            await asyncio.sleep(self.interval)
+        failures = 0
+        while True:
+            delay = self.interval
+            try:
+                if self._gate is None or await self._gate():
+                    await self._func()
+                if failures:
+                    logger.info(f"Periodic task '{self.name}' recovered after {failures} failures")
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(self.interval * 2**failures, max(self.interval, MAX_BACKOFF))
+                if failures == 1:
+                    logger.exception(f"Periodic task '{self.name}' failed: {e}")
+                else:
+                    logger.warning(
+                        f"Periodic task '{self.name}' failed {failures} times in a row, "
+                        f"retrying in {delay:.0f}s: {e}"
+                    )
+            await asyncio.sleep(delay)
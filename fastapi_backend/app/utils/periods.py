@@ -0,0 +1,98 @@
+"""Local calendar periods (day, week, month) over UTC-stored data.
+
+The databases store naive UTC while days, weeks and months are local
+(UTC+8, see ``app/utils/timezone.py``). Filtering with
+``DATE(CONVERT_TZ(EventTime, ...)) = :day`` wraps the column in
+functions, so MySQL scans every row. Instead, a local period is turned
+into its exact UTC half-open range once and the bare column is compared
+with it (``period_filter``), which MySQL serves with an index range scan.
+
+Rows already fetched are assigned to periods with one ``searchsorted``
+over the period edges (``assign_buckets``). Bounds and edges are cached;
+edge arrays are read-only so cached copies cannot be modified.
+
+Weeks start on Monday.
+"""
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Literal
+
+import numpy as np
+from sqlalchemy import ColumnElement, and_
+
+from app.utils.timezone import LOCAL_OFFSET
+
+Period = Literal["day", "week", "month"]
+
+
+def period_start(day: date, period: Period) -> date:
+    """First local day of the period containing ``day``."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def shift(start: date, period: Period, count: int = 1) -> date:
+    """The period start ``count`` periods after ``start`` (a period start)."""
+    if period == "month":
+        month_index = start.year * 12 + start.month - 1 + count
+        return date(month_index // 12, month_index % 12 + 1, 1)
+    return start + timedelta(days=count * (7 if period == "week" else 1))
+
+
+@lru_cache(maxsize=4096)
+def local_bounds(day: date, period: Period = "day") -> tuple[datetime, datetime]:
+    """Local naive range ``[start, end)`` of the period containing ``day``."""
+    start = period_start(day, period)
+    return (
+        datetime.combine(start, datetime.min.time()),
+        datetime.combine(shift(start, period), datetime.min.time()),
+    )
+
+
+@lru_cache(maxsize=4096)
+def utc_bounds(day: date, period: Period = "day") -> tuple[datetime, datetime]:
+    """Naive UTC range ``[start, end)`` of the local period containing ``day``."""
+    start, end = local_bounds(day, period)
+    return start - LOCAL_OFFSET, end - LOCAL_OFFSET
+
+
+@lru_cache(maxsize=256)
+def _edges(first: date, last: date, period: Period, utc: bool) -> np.ndarray:
+    starts = [period_start(first, period)]
+    while starts[-1] < last:
+        starts.append(shift(starts[-1], period))
+    edges = np.array(starts, dtype="datetime64[D]").astype("datetime64[us]")
+    if utc:
+        edges = edges - np.timedelta64(int(LOCAL_OFFSET.total_seconds()), "s")
+    edges.flags.writeable = False
+    return edges
+
+
+def bucket_edges(
+    first: date, last: date, period: Period = "day", *, utc: bool = True
+) -> np.ndarray:
+    """
+    Edges of the local periods covering days ``[first, last)``.
+
+    ``datetime64[us]`` array of ``n + 1`` edges for ``n`` periods: the
+    start of the period containing ``first`` through the first period
+    start at or after ``last``. UTC by default, local with ``utc=False``.
+    """
+    return _edges(first, max(last, first + timedelta(days=1)), period, utc)
+
+
+def assign_buckets(times: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Period index of each timestamp (same time base as ``edges``), -1 outside."""
+    index = np.searchsorted(edges, times, side="right") - 1
+    return np.where((index >= 0) & (index < len(edges) - 1), index, -1)
+
+
+def period_filter(
+    column: ColumnElement[datetime], day: date, period: Period = "day"
+) -> ColumnElement[Any]:
+    """Sargable ``column >= start AND column < end`` for a UTC column and a local period."""
+    start, end = utc_bounds(day, period)
+    return and_(column >= start, column < end)
@@ -5,6 +5,9 @@ from datetime import datetime, timedelta, timezone
 TZ_UTC8 = timezone(timedelta(hours=8))
 TZ_UTC = timezone.utc
 
+# Local minus UTC, for arithmetic on the naive UTC times the databases store
+LOCAL_OFFSET = TZ_UTC8.utcoffset(None)
+
 
 def utc_to_local(dt: datetime | None) -> datetime | None:
     """
@@ -0,0 +1 @@
+"""Benchmarks that run against the configured MySQL/Redis servers."""
@@ -0,0 +1,129 @@
+"""
+Compare the aiomysql and asyncmy drivers on SolarHub-shaped reads.
+
+Seeds a scratch database on a local MySQL-compatible server (MySQL or
+MariaDB) with copies of the ``INVERTER_1`` (wide rows) and ``MMAIN``
+(long time series) tables, then fetches them through each driver and
+reports rows/s and p50/p99 latency per fetch.
+
+Usage (from fastapi_backend/):
+    python -m benchmarks.drivers --rows 20000 --repeat 20
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Float,
+    Integer,
+    MetaData,
+    Table,
+    insert,
+    make_url,
+    select,
+    text,
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core.config import settings
+from app.models import Inverter, MainMeter
+
+DRIVERS = ("aiomysql", "asyncmy")
+
+
+def _engine(driver: str, database: str | None) -> AsyncEngine:
+    url = make_url(settings.database_url_meter).set(
+        drivername=f"mysql+{driver}", database=database
+    )
+    return create_async_engine(url, pool_size=1, max_overflow=0)
+
+
+def _fake_value(column, i: int, start: datetime):
+    if isinstance(column.type, DateTime):
+        return start + timedelta(seconds=i)
+    if isinstance(column.type, (BigInteger, Integer)):
+        return i if column.primary_key else random.randint(0, 1000)
+    if isinstance(column.type, Float):
+        return random.uniform(-1000.0, 1000.0)
+    return None
+
+
+async def seed(database: str, tables: list[Table], rows: int) -> None:
+    """(Re)create the scratch tables and fill them with synthetic rows."""
+    admin = _engine("aiomysql", None)
+    async with admin.begin() as conn:
+        await conn.execute(text(f"CREATE DATABASE IF NOT EXISTS `{database}`"))
+    await admin.dispose()
+
+    engine = _engine("aiomysql", database)
+    start = datetime(2024, 1, 1)
+    async with engine.begin() as conn:
+        for table in tables:
+            await conn.run_sync(table.drop, checkfirst=True)
+            await conn.run_sync(table.create)
+            for offset in range(0, rows, 1000):
+                batch = [
+                    {c.name: _fake_value(c, i, start) for c in table.columns}
+                    for i in range(offset + 1, min(offset + 1000, rows) + 1)
+                ]
+                await conn.execute(insert(table), batch)
+    await engine.dispose()
+
+
+async def measure(driver: str, database: str, table: Table, repeat: int) -> dict:
+    """Fetch a whole table ``repeat`` times through one driver."""
+    engine = _engine(driver, database)
+    latencies: list[float] = []
+    rows = 0
+    async with engine.connect() as conn:
+        await conn.execute(select(table).limit(1))  # warm up
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = await conn.execute(select(table).order_by(table.c.item))
+            rows = len(result.all())
+            latencies.append(time.perf_counter() - started)
+    await engine.dispose()
+
+    latencies.sort()
+    return {
+        "driver": driver,
+        "table": table.name,
+        "rows": rows,
+        "rows_per_s": round(rows / statistics.mean(latencies)),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database", default="solarhub_driver_bench")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse existing tables")
+    args = parser.parse_args()
+
+    metadata = MetaData()
+    tables = [
+        Inverter.__table__.to_metadata(metadata),  # wide rows
+        MainMeter.__table__.to_metadata(metadata),  # long time series
+    ]
+    if not args.skip_seed:
+        await seed(args.database, tables, args.rows)
+
+    for table in tables:
+        for driver in DRIVERS:
+            r = await measure(driver, args.database, table, args.repeat)
+            print(
+                f"{r['table']:>10} {r['driver']:>9}: {r['rows_per_s']:>9} rows/s  "
+                f"p50={r['p50_ms']}ms  p99={r['p99_ms']}ms  ({r['rows']} rows)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Compare per-database and per-host connection pool layouts.
+
+Runs concurrent ``SELECT 1`` sessions spread across databases under each
+``DB_POOL_MODE`` and reports throughput, latency percentiles and the
+number of server connections opened.
+
+Usage (from fastapi_backend/):
+    python -m benchmarks.pool_layout --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import get_args
+
+from sqlalchemy import event, text
+
+from app.core.config import settings
+from app.db.session import DatabaseManager, DatabaseName
+
+
+async def run_layout(
+    mode: str,
+    databases: list[DatabaseName],
+    requests: int,
+    concurrency: int,
+) -> dict:
+    """Run the workload under one pool mode and collect stats."""
+    settings.db_pool_mode = mode
+    manager = DatabaseManager()
+    connections = 0
+
+    def count_connect(dbapi_connection, connection_record) -> None:
+        nonlocal connections
+        connections += 1
+
+    # Create engines up front so the connect counter sees every pool
+    pools = set()
+    for db in databases:
+        engine = manager.get_engine(db, read_only=True)
+        if id(engine.sync_engine.pool) not in pools:
+            pools.add(id(engine.sync_engine.pool))
+            event.listen(engine.sync_engine.pool, "connect", count_connect)
+
+    latencies: list[float] = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            try:
+                async with manager.session(databases[i % len(databases)], read_only=True) as s:
+                    await s.execute(text("SELECT 1"))
+            except Exception:
+                errors += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await manager.close_all()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "pools": len(pools),
+        "connections": connections,
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2) if latencies else None,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--databases",
+        nargs="*",
+        default=list(get_args(DatabaseName)),
+        help="Databases to spread sessions over (default: all)",
+    )
+    args = parser.parse_args()
+
+    for mode in ("per_database", "per_host"):
+        result = await run_layout(mode, args.databases, args.requests, args.concurrency)
+        print(
+            f"{result['mode']:>12}: {result['throughput']:>8} req/s  "
+            f"p50={result['p50_ms']}ms  p99={result['p99_ms']}ms  "
+            f"pools={result['pools']}  connections={result['connections']}  "
+            f"errors={result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
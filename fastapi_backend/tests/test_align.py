@@ -0,0 +1,41 @@
+"""As-of alignment tests."""
+import numpy as np
+
+from app.analytics.align import asof_indices, merge_asof
+
+T0 = np.datetime64("2024-01-01T00:00:00", "us")
+SECOND = np.timedelta64(1, "s")
+RIGHT = T0 + np.array([0, 10, 20]) * SECOND
+LEFT = T0 + np.array([-1, 3, 8, 10, 25]) * SECOND
+
+
+def test_directions():
+    assert asof_indices(LEFT, RIGHT, direction="backward").tolist() == [-1, 0, 0, 1, 2]
+    assert asof_indices(LEFT, RIGHT, direction="forward").tolist() == [0, 1, 1, 1, -1]
+    assert asof_indices(LEFT, RIGHT, direction="nearest").tolist() == [0, 0, 1, 1, 2]
+
+
+def test_tolerance_and_empty_right():
+    tolerance = 3 * SECOND
+    assert asof_indices(LEFT, RIGHT, tolerance, "backward").tolist() == [-1, 0, -1, 1, -1]
+    assert asof_indices(LEFT, RIGHT[:0], tolerance).tolist() == [-1] * 5
+
+    aligned = merge_asof(LEFT, RIGHT, {"f": np.array([59.9, 60.0, 60.1])}, tolerance, "nearest")
+    assert np.isnan(aligned["f"][4])
+    assert aligned["f"][:4].tolist() == [59.9, 59.9, 60.0, 60.0]
+
+
+def test_full_day_matches_brute_force():
+    rng = np.random.default_rng(0)
+    meter = T0 + np.arange(86_400) * SECOND + rng.integers(0, 300_000, 86_400).astype(
+        "timedelta64[us]"
+    )
+    baseline = T0 + np.arange(0, 86_400, 2) * SECOND
+    values = rng.normal(60, 0.02, len(baseline))
+
+    aligned = merge_asof(meter, baseline, {"f": values}, 2 * SECOND, "nearest")["f"]
+
+    sample = rng.integers(0, len(meter), 200)
+    for i in sample:
+        nearest = np.argmin(np.abs(baseline - meter[i]))
+        assert aligned[i] == values[nearest]
@@ -110,3 +110,25 @@ async def test_get_freq_power_select_time_mode(client: AsyncClient):
     )
     data = check_response_or_skip(response)
     assert data["select_mode"] == "selectTimeMode"
+
+
+@pytest.mark.asyncio
+async def test_get_excursions(client: AsyncClient):
+    """Test excursion endpoint returns correct structure."""
+    response = await client.get("/api/v1/analysis/excursions?direction=under&limit=10")
+    data = check_response_or_skip(response)
+
+    assert data["direction"] == "under"
+    assert data["source"] in ("memory", "database")
+    assert isinstance(data["data"], list)
+    assert data["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_get_excursions_rejects_empty_range(client: AsyncClient):
+    """Test excursions requires start_time before end_time."""
+    response = await client.get(
+        "/api/v1/analysis/excursions"
+        "?start_time=2024-01-02T00:00:00&end_time=2024-01-01T00:00:00"
+    )
+    check_response_or_skip_multi(response, [422])
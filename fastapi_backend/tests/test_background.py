@@ -0,0 +1,171 @@
+"""Background job coordination tests: leader lock, table checks, gates."""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.background import LeaderLock, RequiredTables
+from app.utils.periodic import PeriodicTask
+
+
+class _LockServer:
+    """MySQL named locks as seen by several connections."""
+
+    def __init__(self):
+        self.owners: dict[str, object] = {}
+        self.dialect = SimpleNamespace(name="mysql")
+
+    async def connect(self):
+        return _LockConnection(self)
+
+
+class _LockConnection:
+    def __init__(self, server: _LockServer):
+        self.server = server
+
+    async def scalar(self, statement, params):
+        name, sql = params["name"], str(statement)
+        if "GET_LOCK" in sql:
+            owner = self.server.owners.setdefault(name, self)
+            return int(owner is self)
+        assert "IS_USED_LOCK" in sql
+        return int(self.server.owners.get(name) is self)
+
+    async def execute(self, statement, params):
+        assert "RELEASE_LOCK" in str(statement)
+        self._release()
+
+    def _release(self):
+        for name, owner in list(self.server.owners.items()):
+            if owner is self:
+                del self.server.owners[name]
+
+    async def invalidate(self):
+        self._release()
+
+    async def close(self):
+        self._release()
+
+
+class _Manager:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def get_engine(self, db_name, read_only=False):
+        return self.engine
+
+
+async def test_only_one_process_leads_until_it_releases():
+    """The first worker takes the lock; the others wait and take over on release."""
+    server = _LockServer()
+    first = LeaderLock(_Manager(server), "jobs", retry=0)
+    second = LeaderLock(_Manager(server), "jobs", retry=0)
+
+    assert await first.acquire()
+    assert not await second.acquire()
+    assert await first.acquire()  # Re-checked on the held connection
+
+    await first.release()
+    assert not first.is_leader
+    assert await second.acquire()
+    assert not await first.acquire()
+
+
+async def test_leader_check_is_cached_for_retry_seconds():
+    """A follower does not hit the database on every tick."""
+    server = _LockServer()
+    leader = LeaderLock(_Manager(server), "jobs", retry=0)
+    follower = LeaderLock(_Manager(server), "jobs", retry=60)
+    assert await leader.acquire()
+    assert not await follower.acquire()
+
+    await leader.release()
+    assert not await follower.acquire()  # Still cached
+
+
+async def test_lost_connection_hands_leadership_over():
+    """When the leader's connection dies, MySQL frees the lock for another worker."""
+    server = _LockServer()
+    first = LeaderLock(_Manager(server), "jobs", retry=0)
+    second = LeaderLock(_Manager(server), "jobs", retry=0)
+    assert await first.acquire()
+
+    server.owners.clear()  # Connection killed server-side
+    assert await second.acquire()
+    assert not await first.acquire()
+
+
+async def test_non_mysql_engines_always_lead():
+    engine = SimpleNamespace(dialect=SimpleNamespace(name="sqlite"))
+    assert await LeaderLock(_Manager(engine), "jobs", retry=0).acquire()
+
+
+async def test_required_tables_wait_and_warn_once(tmp_path, caplog):
+    """Missing tables hold the job back with one warning until they exist."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'meter.db'}")
+    tables = RequiredTables(
+        _Manager(engine), "meter", ["rollup"], job="Rollups", hint="create-tables", retry=0
+    )
+
+    with caplog.at_level(logging.WARNING, logger="app.db.background"):
+        assert not await tables.ready()
+        assert not await tables.ready()
+    assert len(caplog.records) == 1
+    assert "create-tables" in caplog.records[0].getMessage()
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE rollup (id INTEGER PRIMARY KEY)"))
+    assert await tables.ready()
+    await engine.dispose()
+
+
+async def test_required_tables_recheck_after_retry(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'meter.db'}")
+    tables = RequiredTables(
+        _Manager(engine), "meter", ["rollup"], job="Rollups", hint="create-tables", retry=60
+    )
+    assert not await tables.ready()
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE rollup (id INTEGER PRIMARY KEY)"))
+    assert not await tables.ready()  # Not checked again yet
+    await engine.dispose()
+
+
+@pytest.mark.parametrize("open_gate", [False, True])
+async def test_periodic_task_runs_only_through_its_gate(open_gate):
+    runs = []
+
+    async def job():
+        runs.append(1)
+
+    async def gate():
+        return open_gate
+
+    task = PeriodicTask("job", 0.01, job, gate=gate)
+    task.start()
+    await asyncio.sleep(0.05)
+    await task.stop()
+    assert bool(runs) is open_gate
+
+
+async def test_failing_task_backs_off_and_logs_traceback_once(caplog):
+    calls = []
+
+    async def job():
+        calls.append(1)
+        raise RuntimeError("table missing")
+
+    task = PeriodicTask("job", 0.01, job)
+    with caplog.at_level(logging.WARNING, logger="app.utils.periodic"):
+        task.start()
+        await asyncio.sleep(0.2)
+        await task.stop()
+
+    # Pauses of 20, 40, 80 ms... instead of a retry every 10 ms
+    assert 2 <= len(calls) <= 5
+    errors = [r for r in caplog.records if r.levelno == logging.ERROR]
+    assert len(errors) == 1 and errors[0].exc_info
+    assert all(r.levelno == logging.WARNING for r in caplog.records if r not in errors)
@@ -0,0 +1,98 @@
+"""Circuit breaker tests."""
+import pytest
+
+from app.db import circuit_breaker
+from app.db.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock."""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_threshold(clock):
+    """Breaker opens after N consecutive failures and fails fast."""
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10.0)
+
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count(clock):
+    """A success between failures resets the consecutive count."""
+    breaker = CircuitBreaker("test", failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.failures == 1
+
+
+def test_half_open_admits_single_probe(clock):
+    """After the reset timeout only one probe is admitted."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10.0)
+    breaker.record_failure()
+
+    clock[0] += 10.0
+    assert breaker.allow_request()
+    assert breaker.state == "half_open"
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_half_open_failure_reopens(clock):
+    """A failed probe re-opens the breaker for another timeout."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10.0)
+    breaker.record_failure()
+
+    clock[0] += 10.0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    clock[0] += 10.0
+    assert breaker.allow_request()
+
+
+def test_release_frees_probe_slot(clock):
+    """Releasing a probe without an outcome lets the next request probe."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=1.0)
+    breaker.record_failure()
+
+    clock[0] += 1.0
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+
+
+def test_is_available_does_not_reserve_probe(clock):
+    """is_available() reports open/closed without consuming the probe slot."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=5.0)
+    assert breaker.is_available()
+
+    breaker.record_failure()
+    assert not breaker.is_available()
+
+    clock[0] += 5.0
+    assert breaker.is_available()
+    assert breaker.is_available()
+    assert breaker.state == "open"
+
+    breaker.record_failure()
+    assert not breaker.is_available()
@@ -0,0 +1,110 @@
+"""Columnar fetch tests."""
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.db.columnar import ColumnBatch, fetch_columns, time_series_select
+from app.models.meter import MainMeter
+
+
+class FakeStreamResult:
+    def __init__(self, rows):
+        self._rows = rows
+        self.partition_sizes = []
+
+    async def partitions(self, size):
+        for i in range(0, len(self._rows), size):
+            chunk = self._rows[i : i + size]
+            self.partition_sizes.append(len(chunk))
+            yield chunk
+
+
+class FakeStreamingSession:
+    def __init__(self, rows):
+        self.result = FakeStreamResult(rows)
+        self.statement = None
+
+    @asynccontextmanager
+    async def stream(self, statement):
+        self.statement = statement
+        yield self.result
+
+
+async def test_fetch_columns_types_and_nulls():
+    """Datetimes land as datetime64, metrics as floats with NULL -> NaN."""
+    rows = [
+        (datetime(2024, 1, 1, 0, 0, 0), 1, 60.01),
+        (datetime(2024, 1, 1, 0, 0, 1), 2, None),
+        (None, 3, 59.98),
+    ]
+    db = FakeStreamingSession(rows)
+    statement = time_series_select(MainMeter.EventTime, MainMeter.item, MainMeter.Freq)
+
+    batch = await fetch_columns(db, statement, chunk_size=2, float_dtype=np.float32)
+
+    assert db.result.partition_sizes == [2, 1]
+    assert db.statement.get_execution_options()["yield_per"] == 2
+    assert batch.names == ["EventTime", "item", "Freq"]
+    assert batch["EventTime"].dtype == np.dtype("datetime64[us]")
+    assert np.isnat(batch["EventTime"][2])
+    assert batch["item"].dtype == np.int64
+    assert batch["Freq"].dtype == np.float32
+    assert np.isnan(batch["Freq"][1])
+
+
+async def test_fetch_columns_empty_result():
+    """An empty result still yields typed, zero-length columns."""
+    db = FakeStreamingSession([])
+    batch = await fetch_columns(db, time_series_select(MainMeter.EventTime, MainMeter.Freq))
+
+    assert len(batch) == 0
+    assert batch["EventTime"].dtype == np.dtype("datetime64[us]")
+    assert batch["Freq"].dtype == np.float64
+
+
+def test_pairs_are_chart_series():
+    """pairs() returns [[epoch_ms, value], ...] with NaN as None."""
+    batch = ColumnBatch(
+        {
+            "t": np.array(["2024-01-01T00:00:00", "2024-01-01T00:00:01"], "datetime64[us]"),
+            "v": np.array([1.5, np.nan]),
+        }
+    )
+    assert batch.pairs("t", "v") == [[1704067200000, 1.5], [1704067201000, None]]
+
+
+def test_column_lengths_must_match():
+    """Columns of different lengths are rejected."""
+    with pytest.raises(ValueError):
+        ColumnBatch({"a": np.zeros(2), "b": np.zeros(3)})
+
+
+def test_downsampled_series_share_rows():
+    """All columns are cut at the same rows, keeping both series' extremes."""
+    n = 86_400
+    rng = np.random.default_rng(0)
+    freq = 60.0 + rng.normal(0, 0.005, n)
+    kw = rng.normal(0, 10, n)
+    freq[40_000], kw[70_000] = 59.7, 500.0
+    baseline = np.where(np.arange(n) % 7 == 0, np.nan, 60.0)
+    batch = ColumnBatch(
+        {
+            "t": np.datetime64("2024-01-01T00:00:00", "us")
+            + np.arange(n) * np.timedelta64(1, "s"),
+            "Freq": freq,
+            "KW_tot": kw,
+            "baseline_freq": baseline,
+        }
+    )
+
+    small = batch.downsampled("t", ["Freq", "KW_tot"], 2000)
+
+    assert len(small) <= 2000
+    assert np.all(np.diff(small["t"]) > np.timedelta64(0))
+    assert small["Freq"].min() == 59.7 and small["KW_tot"].max() == 500.0
+    assert np.array_equal(
+        small["baseline_freq"], baseline[(small["t"] - batch["t"][0]) // np.timedelta64(1, "s")],
+        equal_nan=True,
+    )
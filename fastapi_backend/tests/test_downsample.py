@@ -0,0 +1,88 @@
+"""Chart downsampling tests."""
+import numpy as np
+import pytest
+
+from app.analytics.downsample import downsample, lttb_indices, minmax_indices
+
+
+def _series(n=86_400, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=np.int64) * 1000
+    y = 60.0 + rng.normal(0, 0.005, n)
+    return x, y
+
+
+def test_short_series_unchanged():
+    x, y = _series(100)
+    out_x, out_y = downsample(x, y, 500)
+    assert np.array_equal(out_x, x)
+    assert np.array_equal(out_y, y)
+    assert len(downsample(x, y, 0)[0]) == 100
+
+
+def test_lttb_keeps_budget_endpoints_and_excursion():
+    x, y = _series()
+    y[40_000] = 59.75  # one-second under-frequency dip
+    y[50_000] = 60.20
+
+    out_x, out_y = downsample(x, y, 1000)
+
+    assert len(out_x) <= 1000
+    assert out_x[0] == x[0] and out_x[-1] == x[-1]
+    assert np.all(np.diff(out_x) > 0)
+    assert out_y.min() == 59.75
+    assert out_y.max() == 60.20
+
+
+def test_nan_gaps_are_kept_as_breaks():
+    x, y = _series(10_000)
+    y[3000:4000] = np.nan
+
+    out_x, out_y = downsample(x, y, 200)
+
+    gap = np.flatnonzero(np.isnan(out_y))
+    assert len(gap) == 1
+    assert out_x[gap[0]] == x[3000]
+    assert out_x[gap[0] - 1] == x[2999]
+    assert out_x[gap[0] + 1] == x[4000]
+    assert len(out_x) <= 201
+
+
+def test_minmax_envelope_and_lttb_indices():
+    y = np.array([0, 5, 1, 2, -3, 2, 0, 9], dtype=float)
+    assert minmax_indices(y, 4).tolist() == [0, 1, 4, 7]
+
+    x = np.arange(len(y), dtype=float)
+    picked = lttb_indices(x, y, 4)
+    assert picked[0] == 0 and picked[-1] == len(y) - 1
+    assert len(picked) == 4
+
+    out_x, out_y = downsample(x, y, 4, method="minmax")
+    assert out_y.tolist() == [0, 5, -3, 9]
+
+
+@pytest.mark.parametrize("every", [2, 50])
+def test_budget_holds_with_many_gaps(every):
+    """Frequent NaNs never push the output past max_points."""
+    x, y = _series()
+    y[::every] = np.nan
+    y[20_000:30_000] = np.nan
+
+    out_x, out_y = downsample(x, y, 2000)
+
+    assert len(out_x) <= 2000
+    assert np.all(np.diff(out_x) > 0)
+    # The long outage is still a break; the one-sample holes are bridged
+    gap = np.flatnonzero(np.isnan(out_y))
+    assert len(gap) == 1
+    assert out_x[gap[0]] <= x[20_000] and out_x[gap[0] + 1] >= x[30_000]
+
+
+def test_budget_is_split_by_run_length():
+    x, y = _series(10_000)
+    y[9000:9500] = np.nan
+
+    out_x, _ = downsample(x, y, 400)
+
+    assert len(out_x) <= 400
+    assert np.count_nonzero(out_x < x[9000]) > 8 * np.count_nonzero(out_x > x[9500])
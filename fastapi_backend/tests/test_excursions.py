@@ -0,0 +1,108 @@
+"""Frequency excursion detector tests."""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.analytics.excursions import Excursion, ExcursionDetector, ExcursionIndex
+from app.services import excursions
+from app.services.excursions import ExcursionMonitor
+
+START = np.datetime64("2024-01-01T00:00:00", "us")
+
+
+def _stream():
+    # 1-second samples: a dip to 59.9 Hz with noise around the entry threshold
+    freq = np.full(120, 60.0)
+    freq[10:13] = [59.979, 59.97, 59.984]  # Inside the hysteresis band: stays in
+    freq[13:40] = 59.95
+    freq[25] = 59.9
+    freq[40] = 59.99  # Back inside exit_hz
+    freq[70:80] = 60.05
+    kw = np.where(freq < 60.0, 500.0, 0.0)
+    kw[70:80] = -300.0
+    times = START + np.arange(len(freq)) * np.timedelta64(1, "s")
+    return times, freq, kw
+
+
+def _same(a: Excursion, b: Excursion) -> bool:
+    return a.__dict__ == {**b.__dict__, "energy_kwh": pytest.approx(a.energy_kwh)}
+
+
+def test_hysteresis_events():
+    times, freq, kw = _stream()
+    under, over = ExcursionDetector().update(times, freq, kw)
+
+    assert under.direction == "under"
+    assert under.start == datetime(2024, 1, 1, 0, 0, 10)
+    assert under.end == datetime(2024, 1, 1, 0, 0, 40)
+    assert under.duration_s == 30.0
+    assert under.extreme_freq == 59.9
+    assert under.sample_count == 30
+    assert np.isclose(under.energy_kwh, 500.0 * 30 / 3600)
+
+    assert over.direction == "over"
+    assert over.extreme_freq == 60.05
+    assert over.peak_kw == -300.0
+
+
+def test_batches_match_single_pass():
+    times, freq, kw = _stream()
+    whole = ExcursionDetector().update(times, freq, kw)
+
+    detector = ExcursionDetector()
+    closed: list[Excursion] = []
+    for a, b in [(0, 11), (11, 12), (12, 30), (30, 41), (41, 75), (75, 120)]:
+        closed += [e for e in detector.update(times[a:b], freq[a:b], kw[a:b]) if not e.is_open]
+    assert len(closed) == len(whole)
+    assert all(_same(a, b) for a, b in zip(closed, whole, strict=True))
+    assert detector.open_excursion is None
+
+
+def test_open_excursion_carried_and_resumed():
+    times, freq, kw = _stream()
+    first = ExcursionDetector().update(times[:20], freq[:20], kw[:20])
+    assert len(first) == 1 and first[0].is_open
+
+    # A new detector resumed from the stored open event closes it identically
+    detector = ExcursionDetector()
+    detector.resume(first[0])
+    rest = detector.update(times[20:], freq[20:], kw[20:])
+    assert _same(rest[0], ExcursionDetector().update(times, freq, kw)[0])
+
+
+def test_index_query_and_coverage():
+    index = ExcursionIndex(size=3)
+    base = datetime(2024, 1, 1)
+
+    def event(minute, direction="under"):
+        start = base + timedelta(minutes=minute)
+        return Excursion(direction, start, None, start, 59.9, 0.0, 0.0, 1)
+
+    for minute in range(4):
+        index.upsert(event(minute))
+    index.upsert(event(3).__class__(**{**event(3).__dict__, "sample_count": 5}))
+
+    assert len(index) == 3
+    assert index.oldest == base + timedelta(minutes=1)
+    assert index.covers(base + timedelta(seconds=30)) is True
+    assert index.covers(base) is False
+    events = index.query(base, base + timedelta(minutes=10))
+    assert [e.start.minute for e in events] == [3, 2, 1]
+    assert events[0].sample_count == 5
+    assert index.query(base, base + timedelta(minutes=10), direction="over") == []
+
+
+async def test_follower_monitor_serves_from_the_table(monkeypatch):
+    """A worker that loses the leader lock drops its detector, so queries use the table."""
+
+    async def follower():
+        return False
+
+    monkeypatch.setattr(excursions.background_leader, "acquire", follower)
+    monitor = ExcursionMonitor(db=None)
+    monitor._detector = ExcursionDetector(enter_hz=0.02, exit_hz=0.015, max_gap_s=5)
+
+    assert not await monitor._can_run()
+    assert not monitor.ready
+    assert monitor.query(datetime(2024, 1, 1), datetime(2024, 1, 2)) is None
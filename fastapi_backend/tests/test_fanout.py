@@ -0,0 +1,74 @@
+"""BESS fan-out executor tests."""
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import literal, select
+
+from app.core.exceptions import DatabaseConnectionError
+from app.db.session import DatabaseManager
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    def __init__(self, db_name, delay):
+        self.db_name = db_name
+        self.delay = delay
+
+    async def execute(self, statement):
+        await asyncio.sleep(self.delay)
+        return FakeResult([(self.db_name,)])
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """DatabaseManager whose sessions are faked per database."""
+    manager = DatabaseManager()
+    delays = {"bess1": 0.05, "bess2": 0.05, "bess3": 0.05, "bess4": 1.0}
+    down = {"bess3"}
+
+    @asynccontextmanager
+    async def session(db_name, required=True, read_only=False, priority="live"):
+        if db_name in down:
+            raise DatabaseConnectionError(f"Database {db_name} unavailable")
+        yield FakeSession(db_name, delays.get(db_name, 0.0))
+
+    monkeypatch.setattr(manager, "session", session)
+    return manager
+
+
+async def test_fan_out_runs_concurrently_and_orders(manager):
+    """Units run concurrently; rows come back tagged and in unit order."""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    result = await manager.fan_out(lambda n: select(literal(n)), [2, 1])
+    elapsed = loop.time() - started
+
+    assert elapsed < 0.09
+    assert result.complete
+    assert result.rows == [(1, ("bess1",)), (2, ("bess2",))]
+
+
+async def test_fan_out_partial_results(manager):
+    """Down and slow units are reported without failing the fan-out."""
+    result = await manager.fan_out(
+        lambda n: select(literal(n)), [1, 3, 4], timeout=0.2
+    )
+
+    assert not result.complete
+    assert result.available == [1]
+    assert set(result.unavailable) == {3, 4}
+    assert "Timed out" in result.unavailable[4]
+
+
+async def test_fan_out_rejects_unknown_unit(manager):
+    """BESS numbers outside 1-12 are rejected."""
+    with pytest.raises(ValueError):
+        await manager.fan_out(lambda n: select(literal(n)), [13])
@@ -2,6 +2,9 @@
 import pytest
 from httpx import AsyncClient
 
+from app.db.health import HealthMonitor
+from app.db.redis import redis_manager
+from app.db.session import CONNECT_TIMEOUT, db_manager
 from tests.conftest import check_response_or_skip, check_response_or_skip_multi
 
 
@@ -79,3 +82,28 @@ async def test_readiness_check(client: AsyncClient):
     else:
         assert data["status"] == "not ready"
         assert "reason" in data
+
+
+@pytest.mark.asyncio
+async def test_health_detailed_reports_probe_results(client: AsyncClient):
+    """Test detailed health check exposes cached per-target probe results."""
+    response = await client.get("/health/detailed")
+    data = check_response_or_skip(response)
+
+    assert "checked_at" in data
+    assert "probe_duration_ms" in data
+    assert "scheduler" in data
+
+    db_checks = data["infrastructure"]["databases"]["checks"]
+    assert "bess12" in db_checks
+    for result in [*db_checks.values(), *data["infrastructure"]["redis"]["checks"].values()]:
+        assert "healthy" in result
+        assert "latency_ms" in result
+        assert "checked_at" in result
+
+
+def test_database_probes_outlast_connect_timeout():
+    """Database probes are never cancelled before the driver's connect timeout."""
+    monitor = HealthMonitor(db_manager, redis_manager, timeout=2.0)
+    assert monitor.database_timeout > CONNECT_TIMEOUT
+    assert HealthMonitor(db_manager, redis_manager, timeout=30.0).database_timeout == 30.0
@@ -1,7 +1,11 @@
 """Meter endpoint tests."""
+import fakeredis
 import pytest
 from httpx import AsyncClient
 
+from app.db.key_registry import register_keys
+from app.db.redis import get_redis
+from app.main import app
 from tests.conftest import check_response_or_skip, check_response_or_skip_multi
 
 
@@ -28,6 +32,31 @@ async def test_get_meter_info_empty_when_no_redis(client: AsyncClient):
     assert data["meter_count"] == len(data["meters"])
 
 
+@pytest.mark.asyncio
+async def test_get_meter_info_reads_registered_meters(client: AsyncClient):
+    """Meters are read from the "meter" key registry, not the whole keyspace."""
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    await redis.hset("meter_1", mapping={"KW_tot": "12.5", "Freq": "60.01"})
+    await redis.hset("meter_2", mapping={"KW_tot": "7.5"})
+    await redis.hset("meter_stale", mapping={"KW_tot": "100"})
+    await register_keys(redis, "meter", "meter_1", "meter_2")
+
+    async def override():
+        yield redis
+
+    app.dependency_overrides[get_redis] = override
+    try:
+        response = await client.get("/api/v1/meters")
+    finally:
+        app.dependency_overrides.pop(get_redis)
+        await redis.aclose()
+
+    data = response.json()
+    assert data["meter_count"] == 2
+    assert data["total_power"] == 20.0
+    assert data["meters"][0]["Freq"] == 60.01
+
+
 @pytest.mark.asyncio
 async def test_get_aux_meter_chart(client: AsyncClient):
     """Test auxiliary meter endpoint with chart data type."""
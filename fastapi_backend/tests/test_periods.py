@@ -0,0 +1,64 @@
+"""Local calendar period tests."""
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import mysql
+
+from app.models.meter import MainMeter
+from app.utils.periods import (
+    assign_buckets,
+    bucket_edges,
+    local_bounds,
+    period_filter,
+    utc_bounds,
+)
+
+
+def test_bounds_are_exact_half_open_ranges():
+    assert local_bounds(date(2024, 2, 10), "month") == (datetime(2024, 2, 1), datetime(2024, 3, 1))
+    assert local_bounds(date(2024, 12, 31), "month")[1] == datetime(2025, 1, 1)
+    # 2024-01-03 is a Wednesday; weeks start on Monday
+    assert local_bounds(date(2024, 1, 3), "week") == (datetime(2024, 1, 1), datetime(2024, 1, 8))
+    assert utc_bounds(date(2024, 1, 1)) == (datetime(2023, 12, 31, 16), datetime(2024, 1, 1, 16))
+
+
+def test_edges_and_assignment():
+    edges = bucket_edges(date(2024, 1, 15), date(2024, 3, 1), "month")
+    assert edges.tolist() == [
+        datetime(2023, 12, 31, 16),
+        datetime(2024, 1, 31, 16),
+        datetime(2024, 2, 29, 16),
+    ]
+    with pytest.raises(ValueError):
+        edges[0] = np.datetime64("2000-01-01")
+
+    times = np.array(
+        [
+            "2023-12-31T15:59:59",  # Before the first local month
+            "2023-12-31T16:00:00",  # 2024-01-01 00:00 local
+            "2024-01-31T15:59:59",
+            "2024-01-31T16:00:00",  # 2024-02-01 00:00 local
+            "2024-02-29T16:00:00",  # 2024-03-01 00:00 local, past the last edge
+        ],
+        dtype="datetime64[us]",
+    )
+    assert assign_buckets(times, edges).tolist() == [-1, 0, 0, 1, -1]
+
+
+def test_local_edges_and_days():
+    edges = bucket_edges(date(2024, 1, 1), date(2024, 1, 4), utc=False)
+    assert len(edges) == 4
+    assert edges[0] == np.datetime64("2024-01-01T00:00")
+
+
+def test_period_filter_is_sargable():
+    sql = str(
+        period_filter(MainMeter.EventTime, date(2024, 1, 1)).compile(
+            dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+    assert sql == (
+        "`MMAIN`.`EventTime` >= '2023-12-31 16:00:00' "
+        "AND `MMAIN`.`EventTime` < '2024-01-01 16:00:00'"
+    )
@@ -0,0 +1,230 @@
+"""Query budget and cancellation tests."""
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.exc import OperationalError
+
+from app.api.v1.router import cancellable
+from app.core.config import settings
+from app.core.exceptions import QueryTimeoutError, SolarHubException, solarhub_exception_handler
+from app.db import session as session_module
+from app.db.session import DatabaseManager, query_budget_var
+
+
+class FakeConnection:
+    def __init__(self):
+        self.invalidated = False
+
+    async def get_raw_connection(self):
+        return SimpleNamespace(info={"mysql_thread_id": 42})
+
+    async def invalidate(self):
+        self.invalidated = True
+
+
+class FakeSession:
+    def __init__(self):
+        self.conn = FakeConnection()
+        self.execution_options = None
+
+    async def connection(self, execution_options=None):
+        self.execution_options = execution_options
+        return self.conn
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """DatabaseManager with fake sessions and a recorded KILL QUERY."""
+    manager = DatabaseManager()
+    manager.sessions = []
+    manager.killed = []
+
+    def factory():
+        fake = FakeSession()
+        manager.sessions.append(fake)
+        return fake
+
+    async def kill_query(db_name, thread_id):
+        manager.killed.append((db_name, thread_id))
+
+    monkeypatch.setattr(manager, "get_session_factory", lambda db, read_only=False: factory)
+    monkeypatch.setattr(manager, "_kill_query", kill_query)
+    monkeypatch.setattr(session_module, "_DEADLINE_GRACE", 0.0)
+    return manager
+
+
+def test_max_execution_time_hint():
+    """SELECTs under a budget get the optimizer hint; other statements do not."""
+    context = SimpleNamespace(execution_options={"max_execution_time_ms": 1500})
+    hint = session_module._apply_max_execution_time
+
+    statement, _ = hint(None, None, "SELECT a FROM t", {}, context, False)
+    assert statement == "SELECT /*+ MAX_EXECUTION_TIME(1500) */ a FROM t"
+
+    statement, _ = hint(None, None, "UPDATE t SET a = 1", {}, context, False)
+    assert statement == "UPDATE t SET a = 1"
+
+    no_budget = SimpleNamespace(execution_options={})
+    statement, _ = hint(None, None, "SELECT 1", {}, no_budget, False)
+    assert statement == "SELECT 1"
+
+
+async def test_budget_overrun_raises_504_and_kills(manager):
+    """A query running past its budget is killed and surfaces as 504."""
+    query_budget_var.set(0.05)
+
+    with pytest.raises(QueryTimeoutError) as exc_info:
+        async with manager.session("meter", read_only=True):
+            await asyncio.sleep(1)
+    await asyncio.sleep(0)
+
+    assert exc_info.value.status_code == 504
+    assert manager.sessions[0].execution_options == {"max_execution_time_ms": 50}
+    assert manager.sessions[0].conn.invalidated
+    assert manager.killed == [("meter", 42)]
+    assert manager.get_breaker("meter").state == "closed"
+
+
+async def test_server_side_timeout_maps_to_504(manager):
+    """MySQL's MAX_EXECUTION_TIME error is a timeout, not an outage."""
+    query_budget_var.set(5.0)
+    error = OperationalError("SELECT", {}, Exception(3024, "Query execution was interrupted"))
+
+    with pytest.raises(QueryTimeoutError):
+        async with manager.session("meter", read_only=True):
+            raise error
+
+    assert manager.get_breaker("meter").failures == 0
+    assert manager.killed == []
+
+
+async def test_cancellation_kills_query(manager):
+    """Cancelling the request (client disconnect) kills the running query."""
+    query_budget_var.set(0)
+
+    async def handler():
+        async with manager.session("pcs", read_only=True):
+            await asyncio.sleep(1)
+
+    task = asyncio.create_task(handler())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+
+    assert manager.sessions[0].execution_options is None
+    assert manager.killed == [("pcs", 42)]
+
+
+async def test_disconnect_cancels_endpoint_with_499(manager, monkeypatch, caplog):
+    """A client disconnect cancels only the endpoint: its query is killed, 499 is sent."""
+    monkeypatch.setattr(settings, "disconnect_poll_interval", 0.005)
+    query_budget_var.set(0)
+    app = FastAPI(dependencies=cancellable)
+    app.add_exception_handler(SolarHubException, solarhub_exception_handler)
+    outcome = []
+
+    @app.get("/slow")
+    async def slow():
+        try:
+            async with manager.session("pcs", read_only=True):
+                await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            outcome.append("cancelled")
+            raise
+        return {}
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    received = []
+    sent = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if loop.time() - started < 0.02:
+            await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/slow",
+        "raw_path": b"/slow",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    with caplog.at_level(logging.DEBUG):
+        await asyncio.wait_for(app(scope, receive, send), timeout=2)
+    await asyncio.sleep(0)
+
+    assert outcome == ["cancelled"]
+    assert sent[0]["status"] == 499
+    assert manager.killed == [("pcs", 42)]
+    assert asyncio.current_task().cancelling() == 0
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    assert "Client disconnected" in caplog.text
+
+
+async def test_cancelled_connect_frees_probe_slot(manager, monkeypatch):
+    """A half-open probe cancelled while connecting does not wedge the breaker."""
+    breaker = manager.get_breaker("meter")
+    monkeypatch.setattr(breaker, "reset_timeout", 0.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    async def slow_connection(self, execution_options=None):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(FakeSession, "connection", slow_connection)
+
+    async def probe():
+        async with manager.session("meter", read_only=True):
+            pass
+
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0.01)
+    assert breaker.state == "half_open"
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert breaker.allow_request()
+
+    # A driver-level connect timeout counts as a failure and re-opens
+    async def timed_out(self, execution_options=None):
+        raise TimeoutError
+
+    monkeypatch.setattr(FakeSession, "connection", timed_out)
+    breaker.release()
+    with pytest.raises(TimeoutError):
+        await probe()
+    assert breaker.state == "open"
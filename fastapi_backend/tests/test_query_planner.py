@@ -0,0 +1,99 @@
+"""Query planner guardrail tests."""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.core.exceptions import QueryTooLargeError
+from app.db.session import DatabaseManager
+from app.services.query_planner import (
+    estimate_points,
+    estimate_rows,
+    explain_rows,
+    fit_step,
+    plan,
+)
+from app.services.timeseries import TimeSeriesQuery
+
+# 2024-01-01 00:00 local time
+MIDNIGHT = datetime(2023, 12, 31, 16)
+
+
+def _query(metrics=("KW_tot",), aggregation="avg", step=0, days=1.0) -> TimeSeriesQuery:
+    end = MIDNIGHT + timedelta(days=days)
+    return TimeSeriesQuery.build("MMAIN", list(metrics), MIDNIGHT, end, aggregation, step)
+
+
+def test_estimates_from_cadence():
+    assert estimate_rows(_query()) == 86400
+    assert estimate_points(_query()) == 86400
+    assert estimate_points(_query(step=60)) == 1440
+    assert estimate_points(_query(step=3600)) == 24
+
+
+def test_fit_step_uses_ladder():
+    assert fit_step(86400, 2000) == 60
+    assert fit_step(86400, 100_000) == 1
+    assert fit_step(86400, 2000, minimum=120) == 120
+    assert fit_step(365 * 86400, 100) == 4 * 86400
+
+
+async def test_plan_keeps_queries_within_budget():
+    query_plan = await plan(_query(step=60), budget=2000)
+    assert query_plan.query.step == 60
+    assert query_plan.resolution == "bucket"
+    assert not query_plan.downsampled
+
+
+async def test_plan_downsamples_raw_request():
+    query_plan = await plan(_query(), budget=2000)
+    assert query_plan.query.step == 60
+    assert query_plan.requested_step == 0
+    assert query_plan.downsampled
+    assert query_plan.points <= 2000
+
+
+async def test_plan_rejects_without_downsampling():
+    with pytest.raises(QueryTooLargeError) as error:
+        await plan(_query(), budget=2000, downsample=False)
+    assert error.value.status_code == 413
+    assert "at least 60 s" in error.value.message
+
+
+async def test_plan_switches_long_ranges_to_rollups(monkeypatch):
+    monkeypatch.setattr(settings, "query_max_scan_rows", 1_000_000)
+    # 30 days of 1-second rows is 2.6M; hourly rollups answer KW_tot averages
+    query_plan = await plan(_query(days=30), budget=5000)
+    assert query_plan.resolution == "hourly"
+    assert query_plan.query.step == 3600
+    assert query_plan.scan_rows == 720
+
+    # Freq has no rollup column, so the same range is rejected
+    with pytest.raises(QueryTooLargeError):
+        await plan(_query(metrics=("Freq",), days=30), budget=5000)
+
+
+class _ExplainSession:
+    """Records the EXPLAIN statements it is asked to run."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement))
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: [{"rows": 1200}]))
+
+
+@pytest.mark.parametrize("pool_mode", ["per_database", "per_host"])
+async def test_explain_addresses_the_source_database(monkeypatch, pool_mode):
+    """Under per_host pools the EXPLAINed tables are qualified with the database name."""
+    monkeypatch.setattr(settings, "db_pool_mode", pool_mode)
+    monkeypatch.setattr("app.services.query_planner.db_manager", DatabaseManager())
+    db = _ExplainSession()
+
+    assert await explain_rows(db, _query(step=60)) == 1200
+
+    table = f"`{settings.db_name_meter}`.`MMAIN`" if pool_mode == "per_host" else "`MMAIN`"
+    assert f"FROM {table}" in db.statements[0]
+    assert "SCHEMA__" not in db.statements[0]
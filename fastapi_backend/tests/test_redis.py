@@ -0,0 +1,225 @@
+"""Redis scan, key registry and lazy handle tests (fakeredis)."""
+import json
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError
+
+from app.db.key_registry import (
+    KeyRegistryReconciler,
+    reconcile,
+    register_keys,
+    registered_keys,
+    unregister_keys,
+)
+from app.db.redis import (
+    LazyRedis,
+    RedisManager,
+    _fetch_page_lua,
+    _fetch_page_pipelined,
+    redis_scan,
+    registry_key,
+)
+
+
+@pytest.fixture
+async def redis():
+    """In-memory Redis with a mix of hash, JSON, plain string and list keys."""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    for i in range(1, 6):
+        await client.hset(f"meter_{i}", mapping={"kw": str(i * 10), "freq": "60.0"})
+    await client.set("meter_json", json.dumps({"kw": 7}))
+    await client.set("meter_text", "offline")
+    await client.set("meter_empty", "")
+    await client.rpush("meter_list", "ignored")
+    await client.hset("other_1", mapping={"kw": "1"})
+    yield client
+    await client.aclose()
+
+
+async def _fetch_page_per_key(redis, keys):
+    """The original fetch: TYPE, then HGETALL or GET, one round trip per key."""
+    results = []
+    for key in keys:
+        key_type = await redis.type(key)
+        if key_type == "hash":
+            results.append(await redis.hgetall(key))
+        elif key_type == "string":
+            value = await redis.get(key)
+            try:
+                results.append(json.loads(value) if value else {})
+            except json.JSONDecodeError:
+                results.append({"value": value})
+    return results
+
+
+@pytest.mark.parametrize("fetch_page", [_fetch_page_pipelined, _fetch_page_lua])
+async def test_batched_fetch_matches_per_key(redis, fetch_page):
+    """Pipelined and Lua page fetches return what per-key fetching did, in order."""
+    keys = sorted(await redis.keys("meter_*"))
+    assert await fetch_page(redis, keys) == await _fetch_page_per_key(redis, keys)
+
+
+@pytest.mark.parametrize("use_lua", [False, True])
+async def test_redis_scan_matches_per_key(redis, use_lua):
+    """redis_scan with batching covers the same keys as the per-key scan."""
+    results = await redis_scan(redis, "meter_*", count=3, use_lua=use_lua)
+    keys = [key async for key in redis.scan_iter(match="meter_*", count=3)]
+    expected = await _fetch_page_per_key(redis, list(dict.fromkeys(keys)))
+    assert sorted(map(json.dumps, results)) == sorted(map(json.dumps, expected))
+    assert len(results) == 8  # Five hashes, three strings; the list is skipped
+
+
+@pytest.mark.parametrize("fetch_page", [_fetch_page_pipelined, _fetch_page_lua])
+async def test_keys_expired_before_fetch_are_skipped(redis, fetch_page):
+    """A key SCAN returned but that expired before the fetch is dropped."""
+    keys = ["meter_1", "meter_gone", "meter_json"]
+    assert await fetch_page(redis, keys) == await _fetch_page_per_key(redis, keys)
+    assert len(await fetch_page(redis, keys)) == 2
+
+
+async def test_keys_expiring_between_round_trips(redis):
+    """Keys expiring after TYPE come back empty, as with per-key GET/HGETALL."""
+    doomed = ["meter_2", "meter_json"]
+
+    class Expiring:
+        """Deletes ``doomed`` just before the second (value) round trip."""
+
+        def __init__(self):
+            self.pipelines = 0
+
+        def __getattr__(self, name):
+            return getattr(redis, name)
+
+        def pipeline(self, transaction=True):
+            self.pipelines += 1
+            pipe = redis.pipeline(transaction=transaction)
+            if self.pipelines == 2:
+                execute = pipe.execute
+
+                async def execute_after_expiry(*args, **kwargs):
+                    await redis.delete(*doomed)
+                    return await execute(*args, **kwargs)
+
+                pipe.execute = execute_after_expiry
+            return pipe
+
+    results = await _fetch_page_pipelined(Expiring(), ["meter_1", "meter_2", "meter_json"])
+    assert results == [{"kw": "10", "freq": "60.0"}, {}, {}]
+
+
+async def test_register_and_unregister_keys(redis):
+    """Writers add and remove keys; readers get them sorted."""
+    assert await register_keys(redis, "meter", "meter_2", "meter_1")
+    assert await registered_keys(redis, "meter") == ["meter_1", "meter_2"]
+    assert await unregister_keys(redis, "meter", "meter_2")
+    assert await registered_keys(redis, "meter") == ["meter_1"]
+    assert not await register_keys(None, "meter", "meter_1")
+    with pytest.raises(ValueError):
+        await register_keys(redis, "nope", "x")
+
+
+async def test_reconcile_rebuilds_registry_from_scan(redis):
+    """Reconcile replaces stale members with exactly the keys matching the pattern."""
+    await register_keys(redis, "meter", "meter_stale", "meter_1")
+    assert await reconcile(redis, "meter", count=2) == 9
+    members = await registered_keys(redis, "meter")
+    assert "meter_stale" not in members
+    assert "other_1" not in members
+    assert members == sorted(await redis.keys("meter_*"))
+    assert not await redis.exists(f"{registry_key('meter')}:reconcile")
+
+    # No matching keys left: the registry is dropped, not left stale
+    await redis.delete(*members)
+    assert await reconcile(redis, "meter") == 0
+    assert not await redis.exists(registry_key("meter"))
+
+
+async def test_reconcile_all_uses_each_class_server(redis):
+    """Each device class is reconciled on its own server."""
+
+    class Manager:
+        def get_main_client(self):
+            return redis
+
+        def get_gtr_client(self):
+            return gtr
+
+    gtr = fakeredis.FakeAsyncRedis(decode_responses=True)
+    await gtr.hset("rack01_alert", mapping={"a": "1"})
+    await gtr.hset("bess1_rack01", mapping={"soc": "50"})
+    counts = await KeyRegistryReconciler(Manager(), interval=60).reconcile_all()
+    assert counts == {"meter": 9, "rack_alert": 1, "bess_rack": 1}
+    await gtr.aclose()
+
+
+async def test_scan_by_registry_honours_pattern(redis):
+    """A registry read returns only members matching the pattern, like SCAN would."""
+    for rack in ("rack01", "rack02", "rack10"):
+        await redis.hset(f"{rack}_alert", mapping={"rack": rack})
+    await reconcile(redis, "rack_alert")
+
+    assert await redis_scan(redis, "rack01_alert", by_registry="rack_alert") == [
+        {"rack": "rack01"}
+    ]
+    racks = await redis_scan(redis, "rack0?_alert", by_registry="rack_alert")
+    assert racks == [{"rack": "rack01"}, {"rack": "rack02"}]
+    assert await redis_scan(redis, "rack*_alert", by_registry="rack_alert", count=1) == [
+        {"rack": "rack01"},
+        {"rack": "rack02"},
+        {"rack": "rack10"},
+    ]
+
+
+async def test_scan_by_empty_registry_falls_back_to_scan(redis):
+    """Until the registry is populated, keys are found by SCAN."""
+    results = await redis_scan(redis, "meter_?", by_registry="meter")
+    assert len(results) == 5
+
+
+class _CountingManager(RedisManager):
+    """RedisManager handing out one fakeredis client and counting lookups."""
+
+    def __init__(self, server: fakeredis.FakeServer):
+        super().__init__()
+        self.fake = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        self.lookups = 0
+
+    def get_client(self, server: str = "main"):
+        self.lookups += 1
+        return self.fake
+
+
+async def test_lazy_handle_does_not_connect_until_first_command():
+    """Creating a handle does no I/O; the first command connects and is tracked."""
+    server = fakeredis.FakeServer()
+    manager = _CountingManager(server)
+    handle = LazyRedis("main", manager)
+    assert manager.lookups == 0
+    assert not manager.is_connected("main")
+
+    assert await handle.set("k", "v")
+    assert await handle.get("k") == "v"
+    assert manager.lookups == 1
+    assert manager.is_connected("main")
+
+
+async def test_lazy_handle_tracks_failures_and_pipelines():
+    """Connection errors from commands, pipelines and scripts feed the breaker."""
+    server = fakeredis.FakeServer()
+    manager = _CountingManager(server)
+    handle = LazyRedis("main", manager)
+
+    async with handle.pipeline(transaction=False) as pipe:
+        pipe.set("a", "1")
+        pipe.get("a")
+        assert await pipe.execute() == [True, "1"]
+    assert await handle.register_script("return 7")() == 7
+    assert manager.get_breaker("main").failures == 0
+
+    server.connected = False
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            await handle.get("a")
+    assert not manager.is_connected("main")
+    assert not manager.is_available("main")
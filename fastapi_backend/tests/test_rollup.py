@@ -0,0 +1,153 @@
+"""Energy rollup tests."""
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.exceptions import DataNotReadyError
+from app.db.base import Base
+from app.db.columnar import ColumnBatch
+from app.models.meter import AuxMeter, MainMeter
+from app.models.rollup import EnergyRollupHourly, RollupWatermark
+from app.services.rollup import bucket_samples, combine, local_day_bounds_utc, read_energy
+
+
+def _samples(times, kwh_del, kwh_rec, kw):
+    return ColumnBatch(
+        {
+            "item": np.arange(1, len(times) + 1, dtype=np.int64),
+            "EventTime": np.array(times, dtype="datetime64[us]"),
+            "KW_tot": np.array(kw, dtype=np.float64),
+            "KWH_del": np.array(kwh_del, dtype=np.float64),
+            "KWH_rec": np.array(kwh_rec, dtype=np.float64),
+        }
+    )
+
+
+def test_buckets_are_keyed_in_local_time():
+    """UTC 15:59/16:00 fall into local 23:00 and next-day 00:00 buckets."""
+    samples = _samples(
+        ["2024-01-01T15:59:00", "2024-01-01T15:59:59", "2024-01-01T16:00:00", None],
+        [10.0, 12.0, 12.5, 99.0],
+        [5.0, 5.0, np.nan, 99.0],
+        [100.0, np.nan, 300.0, 99.0],
+    )
+
+    buckets = bucket_samples("MMAIN", samples, "h")
+
+    assert [b.bucket_start for b in buckets] == [
+        datetime(2024, 1, 1, 23),
+        datetime(2024, 1, 2, 0),
+    ]
+    first = buckets[0]
+    assert first.delta_kwh_del == 2.0
+    assert first.delta_kwh_rec == 0.0
+    assert (first.min_kw, first.max_kw, first.avg_kw) == (100.0, 100.0, 100.0)
+    assert first.sample_count == 2
+    assert first.last_item == 2
+    assert buckets[1].delta_kwh_rec is None
+
+
+def test_incremental_merge_matches_single_pass():
+    """Folding a bucket in two batches equals aggregating it at once."""
+    times = [f"2024-01-01T02:00:{s:02d}" for s in range(6)]
+    kwh = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    kw = [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]
+    whole = bucket_samples("MMAIN", _samples(times, kwh, kwh, kw))[0]
+
+    first = bucket_samples("MMAIN", _samples(times[:4], kwh[:4], kwh[:4], kw[:4]))[0]
+    second = bucket_samples("MMAIN", _samples(times[4:], kwh[4:], kwh[4:], kw[4:]))[0]
+    merged = first.merge(second)
+
+    assert merged.delta_kwh_del == whole.delta_kwh_del == 5.0
+    assert merged.avg_kw == whole.avg_kw
+    assert (merged.min_kw, merged.max_kw) == (10.0, 60.0)
+    assert merged.sample_count == 6
+
+
+def test_daily_bucket_from_hours():
+    """A day combines its hours: first/last counters span the whole day."""
+    samples = _samples(
+        ["2023-12-31T16:30:00", "2024-01-01T03:00:00", "2024-01-01T15:30:00"],
+        [100.0, 150.0, 180.0],
+        [0.0, 10.0, 20.0],
+        [1.0, 2.0, 3.0],
+    )
+    hours = bucket_samples("MMAIN", samples, "h")
+    day = combine(hours, datetime(2024, 1, 1))
+
+    assert len(hours) == 3
+    assert day.bucket_start == datetime(2024, 1, 1)
+    assert day.delta_kwh_del == 80.0
+    assert day.delta_kwh_rec == 20.0
+    assert day.avg_kw == 2.0
+
+
+def test_local_day_bounds():
+    """A local day starts at 16:00 UTC the previous day."""
+    assert local_day_bounds_utc(date(2024, 1, 1)) == (
+        datetime(2023, 12, 31, 16),
+        datetime(2024, 1, 1, 16),
+    )
+
+
+@pytest.fixture
+async def meter_db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'meter.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+async def test_read_energy_computes_hours_past_the_watermark(meter_db):
+    """Hours before the watermark's hour come from the rollups, later ones from raw rows."""
+    # Local 2024-01-02 00:00-02:59 (UTC+8); the rollups are folded up to item 3 (local 01:00)
+    rows = [
+        (1, "16:00", 0.0),
+        (2, "16:30", 1.0),
+        (3, "17:00", 2.0),
+        (4, "17:30", 4.0),
+        (5, "18:00", 5.0),
+        (6, "18:30", 9.0),
+    ]
+    meter_rows = [
+        dict(item=item, EventTime=datetime.fromisoformat(f"2024-01-01T{hhmm}"), KWH_del=kwh)
+        for item, hhmm, kwh in rows
+    ]
+    aux_rows = [
+        dict(item=1, EventTime=datetime(2024, 1, 1, 16, 5), KWH_del=3.0),
+        dict(item=2, EventTime=datetime(2024, 1, 1, 16, 55), KWH_del=3.5),
+    ]
+    # Hour 1 is only partly folded, so its rollup must not be used
+    rollups = [
+        dict(source="MMAIN", bucket_start=datetime(2024, 1, 2, hour), last_kwh_del=kwh)
+        for hour, kwh in ((0, 100.0), (1, 50.0))
+    ]
+    await meter_db.execute(insert(MainMeter), meter_rows)
+    await meter_db.execute(insert(AuxMeter), aux_rows)
+    await meter_db.execute(insert(EnergyRollupHourly).values(first_kwh_del=0.0), rollups)
+    await meter_db.execute(insert(RollupWatermark), [dict(source="MMAIN", last_item=3)])
+    await meter_db.commit()
+
+    buckets = await read_energy(meter_db, "hourly", datetime(2024, 1, 2), datetime(2024, 1, 3))
+
+    main = {start.hour: bucket.delta_kwh_del for start, bucket in buckets["MMAIN"].items()}
+    assert main == {0: 100.0, 1: 2.0, 2: 4.0}
+    # No MAUX watermark: the whole range comes from raw rows
+    assert [b.delta_kwh_del for b in buckets["MAUX"].values()] == [0.5]
+
+    daily = await read_energy(meter_db, "daily", datetime(2024, 1, 2), datetime(2024, 1, 3))
+    assert daily["MMAIN"][datetime(2024, 1, 2)].delta_kwh_del == 9.0
+
+
+async def test_read_energy_without_rollup_tables(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'meter.db'}")
+    async with AsyncSession(engine) as session:
+        with pytest.raises(DataNotReadyError) as raised:
+            await read_energy(session, "daily", datetime(2024, 1, 1), datetime(2024, 2, 1))
+    assert raised.value.status_code == 503
+    await engine.dispose()
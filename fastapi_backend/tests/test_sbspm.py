@@ -0,0 +1,58 @@
+"""SBSPM calculator tests."""
+import numpy as np
+
+from app.analytics.sbspm import DregCurve, SbspmCalculator, hourly_totals
+
+CURVE = DregCurve(capacity_kw=1000.0)
+WINDOW = np.timedelta64(60, "s")
+
+
+def _stream(n=7200, seed=1):
+    rng = np.random.default_rng(seed)
+    # 2024-01-01 15:30 local time, 1-second samples
+    times = np.datetime64("2024-01-01T07:30:00", "us") + np.arange(n) * np.timedelta64(1, "s")
+    freq = 60.0 + rng.normal(0, 0.05, n)
+    kw = CURVE.required_kw(freq) + rng.normal(0, 40, n)
+    kw[rng.random(n) < 0.01] = np.nan
+    return times, freq, kw
+
+
+def test_curve_deadband_and_tolerance():
+    freq = np.array([60.0, 60.01, 59.75, 59.5, 60.25, 59.865])
+    assert np.allclose(CURVE.required_kw(freq), [0.0, 0.0, 1000.0, 1000.0, -1000.0, 500.0])
+
+    scores = CURVE.score(np.array([60.0, 60.0, 59.75, np.nan]), np.array([20.0, 50.0, 975.0, 0]))
+    assert scores[:3].tolist() == [1.0, 0.0, 1.0]
+    assert np.isnan(scores[3])
+
+
+def test_batches_match_single_pass_and_brute_force():
+    times, freq, kw = _stream()
+    whole = SbspmCalculator(CURVE, WINDOW).update(times, freq, kw)
+
+    calculator = SbspmCalculator(CURVE, WINDOW)
+    parts = [
+        calculator.update(times[a:b], freq[a:b], kw[a:b])
+        for a, b in [(0, 1), (1, 500), (500, 1799), (1799, 5000), (5000, len(times))]
+    ]
+    assert np.allclose(np.concatenate([p.roll for p in parts]), whole.roll, equal_nan=True)
+    assert np.allclose(np.concatenate([p.hour for p in parts]), whole.hour, equal_nan=True)
+
+    for i in (0, 59, 60, 3000, 7199):
+        window = whole.sbspm[(times > times[i] - WINDOW) & (times <= times[i])]
+        assert np.isclose(whole.roll[i], np.nanmean(window))
+
+
+def test_hourly_rate_restarts_at_local_hour():
+    times, freq, kw = _stream()
+    batch = SbspmCalculator(CURVE, WINDOW).update(times, freq, kw)
+
+    boundary = 1800  # 16:00 local
+    assert batch.hour_start[boundary] != batch.hour_start[boundary - 1]
+    assert np.isclose(batch.hour[boundary - 1], np.nanmean(batch.sbspm[:boundary]))
+    assert np.isclose(batch.hour[-1], np.nanmean(batch.sbspm[5400:]))
+
+    hours, counts, passed = hourly_totals(batch)
+    assert len(hours) == 3
+    assert counts.sum() == np.count_nonzero(~np.isnan(batch.sbspm))
+    assert np.isclose(passed[1] / counts[1], batch.hour[5399])
@@ -0,0 +1,76 @@
+"""Query scheduler tests."""
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ServiceOverloadedError
+from app.db.session import QueryScheduler
+
+
+async def test_live_has_reserved_capacity():
+    """Analytics cannot take the slots reserved for live queries."""
+    scheduler = QueryScheduler(capacity=3, live_reserved=1, analytics_wait=0.05)
+    await scheduler.acquire("meter", "analytics")
+    await scheduler.acquire("meter", "analytics")
+
+    with pytest.raises(ServiceOverloadedError):
+        await scheduler.acquire("meter", "analytics")
+
+    await asyncio.wait_for(scheduler.acquire("meter", "live"), timeout=0.1)
+    metrics = scheduler.metrics()["databases"]["meter"]
+    assert metrics["in_use"] == {"live": 1, "analytics": 2}
+    assert metrics["shed"] == 1
+
+
+async def test_live_waiters_are_woken_first():
+    """A freed slot goes to a queued live query before queued analytics."""
+    scheduler = QueryScheduler(capacity=1, live_reserved=0, analytics_wait=1.0)
+    await scheduler.acquire("schedule", "analytics")
+
+    order: list[str] = []
+
+    async def wait(priority):
+        await scheduler.acquire("schedule", priority)
+        order.append(priority)
+
+    analytics = asyncio.create_task(wait("analytics"))
+    await asyncio.sleep(0)
+    live = asyncio.create_task(wait("live"))
+    await asyncio.sleep(0)
+    assert scheduler.metrics()["databases"]["schedule"]["queued"] == {
+        "live": 1,
+        "analytics": 1,
+    }
+
+    scheduler.release("schedule", "analytics")
+    await live
+    assert order == ["live"]
+
+    scheduler.release("schedule", "live")
+    await analytics
+    assert order == ["live", "analytics"]
+
+
+async def test_cancelled_waiter_leaves_queue():
+    """Cancelling a queued query removes it without leaking a slot."""
+    scheduler = QueryScheduler(capacity=1, live_reserved=0, analytics_wait=1.0)
+    await scheduler.acquire("pcs", "live")
+
+    waiter = asyncio.create_task(scheduler.acquire("pcs", "live"))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    scheduler.release("pcs", "live")
+    metrics = scheduler.metrics()["databases"]["pcs"]
+    assert metrics["in_use"] == {"live": 0, "analytics": 0}
+    assert metrics["queued"] == {"live": 0, "analytics": 0}
+
+
+async def test_zero_capacity_disables_scheduling():
+    """capacity=0 admits everything without tracking."""
+    scheduler = QueryScheduler(capacity=0, live_reserved=0, analytics_wait=0.0)
+    async with scheduler.slot("ess", "analytics"):
+        pass
+    assert scheduler.metrics()["databases"] == {}
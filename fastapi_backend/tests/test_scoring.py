@@ -0,0 +1,84 @@
+"""Event response scoring tests."""
+import numpy as np
+
+from app.analytics.scoring import EventWindows, score_events
+from app.services import income
+
+T0 = np.datetime64("2024-01-01T00:00:00", "us")
+SECOND = np.timedelta64(1, "s")
+HOUR = np.timedelta64(1, "h")
+
+
+def _events(modes, capacity=1000.0, power=400.0):
+    n = len(modes)
+    start = T0 + np.arange(n) * HOUR
+    return EventWindows(
+        start=start,
+        end=start + HOUR,
+        mode=np.array(modes, dtype=object),
+        capacity=np.full(n, capacity),
+        power=np.full(n, power),
+    )
+
+
+def test_required_power_per_mode():
+    events = _events(["dreg", "edreg", "step", "full_power"])
+    times = T0 + np.array([0, 3600, 7200, 10800]) * SECOND
+    freq = np.array([59.865, 59.92, 60.3, 60.3])
+    kw = np.array([500.0, 500.0, 400.0, 1000.0])
+
+    result = score_events(times, freq, kw, events)
+
+    assert np.allclose(result.required_kw, [500.0, 500.0, 400.0, 1000.0])
+    assert result.compliance.tolist() == [1.0, 1.0, 1.0, 1.0]
+    assert result.event_index.tolist() == [0, 1, 2, 3]
+
+
+def test_samples_outside_windows_and_missing_data():
+    events = _events(["dreg"])
+    times = T0 + np.array([-5, 0, 1, 2, 3600]) * SECOND
+    freq = np.array([60.0, 60.0, 60.0, np.nan, 60.0])
+    kw = np.array([0.0, 0.0, 100.0, 0.0, 0.0])
+
+    result = score_events(times, freq, kw, events)
+
+    assert result.event_index.tolist() == [-1, 0, 0, 0, -1]
+    assert np.isnan(result.compliance[[0, 3, 4]]).all()
+    assert result.sample_count.tolist() == [2]
+    assert result.score.tolist() == [0.5]
+
+
+def test_full_day_scores_per_hour():
+    rng = np.random.default_rng(0)
+    events = _events(["dreg"] * 24)
+    times = T0 + np.arange(86_400) * SECOND
+    freq = 60.0 + rng.normal(0, 0.05, len(times))
+    deviation = 60.0 - freq
+    required = np.sign(deviation) * np.clip((np.abs(deviation) - 0.02) / 0.23, 0, 1) * 1000.0
+    kw = required + rng.normal(0, 20, len(times))
+    kw[7 * 3600 : 8 * 3600] = 0.0  # battery idle for one hour
+
+    result = score_events(times, freq, kw, events)
+
+    assert result.sample_count.tolist() == [3600] * 24
+    assert (np.delete(result.score, 7) > 0.8).all()
+    assert result.score[7] < 0.8
+
+
+def test_no_events():
+    times = T0 + np.arange(3) * SECOND
+    result = score_events(times, np.full(3, 60.0), np.zeros(3), _events([]))
+    assert result.score.tolist() == []
+    assert (result.event_index == -1).all()
+
+
+def test_event_windows_are_fetched_in_bounded_batches(monkeypatch):
+    """Telemetry queries cover at most query_max_raw_rows samples of windows."""
+    events = _events(["dreg"] * 30)
+    batches = income._batches(events, max_rows=3 * 3600)
+    assert [(b.start, b.stop) for b in batches] == [(i, i + 3) for i in range(0, 30, 3)]
+
+    monkeypatch.setattr(income, "MAX_WINDOWS_PER_QUERY", 4)
+    assert len(income._batches(events, max_rows=10**9)) == 8
+    # A window longer than the budget still gets its own query
+    assert len(income._batches(events, max_rows=60)) == 30
@@ -0,0 +1,165 @@
+"""Lazy session dependency and engine configuration tests."""
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, select, text
+
+from app.api import deps
+from app.api.deps import LazySession, MeterSession
+from app.core.config import settings
+from app.db.session import DatabaseManager, _init_read_only_connection, _store_thread_id
+from app.models.meter import MainMeter
+from app.models.pcs import PcsData
+
+
+class _RecordingManager:
+    """Stands in for ``db_manager``: records every session checkout."""
+
+    def __init__(self):
+        self.opened: list[tuple[str, bool, str]] = []
+        self.executed: list[str] = []
+        self.commits = 0
+
+    @asynccontextmanager
+    async def session(self, db_name, required=True, read_only=False, priority="live"):
+        self.opened.append((db_name, read_only, priority))
+        yield self
+        if not read_only:
+            self.commits += 1
+
+    async def execute(self, statement, *args, **kwargs):
+        self.executed.append(str(statement))
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = _RecordingManager()
+    monkeypatch.setattr(deps, "db_manager", recorder)
+    return recorder
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+
+    @app.get("/idle")
+    async def idle(db: MeterSession):
+        return {"ok": True}
+
+    @app.get("/query")
+    async def query(db: MeterSession):
+        await db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 2"))
+        return {"ok": True}
+
+    return app
+
+
+async def test_handler_without_queries_never_checks_out(app, recorder):
+    """A request whose handler never queries does not touch the pool."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/idle")).status_code == 200
+    assert recorder.opened == []
+
+
+async def test_read_only_checks_out_per_statement(app, recorder):
+    """Read-only proxies hold a connection only while each statement runs."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/query")).status_code == 200
+    assert recorder.opened == [("meter", True, "live"), ("meter", True, "live")]
+    assert recorder.executed == ["SELECT 1", "SELECT 2"]
+    assert recorder.commits == 0
+
+
+async def test_write_session_is_opened_once_and_committed(recorder):
+    """Read-write proxies keep one session for the request and commit at the end."""
+    async with LazySession("ess", read_only=False) as db:
+        assert recorder.opened == []
+        await db.execute(text("UPDATE t SET a = 1"))
+        await db.execute(text("UPDATE t SET b = 2"))
+        assert recorder.commits == 0
+    assert recorder.opened == [("ess", False, "live")]
+    assert recorder.commits == 1
+
+
+class _FakeDBAPIConnection:
+    """DBAPI connection recording the statements run by connect hooks."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def cursor(self):
+        connection = self
+
+        class Cursor:
+            def execute(self, statement):
+                connection.statements.append(statement)
+
+            def fetchone(self):
+                return (42,)
+
+            def close(self):
+                pass
+
+        return Cursor()
+
+
+def test_read_only_connections_are_set_up_on_connect():
+    """New read-only connections get READ COMMITTED and READ ONLY, once."""
+    connection = _FakeDBAPIConnection()
+    _init_read_only_connection(connection, SimpleNamespace(info={}))
+    assert connection.statements == [
+        "SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED",
+        "SET SESSION TRANSACTION READ ONLY",
+    ]
+
+    record = SimpleNamespace(info={})
+    _store_thread_id(connection, record)
+    assert record.info["mysql_thread_id"] == 42
+
+
+def test_read_and_write_engines_are_configured_separately():
+    """Only read-only pools run the session setup and autocommit."""
+    manager = DatabaseManager()
+    read = manager.get_engine("meter", read_only=True).sync_engine
+    write = manager.get_engine("meter").sync_engine
+
+    assert read is not write
+    assert event.contains(read, "connect", _init_read_only_connection)
+    assert not event.contains(write, "connect", _init_read_only_connection)
+    assert event.contains(write, "connect", _store_thread_id)
+    assert read.dialect._on_connect_isolation_level == "AUTOCOMMIT"
+    assert write.dialect._on_connect_isolation_level is None
+
+
+def test_per_host_sessions_share_a_pool_and_translate_schemas(monkeypatch):
+    """per_host databases share one host pool; ORM tables get the database name."""
+    monkeypatch.setattr(settings, "db_pool_mode", "per_host")
+    manager = DatabaseManager()
+    meter = manager.get_engine("meter", read_only=True)
+    pcs = manager.get_engine("pcs", read_only=True)
+
+    assert meter.sync_engine.pool is pcs.sync_engine.pool
+    assert meter.sync_engine.url.database is None
+    assert manager.get_engine("meter").sync_engine.pool is not meter.sync_engine.pool
+
+    bound = manager.get_session_factory("meter", read_only=True).kw["bind"]
+    translate = bound.get_execution_options()["schema_translate_map"]
+    assert translate == {None: settings.db_name_meter}
+    sql = str(
+        select(MainMeter.KW_tot).compile(
+            dialect=meter.dialect, schema_translate_map=translate, render_schema_translate=True
+        )
+    )
+    assert f"FROM `{settings.db_name_meter}`.`MMAIN`" in sql
+
+    translate = pcs.get_execution_options()["schema_translate_map"]
+    sql = str(
+        select(PcsData).compile(
+            dialect=pcs.dialect, schema_translate_map=translate, render_schema_translate=True
+        )
+    )
+    assert f"FROM `{settings.db_name_pcs}`.pcs0_data" in sql
@@ -0,0 +1,81 @@
+"""Income settlement engine tests."""
+from datetime import datetime
+
+import numpy as np
+
+from app.analytics.settlement import DEFAULT_RULES, hour_offsets, settle
+
+START = datetime(2024, 1, 1)
+
+
+def _settle(hours=48, **overrides):
+    columns = dict(
+        event_hours=np.array([1, 2, 3, 4, 30]),
+        quote_capacity=np.array([5.0, 5.0, 5.0, 5.0, 2.0]),
+        price=np.array([100.0, 100.0, 100.0, 100.0, 200.0]),
+        is_get=np.array([True, True, True, False, True]),
+        interrupt=np.array([False, False, True, False, False]),
+        rate_hours=np.array([1, 2, 3, 4]),
+        exec_rate=np.array([0.97, 0.60, 0.10, 0.99]),
+    )
+    columns.update(overrides)
+    return settle(START, hours, **columns)
+
+
+def test_performance_index_bands():
+    rates = np.array([0.99, 0.95, 0.90, 0.80, 0.50, np.nan])
+    assert DEFAULT_RULES.performance_index(rates).tolist() == [1.0, 1.0, 0.7, 0.0, -2.4, 0.0]
+
+
+def test_hourly_fees():
+    result = _settle()
+
+    # Hour 1: full index; hour 2: penalty, no efficiency fee; hour 3: interrupt exempt
+    assert result.capacity_fee[1] == 500.0
+    assert result.efficiency_fee[1] == 5.0 * DEFAULT_RULES.efficiency_price
+    assert result.capacity_fee[2] == 5.0 * 100.0 * -2.4
+    assert result.efficiency_fee[2] == 0.0
+    assert result.performance_index[3] == 1.0
+    # Hour 4 was not won; hour 30 was won but has no meter data
+    assert not result.awarded[4] and result.total[4] == 0.0
+    assert result.awarded[30] and result.total[30] == 0.0
+    assert result.total.sum() == result.capacity_fee.sum() + result.efficiency_fee.sum()
+
+
+def test_daily_totals_and_averages():
+    result = _settle()
+    daily = result.daily_totals()
+
+    assert daily["awarded_hours"].tolist() == [3, 1]
+    assert np.isclose(daily["total"].sum(), result.total.sum())
+    assert np.isclose(daily["exec_rate"][0], (0.97 + 0.60 + 0.10) / 3)
+    assert daily["exec_rate"][1] == 0.0
+    assert np.isclose(result.mean_over_awarded(result.exec_rate), (0.97 + 0.60 + 0.10) / 3)
+
+
+def test_hour_offsets_and_out_of_range_events():
+    times = np.array(["2024-01-01T00:59", "2024-01-01T05:00", "2023-12-31T23:00"], "datetime64[us]")
+    assert hour_offsets(times, START).tolist() == [0, 5, -1]
+
+    result = _settle(hours=24)
+    assert result.days == 1
+    assert not result.awarded[result.hours - 1]
+
+
+def test_daily_totals_split_at_local_midnight():
+    """A settlement starting mid-day is summed per local day, partial days included."""
+    result = settle(
+        datetime(2024, 1, 1, 20),
+        8,
+        event_hours=np.array([1, 5]),
+        quote_capacity=np.array([5.0, 5.0]),
+        price=np.array([100.0, 100.0]),
+        is_get=np.array([True, True]),
+        interrupt=np.array([False, False]),
+        rate_hours=np.array([1, 5]),
+        exec_rate=np.array([0.97, 0.97]),
+    )
+    daily = result.daily_totals()
+    assert result.days == 2
+    assert daily["awarded_hours"].tolist() == [1, 1]
+    assert daily["capacity_fee"].tolist() == [500.0, 500.0]
@@ -0,0 +1,158 @@
+"""Settlement store and cached settlement tests."""
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+
+import fakeredis
+import numpy as np
+import pytest
+
+from app.analytics.settlement import settle
+from app.services import income, settlement_store
+from app.services.settlement_store import SettlementStore
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    @asynccontextmanager
+    async def unavailable():
+        yield None
+
+    monkeypatch.setattr(settlement_store, "get_redis_safe", unavailable)
+
+
+def _hours(start, count):
+    return [start + timedelta(hours=i) for i in range(count)]
+
+
+async def test_rows_survive_restart_and_are_write_once(tmp_path):
+    path = tmp_path / "settlement.sqlite3"
+    hours = _hours(datetime(2024, 1, 1), 3)
+    rows = {hour: ("QC1", (1.0, 5.0, float("nan"), 1.0, 500.0, 1750.0)) for hour in hours}
+
+    store = SettlementStore(path, cache_days=2)
+    await store.put(rows)
+    await store.put({hours[0]: ("QC2", (0.0,) * 6)})
+    assert (await store.get(hours[:1]))[hours[0]][0] == "QC1"
+    store.close()
+
+    reopened = SettlementStore(path, cache_days=2)
+    found = await reopened.get(hours + [datetime(2024, 1, 2)])
+    assert set(found) == set(hours)
+    assert found[hours[0]][0] == "QC1"
+    assert np.isnan(found[hours[1]][1][2])
+    reopened.close()
+
+
+async def test_instances_agree_on_first_value_through_redis(tmp_path, monkeypatch):
+    """A second instance adopts the hour another instance stored first."""
+    redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    @asynccontextmanager
+    async def shared():
+        yield redis
+
+    monkeypatch.setattr(settlement_store, "get_redis_safe", shared)
+    hour = datetime(2024, 1, 1, 5)
+    first = SettlementStore(tmp_path / "a.sqlite3")
+    second = SettlementStore(tmp_path / "b.sqlite3")
+
+    await first.put({hour: ("QC1", (1.0,) * 6)})
+    await second.put({hour: ("QC2", (0.0,) * 6)})
+
+    assert await redis.hkeys(f"{settlement_store.REDIS_KEY_PREFIX}2024-01-01") == ["05"]
+    for store in (first, second):
+        assert (await store.get([hour]))[hour] == ("QC1", (1.0,) * 6)
+        assert store._select(hour, hour)[hour][0] == "QC1"
+        store.close()
+    await redis.aclose()
+
+
+async def test_rows_of_another_version_are_discarded(tmp_path, monkeypatch):
+    path = tmp_path / "settlement.sqlite3"
+    hour = datetime(2024, 1, 1)
+    store = SettlementStore(path)
+    await store.put({hour: ("QC1", (1.0,) * 6)})
+    store.close()
+
+    monkeypatch.setattr(settlement_store, "STORE_VERSION", settlement_store.STORE_VERSION + 1)
+    reopened = SettlementStore(path)
+    assert await reopened.get([hour]) == {}
+    reopened.close()
+
+
+async def test_lru_keeps_most_recent_days(tmp_path):
+    store = SettlementStore(tmp_path / "s.sqlite3", cache_days=2)
+    for day in range(1, 4):
+        await store.put({datetime(2024, 1, day): ("", (0.0,) * 6)})
+    assert list(store._days) == [date(2024, 1, 2), date(2024, 1, 3)]
+    store.close()
+
+
+async def test_settle_days_computes_only_uncached_hours(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_settle_hours(schedule_db, meter_db, start, hours):
+        calls.append((start, hours))
+        return settle(
+            start,
+            hours,
+            event_hours=np.arange(hours),
+            quote_capacity=np.full(hours, 5.0),
+            price=np.full(hours, 100.0),
+            is_get=np.ones(hours, dtype=bool),
+            interrupt=np.zeros(hours, dtype=bool),
+            quote_code=np.full(hours, "QC1", dtype=object),
+            rate_hours=np.arange(hours),
+            exec_rate=np.full(hours, 0.97),
+        )
+
+    monkeypatch.setattr(income, "settle_hours", fake_settle_hours)
+    store = SettlementStore(tmp_path / "s.sqlite3")
+
+    first = await income.settle_days(None, None, date(2024, 1, 1), 2, store=store)
+    second = await income.settle_days(None, None, date(2024, 1, 1), 2, store=store)
+
+    assert calls == [(datetime(2024, 1, 1), 48)]
+    assert np.array_equal(first.total, second.total)
+    assert second.quote_code[0] == "QC1"
+    store.close()
+
+
+async def test_unfinished_hours_are_settled_on_their_own(tmp_path, monkeypatch):
+    """An awarded hour without meter data is recomputed alone, not to the month end."""
+    calls = []
+    no_data = datetime(2024, 1, 1, 5)
+
+    async def fake_settle_hours(schedule_db, meter_db, start, hours):
+        calls.append((start, hours))
+        grid = np.array([start + timedelta(hours=i) for i in range(hours)])
+        return settle(
+            start,
+            hours,
+            event_hours=np.arange(hours),
+            quote_capacity=np.full(hours, 5.0),
+            price=np.full(hours, 100.0),
+            is_get=np.ones(hours, dtype=bool),
+            interrupt=np.zeros(hours, dtype=bool),
+            quote_code=np.full(hours, "QC1", dtype=object),
+            rate_hours=np.arange(hours),
+            exec_rate=np.where(grid == no_data, np.nan, 0.97),
+        )
+
+    monkeypatch.setattr(income, "settle_hours", fake_settle_hours)
+    store = SettlementStore(tmp_path / "s.sqlite3")
+
+    await income.settle_days(None, None, date(2024, 1, 1), 2, store=store)
+    again = await income.settle_days(None, None, date(2024, 1, 1), 2, store=store)
+
+    assert calls == [(datetime(2024, 1, 1), 48), (no_data, 1)]
+    assert np.isnan(again.exec_rate[5]) and again.exec_rate[6] == 0.97
+    store.close()
+
+
+def test_closed_hours():
+    start = datetime(2024, 1, 1)
+    assert income.closed_hours(start, 24, now=datetime(2023, 12, 31)) == 0
+    assert income.closed_hours(start, 24, now=datetime(2024, 1, 1, 3, 10)) == 3
+    assert income.closed_hours(start, 24, now=datetime(2024, 1, 1, 3, 1)) == 2
+    assert income.closed_hours(start, 24, now=datetime(2024, 2, 1)) == 24
@@ -64,3 +64,17 @@ async def test_topology_links_structure(client: AsyncClient):
         assert "target" in link
         assert "status" in link
         assert link["status"] in ["connected", "disconnected"]
+
+
+@pytest.mark.asyncio
+async def test_topology_forced_refresh(client: AsyncClient):
+    """Test topology can be force-refreshed and reports latency fields."""
+    response = await client.get("/api/v1/system/topology?refresh=true")
+    data = check_response_or_skip(response)
+
+    for node in data["nodes"]:
+        assert "latency_ms" in node
+        if node["status"] == "offline":
+            assert node["latency_ms"] is None
+    for link in data["links"]:
+        assert "latency_ms" in link
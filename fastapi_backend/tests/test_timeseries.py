@@ -0,0 +1,205 @@
+"""Unified time-series engine and endpoint tests."""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.exceptions import DatabaseConnectionError, ValidationError
+from app.db.base import Base
+from app.models.meter import MainMeter
+from app.services.timeseries import (
+    TimeSeriesQuery,
+    aggregate_select,
+    combine_rollups,
+    fetch_query,
+    local_midnight_utc,
+    plan_query,
+    split_at_coverage,
+)
+from tests.conftest import check_response_or_skip, check_response_or_skip_multi
+
+# 2024-01-01 00:00 local time
+MIDNIGHT = datetime(2023, 12, 31, 16)
+
+
+def _query(
+    metrics=("KW_tot",),
+    aggregation="avg",
+    step=60,
+    start=MIDNIGHT,
+    duration=timedelta(days=1),
+    source="MMAIN",
+) -> TimeSeriesQuery:
+    return TimeSeriesQuery.build(source, list(metrics), start, start + duration, aggregation, step)
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_build_validates():
+    with pytest.raises(ValidationError):
+        _query(source="MBESS")
+    with pytest.raises(ValidationError):
+        _query(metrics=("KW_tot", "item"))
+    with pytest.raises(ValidationError):
+        _query(duration=timedelta(0))
+    assert _query(metrics=("KW_tot", "Freq", "KW_tot")).metrics == ("KW_tot", "Freq")
+
+
+def test_origin_is_local_midnight():
+    assert local_midnight_utc(datetime(2024, 1, 1, 3)) == datetime(2023, 12, 31, 16)
+    assert local_midnight_utc(datetime(2024, 1, 1, 17)) == datetime(2024, 1, 1, 16)
+
+
+def test_plan_prefers_rollups_when_exact():
+    assert plan_query(_query(step=0)) == "raw"
+    assert plan_query(_query(step=60)) == "bucket"
+    assert plan_query(_query(step=3600)) == "hourly"
+    assert plan_query(_query(step=86400, duration=timedelta(days=7))) == "daily"
+    assert plan_query(_query(metrics=("KWH_del",), aggregation="delta", step=7200)) == "hourly"
+    # Not hour-aligned, no rollup column, or a source without rollups
+    assert plan_query(_query(step=3600, start=MIDNIGHT + timedelta(minutes=30))) == "bucket"
+    assert plan_query(_query(metrics=("Freq",), step=3600)) == "bucket"
+    assert plan_query(_query(metrics=("KWH_del",), aggregation="avg", step=3600)) == "bucket"
+    assert plan_query(_query(metrics=("DC_power",), step=3600, source="INVERTER_1")) == "bucket"
+
+
+def test_aggregate_select_is_one_group_by():
+    sql = _sql(aggregate_select(_query(metrics=("KW_tot", "Freq"), aggregation="max", step=300)))
+    assert sql.count("GROUP BY") == 1
+    assert "DIV 300" in sql
+    assert "max(`MMAIN`.`KW_tot`)" in sql
+    # The range predicate stays on the bare, indexable column
+    assert "`MMAIN`.`EventTime` >= '2023-12-31 16:00:00'" in sql
+    assert "`MMAIN`.`EventTime` < '2024-01-01 16:00:00'" in sql
+
+
+def test_delta_joins_bucket_edges_by_primary_key():
+    sql = _sql(aggregate_select(_query(metrics=("KWH_del",), aggregation="delta", step=900)))
+    assert sql.count("GROUP BY") == 1
+    assert "min(CASE WHEN (`MMAIN`.`KWH_del` IS NOT NULL) THEN `MMAIN`.item END)" in sql
+    assert sql.count("LEFT OUTER JOIN") == 2
+    assert "`KWH_del__last`.`KWH_del` - `KWH_del__first`.`KWH_del`" in sql
+
+
+def test_combine_hourly_rollups():
+    query = _query(metrics=("KW_tot",), aggregation="avg", step=2 * 3600)
+    hours = np.datetime64(MIDNIGHT, "us") + np.arange(4) * np.timedelta64(1, "h")
+    rollups = {
+        "sample_count": np.array([3600, 1800, 3600, 0]),
+        "avg_kw": np.array([100.0, 400.0, 50.0, np.nan]),
+    }
+    times, values = combine_rollups(query, hours, rollups)
+    assert times.tolist() == hours[::2].tolist()
+    assert np.allclose(values["KW_tot"], [200.0, 50.0])
+
+    query = _query(metrics=("KWH_del",), aggregation="delta", step=2 * 3600)
+    rollups = {
+        "sample_count": np.array([1, 1, 1, 1]),
+        "first_kwh_del": np.array([np.nan, 12.0, 20.0, 25.0]),
+        "last_kwh_del": np.array([np.nan, 15.0, 24.0, np.nan]),
+    }
+    times, values = combine_rollups(query, hours, rollups)
+    assert np.allclose(values["KWH_del"], [3.0, 4.0])
+
+
+def test_rollups_only_answer_hours_before_the_watermark():
+    """The part of the range past the rollup watermark falls back to bucket."""
+    query = _query(step=3 * 3600, duration=timedelta(days=2))
+
+    covered, rest = split_at_coverage(query, MIDNIGHT + timedelta(hours=31))
+    assert (covered.start, covered.end) == (MIDNIGHT, MIDNIGHT + timedelta(hours=30))
+    assert (rest.start, rest.end) == (MIDNIGHT + timedelta(hours=30), query.end)
+    # The remainder keeps the original bucket alignment
+    assert rest.origin == covered.origin == query.origin
+    assert plan_query(covered) == "hourly"
+
+    covered, rest = split_at_coverage(query, None)
+    assert covered is None and (rest.start, rest.end) == (query.start, query.end)
+    covered, rest = split_at_coverage(query, query.end + timedelta(days=1))
+    assert covered.end == query.end and rest is None
+
+
+@pytest.mark.asyncio
+async def test_get_timeseries(client: AsyncClient):
+    """Test the time-series endpoint returns correct structure."""
+    response = await client.get(
+        "/api/v1/timeseries?source=MMAIN&metrics=KW_tot,Freq&aggregation=max&step=300"
+    )
+    data = check_response_or_skip(response)
+
+    assert data["columns"] == ["time", "KW_tot", "Freq"]
+    assert data["resolution"] == "bucket"
+    assert isinstance(data["data"], list)
+    assert data["status"] == "success"
+
+
+@pytest.mark.asyncio
+async def test_get_timeseries_rejects_unknown_metric(client: AsyncClient):
+    """Test unknown metrics are rejected before querying."""
+    response = await client.get("/api/v1/timeseries?source=MMAIN&metrics=nope")
+    check_response_or_skip_multi(response, [422])
+
+
+@pytest.mark.asyncio
+async def test_get_timeseries_rejects_oversized_raw_request(client: AsyncClient):
+    """Test a raw month without downsampling is refused with 413."""
+    response = await client.get(
+        "/api/v1/timeseries?source=MMAIN&metrics=Freq&step=0&downsample=false"
+        "&start_time=2024-01-01T00:00:00&end_time=2024-02-01T00:00:00"
+    )
+    check_response_or_skip_multi(response, [413])
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fail_first", [False, True])
+async def test_get_timeseries_owns_its_stream(client: AsyncClient, monkeypatch, fail_first):
+    """The row stream is opened and closed by the body; early errors keep their status."""
+    closed = []
+
+    async def fake_stream(db, query, resolution):
+        try:
+            if fail_first:
+                raise DatabaseConnectionError()
+            yield [[0, 1.0]]
+            yield []
+            yield [[1000, 2.0]]
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr("app.api.v1.timeseries.stream_query", fake_stream)
+    response = await client.get(
+        "/api/v1/timeseries?source=MMAIN&metrics=Freq&step=0"
+        "&start_time=2024-01-01T00:00:00&end_time=2024-01-01T00:10:00"
+    )
+
+    assert closed == [True]
+    if fail_first:
+        assert response.status_code == 503
+    else:
+        assert response.json()["data"] == [[0, 1.0], [1000, 2.0]]
+
+
+async def test_fetch_query_reads_raw_rows_into_arrays(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'meter.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[MainMeter.__table__])
+        await conn.execute(
+            insert(MainMeter),
+            [
+                {"item": 1, "EventTime": MIDNIGHT, "Freq": 60.0},
+                {"item": 2, "EventTime": MIDNIGHT + timedelta(seconds=1), "Freq": None},
+            ],
+        )
+    async with AsyncSession(engine) as session:
+        rows = await fetch_query(session, _query(("Freq",), step=0), "raw")
+    await engine.dispose()
+
+    assert rows["EventTime"].dtype == np.dtype("datetime64[us]")
+    assert rows["EventTime"][0] == np.datetime64(MIDNIGHT, "us")
+    np.testing.assert_array_equal(rows["Freq"], [60.0, np.nan])